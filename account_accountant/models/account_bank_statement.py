@@ -1,4 +1,5 @@
 import logging
+import time
 
 from odoo import _, api, fields, models
 from odoo.addons.base.models.res_bank import sanitize_account_number
@@ -12,6 +13,9 @@ from markupsafe import Markup
 
 _logger = logging.getLogger(__name__)
 
+# Number of statement lines whose invoice matching candidates are fetched at once by the auto-reconciliation CRON.
+AUTO_RECONCILE_PREFETCH_SIZE = 100
+
 class AccountBankStatement(models.Model):
     _name = "account.bank.statement"
     _inherit = ['mail.thread.main.attachment', 'account.bank.statement']
@@ -127,13 +131,19 @@ class AccountBankStatementLine(models.Model):
         st_lines, remaining_line_id = (self, None) if self else _compute_st_lines_to_reconcile(configured_company)
 
         nb_auto_reconciled_lines = 0
+        prefetched_candidates = None
+        processing_start = time.monotonic()
         for index, st_line in enumerate(st_lines):
             # we want the cron to run only for limit_time seconds
             if limit_time and fields.Datetime.now().timestamp() - start_time.timestamp() > limit_time:
                 remaining_line_id = st_line.id
                 st_lines = st_lines[:index]
                 break
-            wizard = self.env['bank.rec.widget'].with_context(default_st_line_id=st_line.id).new({})
+            if index % AUTO_RECONCILE_PREFETCH_SIZE == 0:
+                prefetched_candidates = st_lines[index:index + AUTO_RECONCILE_PREFETCH_SIZE]._prefetch_invoice_matching_candidates()
+            wizard = self.env['bank.rec.widget']\
+                .with_context(default_st_line_id=st_line.id, invoice_matching_amls_candidates=prefetched_candidates)\
+                .new({})
             wizard._action_trigger_matching_rules()
             if wizard.state == 'valid' and wizard.matching_rules_allow_auto_reconcile:
                 try:
@@ -144,6 +154,10 @@ class AccountBankStatementLine(models.Model):
                             ', '.join(st_line.move_id.line_ids.reconcile_model_id.mapped('name')),
                         ))
                         nb_auto_reconciled_lines += 1
+                    # An open balance left on a receivable/payable account is a new candidate for the next statement lines,
+                    # which was not prefetched: fall back on fetching the candidates line by line until the next batch.
+                    if st_line.move_id.line_ids.filtered(lambda line: line.account_id.reconcile and not line.reconciled):
+                        prefetched_candidates = None
                 except UserError as e:
                     _logger.info("Failed to auto reconcile statement line %s due to user error: %s",
                         st_line.id,
@@ -153,12 +167,35 @@ class AccountBankStatementLine(models.Model):
 
         st_lines.write({'cron_last_check': start_time})
 
+        if st_lines:
+            duration = time.monotonic() - processing_start
+            _logger.info(
+                "Auto reconciliation: %s statement lines processed in %.2fs (%.1f lines/s), %s reconciled",
+                len(st_lines),
+                duration,
+                len(st_lines) / duration if duration else 0.0,
+                nb_auto_reconciled_lines,
+            )
+
         # If the next statement line has never been auto reconciled yet, force the trigger.
         if remaining_line_id:
             remaining_st_line = self.env['account.bank.statement.line'].browse(remaining_line_id)
             if nb_auto_reconciled_lines or not remaining_st_line.cron_last_check:
                 self.env.ref('account_accountant.auto_reconcile_bank_statement_line')._trigger()
 
+    def _prefetch_invoice_matching_candidates(self):
+        """ Fetches at once the candidates of the 'invoice_matching' reconciliation models for the statement lines in self.
+
+        :return: A dict to be passed in the 'invoice_matching_amls_candidates' context key when applying the matching rules.
+        """
+        if not self:
+            return {}
+        reconcile_models = self.env['account.reconcile.model'].search([
+            ('rule_type', '=', 'invoice_matching'),
+            ('company_id', 'in', self.company_id.ids),
+        ])
+        return reconcile_models._prefetch_invoice_matching_amls_candidates(self)
+
     def _retrieve_partner(self):
         self.ensure_one()
 
@@ -7,7 +7,9 @@ import re
 from odoo import fields, models, api, _, Command
 from odoo.exceptions import UserError
 from odoo.osv import expression
-from odoo.tools import SQL, float_compare
+from odoo.tools import SQL, create_index, float_compare
+
+from .account_reconcile_model import NUMERICAL_TOKENS_EXPRESSION, OPEN_LINES_CONDITION
 
 
 _logger = logging.getLogger(__name__)
@@ -63,6 +65,29 @@ class AccountMove(models.Model):
     show_signature_area = fields.Boolean(compute='_compute_signature')
     signature = fields.Binary(compute='_compute_signature')  # can't be `related`: the sign module might not be there
 
+    def init(self):
+        super().init()
+        # Used by the 'invoice_matching' reconciliation models to find the moves whose number or reference contain the tokens
+        # of a statement line, see '_get_invoice_matching_tokens_filter_query'. The exact match on the number uses the unique index
+        # on the name of the posted moves.
+        for field in ('name', 'ref'):
+            create_index(
+                self.env.cr,
+                indexname=f'account_move_{field}_matching_tokens_idx',
+                tablename=self._table,
+                expressions=[NUMERICAL_TOKENS_EXPRESSION % field],
+                method='gin',
+                where="state = 'posted'",
+            )
+        create_index(
+            self.env.cr,
+            indexname='account_move_ref_matching_idx',
+            tablename=self._table,
+            expressions=['ref'],
+            method='hash',
+            where="state = 'posted'",
+        )
+
     @api.depends('state', 'move_type', 'invoice_user_id')
     def _compute_signing_user(self):
         other_moves = self.filtered(lambda move: not move.is_sale_document())
@@ -432,6 +457,28 @@ class AccountMoveLine(models.Model):
     has_deferred_moves = fields.Boolean(compute='_compute_has_deferred_moves')
     has_abnormal_deferred_dates = fields.Boolean(compute='_compute_has_abnormal_deferred_dates')
 
+    def init(self):
+        super().init()
+        # Used by the 'invoice_matching' reconciliation models to find the open journal items whose label contains the tokens
+        # of a statement line, see '_get_invoice_matching_tokens_filter_query'. Only the journal items of reconcilable accounts
+        # have a residual amount, so the indexes don't cover the bulk of the journal items, on income and expense accounts.
+        create_index(
+            self.env.cr,
+            indexname='account_move_line_name_matching_tokens_idx',
+            tablename=self._table,
+            expressions=[NUMERICAL_TOKENS_EXPRESSION % 'name'],
+            method='gin',
+            where=OPEN_LINES_CONDITION % {'table': 'account_move_line'},
+        )
+        create_index(
+            self.env.cr,
+            indexname='account_move_line_name_matching_idx',
+            tablename=self._table,
+            expressions=['name'],
+            method='hash',
+            where=OPEN_LINES_CONDITION % {'table': 'account_move_line'},
+        )
+
     def _order_to_sql(self, order, query, alias=None, reverse=False):
         sql_order = super()._order_to_sql(order, query, alias, reverse)
         preferred_aml_residual_value = self._context.get('preferred_aml_value')
@@ -1,10 +1,18 @@
 from odoo import fields, models, Command, tools
+from odoo.osv import expression
 from odoo.tools import SQL
 
 import re
 from collections import defaultdict
 from dateutil.relativedelta import relativedelta
 
+# Splits a text into the numerical tokens matched by the 'invoice_matching' rules.
+# account_move_line and account_move have GIN indexes on this expression, see the init of these models.
+NUMERICAL_TOKENS_EXPRESSION = r"REGEXP_SPLIT_TO_ARRAY(SUBSTRING(REGEXP_REPLACE(%s, '[^0-9\s]', '', 'g'), '\S(?:.*\S)*'), '\s+')"
+# Restricts the journal items to the ones that can still be matched: the unreconciled journal items always have a residual amount.
+# The indexes on the journal items used by the 'invoice_matching' rules have this predicate, see the init of account.move.line.
+OPEN_LINES_CONDITION = "%(table)s.reconciled IS NOT TRUE AND (%(table)s.amount_residual != 0 OR %(table)s.amount_residual_currency != 0)"
+
 
 class AccountReconcileModel(models.Model):
     _inherit = 'account.reconcile.model'
@@ -209,46 +217,16 @@ class AccountReconcileModel(models.Model):
 
         return numerical_tokens, list(exact_tokens), text_tokens
 
-    def _get_invoice_matching_amls_candidates(self, st_line, partner):
-        """ Returns the match candidates for the 'invoice_matching' rule, with respect to the provided parameters.
+    def _get_invoice_matching_tokens_query(self, tables, where_clause, numerical_tokens=True, exact_tokens=True, searched_tokens=None):
+        """ Returns the query splitting the journal items matching the provided clauses into tokens, with one row
+        (id, date, date_maturity, token, token_type) per token found in their label or in the number and reference of their move.
 
-        :param st_line: A statement line.
-        :param partner: The partner associated to the statement line.
+        :param numerical_tokens:    Whether to include the numerical tokens, having token_type 'numerical'.
+        :param exact_tokens:        Whether to include the whole texts as tokens, having token_type 'exact'.
+        :param searched_tokens:     If provided, only the journal items having at least one of these tokens are split. They are
+                                    found using the indexes on the tokens, instead of reading all the open journal items.
         """
-        def get_order_by_clause(prefix=SQL()):
-            direction = SQL(' DESC') if self.matching_order == 'new_first' else SQL(' ASC')
-            return SQL(", ").join(
-                SQL("%s%s%s", prefix, SQL(field), direction)
-                for field in ('date_maturity', 'date', 'id')
-            )
-
-        assert self.rule_type == 'invoice_matching'
-        self.env['account.move'].flush_model()
-        self.env['account.move.line'].flush_model()
-
-        aml_domain = self._get_invoice_matching_amls_domain(st_line, partner)
-        query = self.env['account.move.line']._where_calc(aml_domain)
-        tables = query.from_clause
-        where_clause = query.where_clause or SQL("TRUE")
-
-        aml_cte = SQL()
         sub_queries: list[SQL] = []
-        numerical_tokens, exact_tokens, _text_tokens = self._get_invoice_matching_st_line_tokens(st_line)
-        if numerical_tokens or exact_tokens:
-            aml_cte = SQL('''
-                WITH aml_cte AS (
-                    SELECT
-                        account_move_line.id as account_move_line_id,
-                        account_move_line.date as account_move_line_date,
-                        account_move_line.date_maturity as account_move_line_date_maturity,
-                        account_move_line.name as account_move_line_name,
-                        account_move_line__move_id.name as account_move_line__move_id_name,
-                        account_move_line__move_id.ref as account_move_line__move_id_ref
-                    FROM %s
-                    JOIN account_move account_move_line__move_id ON account_move_line__move_id.id = account_move_line.move_id
-                    WHERE %s
-                )
-            ''', tables, where_clause)
         if numerical_tokens:
             for table_alias, field in (
                 ('account_move_line', 'name'),
@@ -268,7 +246,8 @@ class AccountReconcileModel(models.Model):
                                 ),
                                 '\s+'
                             )
-                        ) AS token
+                        ) AS token,
+                        'numerical' AS token_type
                     FROM aml_cte
                     WHERE %(field)s IS NOT NULL
                 ''', field=SQL("%s_%s", SQL(table_alias), SQL(field))))
@@ -283,29 +262,146 @@ class AccountReconcileModel(models.Model):
                         account_move_line_id as id,
                         account_move_line_date as date,
                         account_move_line_date_maturity as date_maturity,
-                        %(field)s AS token
+                        %(field)s AS token,
+                        'exact' AS token_type
                     FROM aml_cte
                     WHERE %(field)s != ''
                 ''', field=SQL("%s_%s", SQL(table_alias), SQL(field))))
-        if sub_queries:
-            order_by = get_order_by_clause(prefix=SQL('sub.'))
-            candidate_ids = [r[0] for r in self.env.execute_query(SQL(
-                '''
-                    %s
+
+        if searched_tokens is not None:
+            where_clause = SQL(
+                "%s AND account_move_line.id IN %s",
+                where_clause,
+                self._get_invoice_matching_tokens_filter_query(numerical_tokens, exact_tokens, searched_tokens),
+            )
+
+        return SQL(
+            '''
+                WITH aml_cte AS (
                     SELECT
-                        sub.id,
-                        COUNT(*) AS nb_match
-                    FROM (%s) AS sub
-                    WHERE sub.token IN %s
-                    GROUP BY sub.date_maturity, sub.date, sub.id
-                    HAVING COUNT(*) > 0
-                    ORDER BY nb_match DESC, %s
-                ''',
-                aml_cte,
-                SQL(" UNION ALL ").join(sub_queries),
-                tuple(numerical_tokens + exact_tokens),
-                order_by,
-            ))]
+                        account_move_line.id as account_move_line_id,
+                        account_move_line.date as account_move_line_date,
+                        account_move_line.date_maturity as account_move_line_date_maturity,
+                        account_move_line.name as account_move_line_name,
+                        account_move_line__move_id.name as account_move_line__move_id_name,
+                        account_move_line__move_id.ref as account_move_line__move_id_ref
+                    FROM %s
+                    JOIN account_move account_move_line__move_id ON account_move_line__move_id.id = account_move_line.move_id
+                    WHERE %s
+                )
+                SELECT * FROM (%s) AS sub
+            ''',
+            tables,
+            where_clause,
+            SQL(" UNION ALL ").join(sub_queries),
+        )
+
+    def _get_invoice_matching_tokens_filter_query(self, numerical_tokens, exact_tokens, searched_tokens):
+        """ Returns the subquery of the unreconciled journal items having one of the searched tokens in their label, or in the
+        number or reference of their posted move. Its conditions are the ones of the indexes created in the init of account.move
+        and account.move.line, so that its cost depends on the number of journal items having the tokens, not on the number
+        of open journal items.
+        """
+        searched_tokens = list({token for token in searched_tokens if token})
+        if not searched_tokens:
+            return SQL("(SELECT NULL::integer WHERE FALSE)")
+
+        line_conditions = []
+        move_conditions = []
+        if numerical_tokens:
+            line_conditions.append(SQL("%s && %s::text[]", SQL(NUMERICAL_TOKENS_EXPRESSION, SQL("line.name")), searched_tokens))
+            move_conditions += [
+                SQL("%s && %s::text[]", SQL(NUMERICAL_TOKENS_EXPRESSION, SQL("move.name")), searched_tokens),
+                SQL("%s && %s::text[]", SQL(NUMERICAL_TOKENS_EXPRESSION, SQL("move.ref")), searched_tokens),
+            ]
+        if exact_tokens:
+            line_conditions.append(SQL("line.name IN %s", tuple(searched_tokens)))
+            move_conditions += [
+                SQL("move.name IN %s", tuple(searched_tokens)),
+                SQL("move.ref IN %s", tuple(searched_tokens)),
+            ]
+
+        # The domain of the 'invoice_matching' rules only allows unreconciled journal items of reconcilable accounts and posted moves.
+        return SQL(
+            '''
+                (
+                    SELECT line.id
+                    FROM account_move_line line
+                    WHERE %s
+                    AND (%s)
+                    UNION
+                    SELECT line.id
+                    FROM account_move move
+                    JOIN account_move_line line ON line.move_id = move.id
+                    WHERE move.state = 'posted'
+                    AND %s
+                    AND (%s)
+                )
+            ''',
+            SQL(OPEN_LINES_CONDITION % {'table': 'line'}),
+            SQL(" OR ").join(line_conditions),
+            SQL(OPEN_LINES_CONDITION % {'table': 'line'}),
+            SQL(" OR ").join(move_conditions),
+        )
+
+    def _get_invoice_matching_amls_candidates(self, st_line, partner):
+        """ Returns the match candidates for the 'invoice_matching' rule, with respect to the provided parameters.
+
+        The candidates matching the tokens of the statement line can be computed beforehand for many statement lines at once
+        using _prefetch_invoice_matching_amls_candidates, and passed in the 'invoice_matching_amls_candidates' context key.
+
+        :param st_line: A statement line.
+        :param partner: The partner associated to the statement line.
+        """
+        def get_order_by_clause(prefix=SQL()):
+            direction = SQL(' DESC') if self.matching_order == 'new_first' else SQL(' ASC')
+            return SQL(", ").join(
+                SQL("%s%s%s", prefix, SQL(field), direction)
+                for field in ('date_maturity', 'date', 'id')
+            )
+
+        assert self.rule_type == 'invoice_matching'
+        self.env['account.move'].flush_model()
+        self.env['account.move.line'].flush_model()
+
+        aml_domain = self._get_invoice_matching_amls_domain(st_line, partner)
+        query = self.env['account.move.line']._where_calc(aml_domain)
+        tables = query.from_clause
+        where_clause = query.where_clause or SQL("TRUE")
+
+        candidate_ids = None
+        prefetched_candidates = (self.env.context.get('invoice_matching_amls_candidates') or {}).get(self.id, {})
+        if st_line.id in prefetched_candidates:
+            nb_match_per_aml_id = prefetched_candidates[st_line.id]
+            # Same order as the query below: the journal items having the most matching tokens first.
+            amls = self.env['account.move.line'].search(
+                [('id', 'in', list(nb_match_per_aml_id))] + aml_domain,
+                order=get_order_by_clause().code,
+            )
+            candidate_ids = sorted(amls.ids, key=lambda aml_id: -nb_match_per_aml_id[aml_id])
+        else:
+            numerical_tokens, exact_tokens, _text_tokens = self._get_invoice_matching_st_line_tokens(st_line)
+            if numerical_tokens or exact_tokens:
+                order_by = get_order_by_clause(prefix=SQL('sub.'))
+                candidate_ids = [r[0] for r in self.env.execute_query(SQL(
+                    '''
+                        SELECT
+                            sub.id,
+                            COUNT(*) AS nb_match
+                        FROM (%s) AS sub
+                        WHERE sub.token IN %s
+                        GROUP BY sub.date_maturity, sub.date, sub.id
+                        HAVING COUNT(*) > 0
+                        ORDER BY nb_match DESC, %s
+                    ''',
+                    self._get_invoice_matching_tokens_query(
+                        tables, where_clause, bool(numerical_tokens), bool(exact_tokens), searched_tokens=numerical_tokens + exact_tokens,
+                    ),
+                    tuple(numerical_tokens + exact_tokens),
+                    order_by,
+                ))]
+
+        if candidate_ids is not None:
             if candidate_ids:
                 return {
                     'allow_auto_reconcile': True,
@@ -353,6 +449,99 @@ class AccountReconcileModel(models.Model):
                 'amls': amls,
             }
 
+    def _prefetch_invoice_matching_amls_candidates(self, st_lines):
+        """ Batch version of the token matching done by _get_invoice_matching_amls_candidates: the journal items are split into tokens
+        once for all the statement lines, instead of once per statement line.
+
+        The journal items are only fetched using the part of the domain that is common to all the statement lines; the domain of each
+        statement line is applied when using the result, so that the candidates are exactly the same as without prefetching.
+
+        :param st_lines:    The statement lines to match.
+        :return:            A dict {reconcile_model_id: {st_line_id: {aml_id: nb_match}}}, to be passed in the
+                            'invoice_matching_amls_candidates' context key.
+        """
+        self.env['account.move'].flush_model()
+        self.env['account.move.line'].flush_model()
+
+        candidates = {}
+        for rec_model in self.filtered(lambda m: m.rule_type == 'invoice_matching'):
+            tokens_per_st_line = {}
+            domains = []
+            for st_line in st_lines:
+                if rec_model.company_id != st_line.company_id or (rec_model.match_journal_ids and st_line.journal_id not in rec_model.match_journal_ids):
+                    continue
+
+                numerical_tokens, exact_tokens, _text_tokens = rec_model._get_invoice_matching_st_line_tokens(st_line)
+                if not numerical_tokens and not exact_tokens:
+                    continue
+
+                tokens_per_st_line[st_line.id] = (
+                    {token_type for token_type, tokens in (('numerical', numerical_tokens), ('exact', exact_tokens)) if tokens},
+                    set(numerical_tokens + exact_tokens),
+                )
+                # The partner is only known when applying the rules; the domain without it is less restrictive.
+                domains.append(rec_model._get_invoice_matching_amls_domain(st_line, self.env['res.partner']))
+
+            if not tokens_per_st_line:
+                continue
+
+            query = self.env['account.move.line']._where_calc(self._get_common_domain(domains))
+            all_tokens = set().union(*(tokens for _token_types, tokens in tokens_per_st_line.values()))
+            rows = self.env.execute_query(SQL(
+                '''
+                    SELECT sub.id, sub.token, sub.token_type, COUNT(*)
+                    FROM (%s) AS sub
+                    WHERE sub.token IN %s
+                    GROUP BY sub.id, sub.token, sub.token_type
+                ''',
+                rec_model._get_invoice_matching_tokens_query(query.from_clause, query.where_clause or SQL("TRUE"), searched_tokens=all_tokens),
+                tuple(all_tokens),
+            ))
+
+            # As in _get_invoice_matching_amls_candidates, the numerical part of the query is only used for the statement lines having
+            # numerical tokens, and the exact part for the ones having exact tokens; all their tokens are searched in both parts.
+            candidates[rec_model.id] = rec_model_candidates = {}
+            for st_line_id, (token_types, tokens) in tokens_per_st_line.items():
+                nb_match_per_aml_id = rec_model_candidates[st_line_id] = defaultdict(int)
+                for aml_id, token, token_type, count in rows:
+                    if token_type in token_types and token in tokens:
+                        nb_match_per_aml_id[aml_id] += count
+
+        return candidates
+
+    def _get_common_domain(self, domains):
+        """ Returns a domain whose result contains the results of all the provided domains: the conjunction of the
+        top-level terms they all share, or their disjunction if they share none.
+        """
+        def get_term_end(domain, index):
+            nb_missing_operands = 1
+            while nb_missing_operands:
+                if domain[index] in ('&', '|'):
+                    nb_missing_operands += 1
+                elif domain[index] != '!':
+                    nb_missing_operands -= 1
+                index += 1
+            return index
+
+        def split_conjunction(domain, index=0):
+            # Returns the top-level terms of the normalized domain starting at index, and the index following them.
+            if domain[index] == '&':
+                left_terms, index = split_conjunction(domain, index + 1)
+                right_terms, index = split_conjunction(domain, index)
+                return left_terms + right_terms, index
+            term_end = get_term_end(domain, index)
+            return [[tuple(leaf) if isinstance(leaf, list) else leaf for leaf in domain[index:term_end]]], term_end
+
+        terms_per_domain = []
+        for domain in domains:
+            terms, _index = split_conjunction(expression.normalize_domain(domain))
+            terms_per_domain.append({repr(term): term for term in terms})
+
+        common_keys = set(terms_per_domain[0]).intersection(*terms_per_domain[1:])
+        if not common_keys:
+            return expression.OR(domains)
+        return expression.AND([terms_per_domain[0][key] for key in sorted(common_keys)])
+
     def _get_invoice_matching_rules_map(self):
         """ Get a mapping <priority_order, rule> that could be overridden in others modules.
 
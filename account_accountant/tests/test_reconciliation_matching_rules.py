@@ -4,6 +4,7 @@ from contextlib import contextmanager
 
 from odoo.addons.account.tests.common import AccountTestInvoicingCommon
 from odoo.tests import Form, tagged
+from odoo.tools import SQL
 from odoo import Command
 
 
@@ -1304,3 +1305,89 @@ class TestReconciliationMatchingRules(AccountTestInvoicingCommon):
                     'model': self.rule_1,
                 },
             })
+
+    @freeze_time('2020-01-01')
+    def test_prefetched_invoice_matching_candidates(self):
+        """ The candidates fetched for many statement lines at once must be the same as the ones fetched line by line. """
+        self.rule_1.write({
+            'match_text_location_label': True,
+            'match_text_location_note': True,
+            'match_text_location_reference': True,
+        })
+        st_lines = self.bank_line_1 + self.bank_line_2 + self.bank_line_3 + self.bank_line_4 + self.bank_line_5 + self.cash_line_1
+        prefetched_candidates = st_lines._prefetch_invoice_matching_candidates()
+        self.assertEqual(set(prefetched_candidates[self.rule_1.id]), set(st_lines.ids))
+
+        for st_line in st_lines:
+            partner = st_line._retrieve_partner()
+            with self.subTest(st_line=st_line.payment_ref):
+                self.assertDictEqual(
+                    self.rule_1.with_context(invoice_matching_amls_candidates=prefetched_candidates)._apply_rules(st_line, partner),
+                    self.rule_1._apply_rules(st_line, partner),
+                )
+
+    def test_invoice_matching_tokens_filter(self):
+        """ Filtering the journal items on the searched tokens through their indexes mustn't change the tokens matched by the
+        'invoice_matching' rules, whether they are numerical or exact, including when journal items without any residual amount
+        have these tokens.
+        """
+        self.rule_1.write({
+            'match_text_location_label': True,
+            'match_text_location_note': True,
+            'match_text_location_reference': True,
+        })
+        open_line = self._create_invoice_line(100, self.partner_1, 'out_invoice', ref='REF 123456 ABCD')
+        paid_line = self._create_invoice_line(100, self.partner_1, 'out_invoice', ref='REF 123456 PAID')
+        self.env['account.payment.register']\
+            .with_context(active_model='account.move', active_ids=paid_line.move_id.ids)\
+            .create({'payment_date': '2019-09-01'})\
+            ._create_payments()
+        misc_move = self.env['account.move'].create({
+            'move_type': 'entry',
+            'date': '2019-09-01',
+            'ref': '123456',
+            'partner_id': self.partner_1.id,
+            'line_ids': [
+                Command.create({'name': '123456 ABCD', 'account_id': self.company_data['default_account_revenue'].id, 'debit': 100.0}),
+                Command.create({'name': 'ABCD', 'account_id': self.current_assets_account.id, 'credit': 100.0}),
+            ],
+        })
+        misc_move.action_post()
+        self.env.flush_all()
+
+        def get_matched_tokens(st_line, searched_tokens):
+            numerical_tokens, exact_tokens, _text_tokens = self.rule_1._get_invoice_matching_st_line_tokens(st_line)
+            query = self.env['account.move.line']._where_calc(self.rule_1._get_invoice_matching_amls_domain(st_line, self.partner_1))
+            tokens_query = self.rule_1._get_invoice_matching_tokens_query(
+                query.from_clause,
+                query.where_clause or SQL("TRUE"),
+                bool(numerical_tokens),
+                bool(exact_tokens),
+                searched_tokens=numerical_tokens + exact_tokens if searched_tokens else None,
+            )
+            return set(self.env.execute_query(SQL(
+                "SELECT sub.id, sub.token, sub.token_type FROM (%s) AS sub WHERE sub.token IN %s",
+                tokens_query,
+                tuple(numerical_tokens + exact_tokens),
+            )))
+
+        # The paid invoice and the journal items of the miscellaneous entry have the same tokens, but can't be matched.
+        expected_matches = {
+            '123456': open_line,
+            'REF 123456 ABCD': open_line,
+            'REF 123456 PAID': open_line,
+            'ABCD': self.env['account.move.line'],
+            open_line.move_id.name: open_line,
+        }
+        for payment_ref, expected_lines in expected_matches.items():
+            st_line = self._create_st_line(100.0, payment_ref=payment_ref, partner_id=self.partner_1.id)
+            with self.subTest(payment_ref=payment_ref):
+                matched_tokens = get_matched_tokens(st_line, searched_tokens=True)
+                self.assertEqual(matched_tokens, get_matched_tokens(st_line, searched_tokens=False))
+                self.assertEqual({aml_id for aml_id, _token, _token_type in matched_tokens}, set(expected_lines.ids))
+
+        st_line = self._create_st_line(100.0, payment_ref='REF 123456 ABCD', partner_id=self.partner_1.id)
+        self.assertEqual(
+            {token_type for _aml_id, _token, token_type in get_matched_tokens(st_line, searched_tokens=True)},
+            {'numerical', 'exact'},
+        )
@@ -1,11 +1,14 @@
 # -*- coding: utf-8 -*-
+import logging
 import threading
 import time
 
 from odoo import api, fields, models, SUPERUSER_ID, tools, _
-from odoo.tools import date_utils
+from odoo.tools import create_index, date_utils
 from odoo.exceptions import UserError, ValidationError
 
+_logger = logging.getLogger(__name__)
+
 STATEMENT_LINE_CREATION_BATCH_SIZE = 500  # When importing transactions, batch the process to commit after importing batch_size
 
 
@@ -22,6 +25,17 @@ class AccountBankStatementLine(models.Model):
         readonly=True,
     )
 
+    def init(self):
+        super().init()
+        # Used to filter out the transactions already imported when synchronizing, see '_get_filtered_transactions'.
+        create_index(
+            self.env.cr,
+            indexname='account_bank_statement_line_online_transaction_identifier_idx',
+            tablename=self._table,
+            expressions=['journal_id', 'online_transaction_identifier'],
+            where='online_transaction_identifier IS NOT NULL',
+        )
+
     @api.model
     def _online_sync_bank_statement(self, transactions, online_account):
         """
@@ -61,9 +75,12 @@ class AccountBankStatementLine(models.Model):
                     })
                     lines_to_reconcile += opening_st_line
 
+                phase_start_time = time.time()
                 filtered_transactions = online_account._get_filtered_transactions(sorted_transactions)
+                filter_duration = time.time() - phase_start_time
 
                 do_commit = not (hasattr(threading.current_thread(), 'testing') and threading.current_thread().testing)
+                phase_start_time = time.time()
                 if filtered_transactions:
                     # split transactions import in batch and commit after each batch except in testing mode
                     for index in range(0, len(filtered_transactions), STATEMENT_LINE_CREATION_BATCH_SIZE):
@@ -72,7 +89,9 @@ class AccountBankStatementLine(models.Model):
                             self.env.cr.commit()
                     # Set last sync date as the last transaction date
                     journal.account_online_account_id.sudo().write({'last_sync': filtered_transactions[-1]['date']})
+                creation_duration = time.time() - phase_start_time
 
+                phase_start_time = time.time()
                 if lines_to_reconcile:
                     # 'limit_time_real_cron' defaults to -1.
                     # Manual fallback applied for non-POSIX systems where this key is disabled (set to None).
@@ -80,6 +99,12 @@ class AccountBankStatementLine(models.Model):
                     limit_time = (cron_limit_time if cron_limit_time > 0 else 180) - (time.time() - start_time)
                     if limit_time > 0:
                         lines_to_reconcile._cron_try_auto_reconcile_statement_lines(limit_time=limit_time)
+                _logger.info(
+                    "Online sync: journal %s, %s transactions received, %s new; duplicates filtered in %.2fs, "
+                    "statement lines created in %.2fs, auto-reconciliation in %.2fs",
+                    journal.id, len(transactions), len(filtered_transactions),
+                    filter_duration, creation_duration, time.time() - phase_start_time,
+                )
         # Catch any configuration error that would prevent creating the entries, reset fetching_status flag and re-raise the error
         # Otherwise flag is never reset and user is under the impression that we are still fetching transactions
         except (UserError, ValidationError) as e:
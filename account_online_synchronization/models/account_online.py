@@ -5,6 +5,7 @@ import datetime
 import requests
 import logging
 import re
+import time
 import uuid
 import urllib.parse
 import odoo
@@ -18,7 +19,7 @@ from odoo.exceptions import UserError, CacheMiss, MissingError, ValidationError,
 from odoo.http import request
 from odoo.addons.account_online_synchronization.models.odoofin_auth import OdooFinAuth
 from odoo.tools.misc import format_amount, format_date, get_lang
-from odoo.tools import _, LazyTranslate
+from odoo.tools import _, LazyTranslate, SQL
 
 _lt = LazyTranslate(__name__)
 _logger = logging.getLogger(__name__)
@@ -282,26 +283,38 @@ class AccountOnlineAccount(models.Model):
         self.ensure_one()
 
         journal_id = self.journal_ids[0]
-        existing_bank_statement_lines = self.env['account.bank.statement.line'].search_fetch(
-            [
-                ('journal_id', '=', journal_id.id),
-                ('online_transaction_identifier', 'in', [
-                    transaction['online_transaction_identifier']
-                    for transaction in new_transactions
-                    if transaction.get('online_transaction_identifier')
-                ]),
-            ],
-            ['online_transaction_identifier']
-        )
-        existing_online_transaction_identifier = set(existing_bank_statement_lines.mapped('online_transaction_identifier'))
+        # Identifiers are stored as strings, but some providers send them as numbers.
+        new_online_transaction_identifiers = list({
+            str(transaction['online_transaction_identifier'])
+            for transaction in new_transactions
+            if transaction.get('online_transaction_identifier')
+        })
+        existing_online_transaction_identifier = set()
+        if new_online_transaction_identifiers:
+            # Looked up in a single query, using the index on (journal_id, online_transaction_identifier), as a synchronization
+            # can receive thousands of transactions.
+            self.env['account.bank.statement.line'].flush_model(['journal_id', 'online_transaction_identifier'])
+            existing_online_transaction_identifier = {
+                transaction_identifier
+                for transaction_identifier, in self.env.execute_query(SQL(
+                    """
+                    SELECT st_line.online_transaction_identifier
+                      FROM account_bank_statement_line st_line
+                     WHERE st_line.journal_id = %s
+                       AND st_line.online_transaction_identifier = ANY(%s)
+                    """,
+                    journal_id.id,
+                    new_online_transaction_identifiers,
+                ))
+            }
 
         filtered_transactions = []
         # Remove transactions already imported in Odoo
         for transaction in new_transactions:
             if transaction_identifier := transaction['online_transaction_identifier']:
-                if transaction_identifier in existing_online_transaction_identifier:
+                if str(transaction_identifier) in existing_online_transaction_identifier:
                     continue
-                existing_online_transaction_identifier.add(transaction_identifier)
+                existing_online_transaction_identifier.add(str(transaction_identifier))
 
             filtered_transactions.append(transaction)
         return filtered_transactions
@@ -320,13 +333,14 @@ class AccountOnlineAccount(models.Model):
         currency_code_mapping = {currency.name: currency for currency in currencies}
 
         formatted_transactions = []
+        currencies_to_activate = self.env['res.currency']
         for transaction in new_transactions:
             if transaction.get('foreign_currency_code'):
                 currency = currency_code_mapping.get(transaction.pop('foreign_currency_code'))
                 if currency:
                     transaction.update({'foreign_currency_id': currency.id})
                     if not currency.active:
-                        currency.active = True
+                        currencies_to_activate |= currency
 
             formatted_transactions.append({
                 **transaction,
@@ -336,6 +350,8 @@ class AccountOnlineAccount(models.Model):
                 'journal_id': self.journal_ids[0].id,
                 'company_id': self.company_id.id,
             })
+        if currencies_to_activate:
+            currencies_to_activate.active = True
         return formatted_transactions
 
     def action_reset_fetching_status(self):
@@ -822,7 +838,12 @@ class AccountOnlineLink(models.Model):
                 # Committing here so that multiple thread calling this method won't execute in parallel and import duplicates transaction
                 self.env.cr.commit()
                 try:
+                    fetch_start_time = time.time()
                     transactions = online_account._retrieve_transactions().get('transactions', [])
+                    _logger.info(
+                        "Online sync: fetched %s transactions for account %s in %.2fs",
+                        len(transactions), online_account.id, time.time() - fetch_start_time,
+                    )
                 except RedirectWarning as redirect_warning:
                     self._notify_connection_update(
                         journal=journal,
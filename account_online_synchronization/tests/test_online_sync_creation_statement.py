@@ -199,6 +199,36 @@ class TestSynchStatementCreation(AccountOnlineSynchronizationCommon):
         bnk_stmt_lines = self.BankStatementLine.search([('online_transaction_identifier', '!=', False), ('journal_id', '=', self.euro_bank_journal.id)])
         self.assertEqual(len(bnk_stmt_lines), 2, 'Should only have created two lines')
 
+    @patch('odoo.addons.account_online_synchronization.models.account_online.AccountOnlineLink._fetch_odoo_fin')
+    def test_paginated_transactions_already_imported(self, patched_fetch):
+        """ Transactions received again in a later synchronization must not be imported twice,
+        even if the provider sends their identifier as a number.
+        """
+        def fetch_pages(dates, page_size=3):
+            transactions = []
+            for date in dates:
+                transactions.append(self._create_one_online_transaction(date=date))
+                self.transaction_id += 1
+            return [
+                {'transactions': transactions[index:index + page_size], 'next_data': index + page_size < len(transactions) and {'page': index}}
+                for index in range(0, len(transactions), page_size)
+            ]
+
+        patched_fetch.side_effect = fetch_pages(['2016-01-01', '2016-01-02', '2016-01-03', '2016-01-04', '2016-01-05'])
+        transactions = self.account_online_account._retrieve_transactions()['transactions']
+        self.assertEqual(len(transactions), 5)
+        self.BankStatementLine._online_sync_bank_statement(transactions, self.account_online_account)
+
+        # The provider sends the last two transactions again, along with three new ones.
+        self.transaction_id = 4
+        patched_fetch.side_effect = fetch_pages(['2016-01-04', '2016-01-05', '2016-01-06', '2016-01-07', '2016-01-08'])
+        transactions = self.account_online_account._retrieve_transactions()['transactions']
+        self.assertEqual(len(self.account_online_account._get_filtered_transactions(transactions)), 3)
+        self.BankStatementLine._online_sync_bank_statement(transactions, self.account_online_account)
+
+        st_lines = self.BankStatementLine.search([('online_transaction_identifier', '!=', False), ('journal_id', '=', self.euro_bank_journal.id)], order='date, id')
+        self.assertEqual(st_lines.mapped('online_transaction_identifier'), [str(identifier) for identifier in range(1, 9)])
+
     @patch('odoo.addons.account_online_synchronization.models.account_online.AccountOnlineLink._fetch_odoo_fin')
     def test_fetch_transactions_reauth(self, patched_refresh):
         patched_refresh.side_effect = [
@@ -30,6 +30,9 @@ Accounting Reports
         'views/account_report_view.xml',
         'data/account_report_actions.xml',
         'data/report_send_cron.xml',
+        'data/balance_rollup_cron.xml',
+        'data/xlsx_export_cron.xml',
+        'data/report_snapshot_cron.xml',
         'data/menuitems.xml',
         'data/mail_activity_type_data.xml',
         'data/mail_templates.xml',
@@ -9,3 +9,10 @@ class AccountAccount(models.Model):
 
     exclude_provision_currency_ids = fields.Many2many('res.currency', relation='account_account_exclude_res_currency_provision', help="Whether or not we have to make provisions for the selected foreign currencies.")
     budget_item_ids = fields.One2many(comodel_name='account.report.budget.item', inverse_name='account_id')  # To use it in the domain when adding accounts from the report
+
+    def write(self, vals):
+        # The account_codes engine relies on the codes and tags of the accounts; cached report results can't be trusted anymore
+        report_cache = self.env['account.report.cache'].sudo()
+        if {'code', 'tag_ids'} & vals.keys() and any(report_cache._get_engine_dependencies()):
+            report_cache._invalidate_companies(self.company_ids)
+        return super().write(vals)
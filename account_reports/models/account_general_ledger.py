@@ -37,6 +37,16 @@ class GeneralLedgerCustomHandler(models.AbstractModel):
         # Automatically unfold the report when printing it, unless some specific lines have been unfolded
         options['unfold_all'] = (options['export_mode'] == 'print' and not options.get('unfolded_lines')) or options['unfold_all']
 
+        options['buttons'].append({
+            'name': _('XLSX (background)'),
+            'sequence': 25,
+            'action': 'action_export_to_xlsx_in_background',
+            'branch_allowed': True,
+        })
+
+    def _custom_xlsx_stream_batch_size(self, report, options):
+        return report._get_default_xlsx_stream_batch_size()
+
     def _dynamic_lines_generator(self, report, options, all_column_groups_expression_totals, warnings=None):
         lines = []
         date_from = fields.Date.from_string(options['date']['date_from'])
@@ -722,7 +732,8 @@ class GeneralLedgerCustomHandler(models.AbstractModel):
                 progress = init_load_more_progress(initial_balance_line)
 
         # Get move lines
-        limit_to_load = report.load_more_limit + 1 if report.load_more_limit and options['export_mode'] != 'print' else None
+        batch_limit = report._get_expand_batch_limit(options)
+        limit_to_load = batch_limit + 1 if batch_limit else None
         if unfold_all_batch_data:
             aml_results = unfold_all_batch_data['aml_results'][model_id]
             has_more = unfold_all_batch_data['has_more'].get(model_id, False)
@@ -738,7 +749,7 @@ class GeneralLedgerCustomHandler(models.AbstractModel):
 
         return {
             'lines': lines,
-            'offset_increment': report.load_more_limit,
+            'offset_increment': batch_limit,
             'has_more': has_more,
             'progress': next_progress,
         }
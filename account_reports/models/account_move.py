@@ -20,6 +20,24 @@ class AccountMove(models.Model):
     # technical field used to know whether to show the tax closing alert or not
     tax_closing_alert = fields.Boolean(compute='_compute_tax_closing_alert')
 
+    def write(self, vals):
+        # Drop the account.report.cache entries and outdate the balances rollup impacted by a change on posted entries,
+        # before and after the write (the date of the move might be changed, or it might be reset to draft).
+        report_cache = self.env['account.report.cache'].sudo()
+        balance_rollup = self.env['account.report.balance.rollup'].sudo()
+        _move_line_fields, move_fields = report_cache._get_engine_dependencies()
+        invalidate_cache = not move_fields.isdisjoint(vals)
+        posted_moves = self.filtered(lambda m: m.state == 'posted')
+        if invalidate_cache:
+            report_cache._invalidate_for_moves(posted_moves)
+        balance_rollup._mark_outdated(posted_moves)
+        res = super().write(vals)
+        posted_moves = self.filtered(lambda m: m.state == 'posted')
+        if invalidate_cache:
+            report_cache._invalidate_for_moves(posted_moves)
+        balance_rollup._mark_outdated(posted_moves)
+        return res
+
     def _post(self, soft=True):
         # Overridden to create carryover external values and join the pdf of the report when posting the tax closing
         for move in self.filtered(lambda m: m.tax_closing_report_id):
@@ -17,6 +17,16 @@ class AccountMoveLine(models.Model):
         for move_line in self:
             move_line.exclude_bank_lines = move_line.account_id != move_line.journal_id.default_account_id
 
+    def write(self, vals):
+        res = super().write(vals)
+        posted_moves = self.filtered(lambda l: l.parent_state == 'posted').move_id
+        report_cache = self.env['account.report.cache'].sudo()
+        move_line_fields, _move_fields = report_cache._get_engine_dependencies()
+        if not move_line_fields.isdisjoint(vals):
+            report_cache._invalidate_for_moves(posted_moves)
+        self.env['account.report.balance.rollup'].sudo()._mark_outdated(posted_moves)
+        return res
+
     @api.constrains('tax_ids', 'tax_tag_ids')
     def _check_taxes_on_closing_entries(self):
         for aml in self:
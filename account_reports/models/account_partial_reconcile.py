@@ -0,0 +1,25 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import api, models
+
+
+class AccountPartialReconcile(models.Model):
+    _inherit = 'account.partial.reconcile'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        partials = super().create(vals_list)
+        partials._invalidate_account_report_cache()
+        return partials
+
+    def unlink(self):
+        self._invalidate_account_report_cache()
+        return super().unlink()
+
+    def _invalidate_account_report_cache(self):
+        # Reconciling doesn't write the journal items' amounts, but it changes their residual amounts and reconciled status
+        report_cache = self.env['account.report.cache'].sudo()
+        if not any(report_cache._get_engine_dependencies()):
+            return
+        companies = (self.debit_move_id | self.credit_move_id).company_id
+        report_cache._invalidate_companies(companies, reconciliation_only=True)
@@ -134,6 +134,13 @@ class PartnerLedgerCustomHandler(models.AbstractModel):
         else:
             options['columns'] = [col for col in options['columns'] if col['expression_label'] != 'amount_currency']
 
+        options['buttons'].append({
+            'name': _('XLSX (background)'),
+            'sequence': 25,
+            'action': 'action_export_to_xlsx_in_background',
+            'branch_allowed': True,
+        })
+
         if not self.env.ref('account_reports.customer_statement_report', raise_if_not_found=False):
             # Deprecated, will be removed in master
             columns_to_hide = []
@@ -152,6 +159,9 @@ class PartnerLedgerCustomHandler(models.AbstractModel):
                 'always_show': True,
             })
 
+    def _custom_xlsx_stream_batch_size(self, report, options):
+        return report._get_default_xlsx_stream_batch_size()
+
     def _custom_unfold_all_batch_data_generator(self, report, options, lines_to_expand_by_function):
         partner_ids_to_expand = []
 
@@ -459,7 +469,8 @@ class PartnerLedgerCustomHandler(models.AbstractModel):
                 # For the first expansion of the line, the initial balance line gives the progress
                 progress = init_load_more_progress(initial_balance_line)
 
-        limit_to_load = report.load_more_limit + 1 if report.load_more_limit and options['export_mode'] != 'print' else None
+        batch_limit = report._get_expand_batch_limit(options)
+        limit_to_load = batch_limit + 1 if batch_limit else None
 
         if unfold_all_batch_data:
             aml_results = unfold_all_batch_data['aml_values'][record_id]
@@ -470,7 +481,7 @@ class PartnerLedgerCustomHandler(models.AbstractModel):
         treated_results_count = 0
         next_progress = progress
         for result in aml_results:
-            if options['export_mode'] != 'print' and report.load_more_limit and treated_results_count == report.load_more_limit:
+            if batch_limit and treated_results_count == batch_limit:
                 # We loaded one more than the limit on purpose: this way we know we need a "load more" line
                 has_more = True
                 break
@@ -8,22 +8,27 @@ import io
 import json
 import logging
 import re
+import tempfile
+import threading
 from ast import literal_eval
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from functools import cmp_to_key
 from itertools import groupby
 
 import markupsafe
+import psycopg2
 from dateutil.relativedelta import relativedelta
 from PIL import ImageFont
 
-from odoo import models, fields, api, _, osv
+from odoo import models, fields, api, _, osv, Command
+from odoo.addons.account_reports.models.account_report_cache import RECONCILIATION_FIELDS
 from odoo.addons.web.controllers.utils import clean_action
 from odoo.exceptions import RedirectWarning, UserError, ValidationError
 from odoo.models import check_method_name
 from odoo.tools import date_utils, get_lang, float_is_zero, float_repr, SQL, parse_version, Query
 from odoo.tools.float_utils import float_round, float_compare
-from odoo.tools.misc import file_path, format_date, formatLang, split_every, xlsxwriter
+from odoo.tools.misc import file_path, format_date, format_datetime, formatLang, split_every, xlsxwriter
 from odoo.tools.safe_eval import expr_eval, safe_eval
 
 _logger = logging.getLogger(__name__)
@@ -42,8 +47,14 @@ ACCOUNT_CODES_ENGINE_TAG_ID_PREFIX_REGEX = re.compile(r"tag\(((?P<id>\d+)|(?P<re
 # Performance optimisation: those engines always will receive None as their next_groupby, allowing more efficient batching.
 NO_NEXT_GROUPBY_ENGINES = {'tax_tags', 'account_codes'}
 
+# Engines whose results can be kept in account.report.cache: they only depend on the posted journal items.
+CACHED_ENGINES = {'domain', 'account_codes', 'tax_tags'}
+
 NUMBER_FIGURE_TYPES = ('float', 'integer', 'monetary', 'percentage')
 
+# Default number of sublines loaded at once when writing the unfolded lines of a report to an XLSX file by batches.
+XLSX_STREAM_BATCH_SIZE = 5000
+
 LINE_ID_HIERARCHY_DELIMITER = '|'
 
 CURRENCIES_USING_LAKH = {'AFN', 'BDT', 'INR', 'MMK', 'NPR', 'PKR', 'LKR'}
@@ -107,6 +118,17 @@ class AccountReport(models.Model):
     # Fields used for send reports by cron
     send_and_print_values = fields.Json(copy=False)
 
+    use_engine_cache = fields.Boolean(
+        string="Cache Results",
+        help="Keep the results of the domain, account codes and tax tags engines, so that reopening, filtering or unfolding this report "
+             "with the same options does not recompute them. The cached results are dropped as soon as a posted entry of their period changes.",
+    )
+    use_snapshots = fields.Boolean(
+        string="Snapshots",
+        help="Allow saving snapshots of this report. A snapshot is recomputed regularly in the background, and displayed instead of "
+             "computing the report when it is opened with the same options.",
+    )
+
     def _auto_init(self):
         super()._auto_init()
 
@@ -130,11 +152,21 @@ class AccountReport(models.Model):
                         custom_handler_model._name
                     ))
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        reports = super().create(vals_list)
+        if any(reports.mapped('use_engine_cache')):
+            # The fields whose change invalidates account.report.cache depend on the reports using it
+            self.env.registry.clear_cache()
+        return reports
+
     def unlink(self):
         for report in self:
             action, menuitem = report._get_existing_menuitem()
             menuitem.unlink()
             action.unlink()
+        if any(self.mapped('use_engine_cache')):
+            self.env.registry.clear_cache()
         return super().unlink()
 
     def write(self, vals):
@@ -142,6 +174,8 @@ class AccountReport(models.Model):
             for report in self:
                 dummy, menuitem = report._get_existing_menuitem()
                 menuitem.active = vals['active']
+        if 'use_engine_cache' in vals:
+            self.env.registry.clear_cache()
         return super().write(vals)
 
     ####################################################
@@ -1722,6 +1756,9 @@ class AccountReport(models.Model):
             {'name': _('XLSX'), 'sequence': 20, 'action': 'export_file', 'action_param': 'export_to_xlsx', 'file_export_type': _('XLSX'), 'branch_allowed': True, 'always_show': True},
         ]
 
+        if self.use_snapshots:
+            options['buttons'].append({'name': _('Save Snapshot'), 'sequence': 95, 'action': 'action_save_snapshot', 'branch_allowed': True})
+
     def open_account_report_file_download_error_wizard(self, errors, content):
         self.ensure_one()
 
@@ -2618,8 +2655,10 @@ class AccountReport(models.Model):
         # Handle totals below sections for static lines
         lines = self._add_totals_below_sections(lines, options)
 
-        # Unfold lines (static or dynamic) if necessary and add totals below section to dynamic lines
-        lines = self._fully_unfold_lines_if_needed(lines, options)
+        # Unfold lines (static or dynamic) if necessary and add totals below section to dynamic lines.
+        # When the lines are streamed into an XLSX file, the unfolded lines are expanded by batches while writing it instead.
+        if not options.get('xlsx_stream_batch_size'):
+            lines = self._fully_unfold_lines_if_needed(lines, options)
 
         if self.custom_handler_model_id:
             lines = self.env[self.custom_handler_model_name]._custom_line_postprocessor(self, options, lines)
@@ -2793,10 +2832,10 @@ class AccountReport(models.Model):
             for expression in line.expression_ids.filtered(lambda x: not x.label.startswith('_default')):
                 engine_label = engine_selection_labels[expression.engine]
                 figure_type = expression.figure_type or col_expression_to_figure_type.get(expression.label) or 'none'
-                expressions_detail[engine_label].append((
-                    expression.label,
-                    {'formula': expression.formula, 'subformula': expression.subformula, 'value': self.format_value(options, column_group_totals[expression]['value'], figure_type)}
-                ))
+                expression_info = {'formula': expression.formula, 'subformula': expression.subformula, 'value': self.format_value(options, column_group_totals[expression]['value'], figure_type)}
+                if 'cache_hit' in column_group_totals[expression]:
+                    expression_info['cache'] = _("Hit") if column_group_totals[expression]['cache_hit'] else _("Miss")
+                expressions_detail[engine_label].append((expression.label, expression_info))
 
             # Sort results so that they can be rendered nicely in the UI
             for details in expressions_detail.values():
@@ -2804,8 +2843,12 @@ class AccountReport(models.Model):
             sorted_expressions_detail = sorted(expressions_detail.items(), key=lambda x: x[0])
 
             if sorted_expressions_detail:
+                debug_popup_data = {'expressions_detail': sorted_expressions_detail}
+                cache_hits = [totals['cache_hit'] for totals in column_group_totals.values() if 'cache_hit' in totals]
+                if cache_hits:
+                    debug_popup_data['cache_stats'] = {'hits': cache_hits.count(True), 'misses': cache_hits.count(False)}
                 try:
-                    rslt['debug_popup_data'] = json.dumps({'expressions_detail': sorted_expressions_detail})
+                    rslt['debug_popup_data'] = json.dumps(debug_popup_data)
                 except TypeError:
                     raise UserError(_(
                         'Invalid subformula in expression "%(expression)s" of line "%(line)s": %(subformula)s',
@@ -3072,14 +3115,35 @@ class AccountReport(models.Model):
                 add_expressions_to_groups(expanded_cross, grouped_formulas, force_date_scope=forced_date_scope)
 
         # Treat each formula batch for each column group
+        options_per_column_group = self._split_options_per_column_group(options)
+        column_groups_to_compute = [
+            group_key
+            for group_key in options_per_column_group
+            if not col_groups_restrict or group_key in col_groups_restrict
+        ]
+
+        parallel_results = None
+        if len(column_groups_to_compute) > 1 and self._can_compute_column_groups_in_parallel(options, [options_per_column_group[group_key] for group_key in column_groups_to_compute]):
+            parallel_results = self._compute_expression_totals_for_column_groups_in_parallel(
+                {group_key: options_per_column_group[group_key] for group_key in column_groups_to_compute},
+                grouped_formulas,
+                forced_all_column_groups_expression_totals=forced_all_column_groups_expression_totals,
+                offset=offset,
+                limit=limit,
+            )
+
         all_column_groups_expression_totals = {}
-        for group_key, group_options in self._split_options_per_column_group(options).items():
+        for group_key, group_options in options_per_column_group.items():
             if forced_all_column_groups_expression_totals:
                 forced_column_group_totals = forced_all_column_groups_expression_totals.get(group_key, None)
             else:
                 forced_column_group_totals = None
 
-            if not col_groups_restrict or group_key in col_groups_restrict:
+            if parallel_results and group_key in parallel_results:
+                current_group_expression_totals, group_warnings = parallel_results[group_key]
+                if warnings is not None:
+                    self._merge_column_group_warnings(warnings, group_warnings)
+            elif group_key in column_groups_to_compute:
                 current_group_expression_totals = self._compute_expression_totals_for_single_column_group(
                     group_options,
                     grouped_formulas,
@@ -3095,6 +3159,100 @@ class AccountReport(models.Model):
 
         return all_column_groups_expression_totals
 
+    def _can_compute_column_groups_in_parallel(self, options, column_groups_options):
+        """ Column groups can only be evaluated by separate cursors if the current transaction has nothing they wouldn't see:
+        it must be readonly, and neither the options nor the options of any column group may rely on the temporary tables created
+        on the current cursor (the currency table when converting currencies, the budgets, the analytic columns and the cash basis).
+        """
+        if (
+            not self.env.cr.readonly
+            or not options.get('readonly_query')
+            or self._get_column_groups_workers_count() <= 1
+            or getattr(threading.current_thread(), 'testing', False)
+            or self.env.context.get('account_report_analytic_groupby')
+            or self.env.context.get('account_report_cash_basis')
+            or any(budget_opt['selected'] for budget_opt in options.get('budgets', []))
+        ):
+            return False
+
+        return all(
+            group_options['currency_table']['type'] == 'monocurrency'
+            and not group_options.get('compute_budget')
+            and not group_options.get('analytic_groupby_option')
+            and not group_options.get('report_cash_basis')
+            for group_options in [options, *column_groups_options]
+        )
+
+    @api.model
+    def _merge_column_group_warnings(self, warnings, column_group_warnings):
+        """ Merges the warnings raised while evaluating a column group into warnings, as if the column groups had been evaluated
+        one after another with the same warnings dict: the parameters of a warning raised by several column groups are combined.
+        """
+        for warning_key, warning_params in column_group_warnings.items():
+            if warning_key not in warnings:
+                warnings[warning_key] = warning_params
+                continue
+
+            merged_params = warnings[warning_key]
+            for param_key, param_value in warning_params.items():
+                if param_key not in merged_params:
+                    merged_params[param_key] = param_value
+                elif isinstance(merged_params[param_key], list) and isinstance(param_value, list):
+                    merged_params[param_key] += [value for value in param_value if value not in merged_params[param_key]]
+                elif isinstance(merged_params[param_key], dict) and isinstance(param_value, dict):
+                    merged_params[param_key] = {**param_value, **merged_params[param_key]}
+
+    @api.model
+    def _get_column_groups_workers_count(self):
+        return int(self.env['ir.config_parameter'].sudo().get_param('account_reports.column_groups_workers', 0))
+
+    def _compute_expression_totals_for_column_groups_in_parallel(self, options_per_column_group, grouped_formulas, forced_all_column_groups_expression_totals=None, offset=0, limit=None):
+        """ Evaluates the column groups of options_per_column_group concurrently, each one in its own thread and read-only cursor.
+        All the cursors share the snapshot of the current transaction, so that the result is the same as when evaluating them one after another.
+
+        :return: A dict {column_group_key: (expression_totals, warnings)}, or None if the snapshot of the current transaction could not be shared.
+        """
+        try:
+            with self.env.cr.savepoint(flush=False):
+                self.env.cr.execute("SELECT pg_export_snapshot()")
+                snapshot_id = self.env.cr.fetchone()[0]
+        except psycopg2.Error:
+            _logger.info("Could not export the transaction snapshot, column groups will be computed sequentially.")
+            return None
+
+        def compute_column_group(group_key, group_options):
+            with self.env.registry.cursor(readonly=True) as cr:
+                cr.execute(SQL("SET TRANSACTION SNAPSHOT %s", snapshot_id))
+                report = self.with_env(api.Environment(cr, self.env.uid, self.env.context, su=self.env.su))
+                group_warnings = {}
+                forced_column_group_totals = (forced_all_column_groups_expression_totals or {}).get(group_key)
+                column_group_totals = report._compute_expression_totals_for_single_column_group(
+                    group_options,
+                    {
+                        engine: {
+                            grouping_key: {formula: expressions.with_env(report.env) for formula, expressions in formulas_dict.items()}
+                            for grouping_key, formulas_dict in engine_formulas.items()
+                        }
+                        for engine, engine_formulas in grouped_formulas.items()
+                    },
+                    forced_column_group_expression_totals={
+                        expression.with_env(report.env): totals for expression, totals in forced_column_group_totals.items()
+                    } if forced_column_group_totals else None,
+                    offset=offset,
+                    limit=limit,
+                    warnings=group_warnings,
+                )
+                # The worker cursor is closed when leaving; give the results back to the current environment
+                return {expression.with_env(self.env): totals for expression, totals in column_group_totals.items()}, group_warnings
+
+        workers_count = min(self._get_column_groups_workers_count(), len(options_per_column_group))
+        with ThreadPoolExecutor(max_workers=workers_count) as executor:
+            futures = {
+                group_key: executor.submit(compute_column_group, group_key, group_options)
+                for group_key, group_options in options_per_column_group.items()
+            }
+            return {group_key: future.result() for group_key, future in futures.items()}
+
     def _standardize_date_scope_for_date_range(self, date_scope):
         """ Depending on the fact the report accepts date ranges or not, different date scopes might mean the same thing.
         This function is used so that, in those cases, only one of these date_scopes' values is used, to avoid useless creation
@@ -3166,8 +3324,8 @@ class AccountReport(models.Model):
                                        Whether or not this result corresponds to 1 or more subelements in the database (typically move lines).
                                        This is used to know whether an unfoldable line has results to unfold in the UI.
         """
-        def inject_formula_results(formula_results, column_group_expression_totals, cross_report_expression_totals=None):
-            for (_key, expressions), result in formula_results.items():
+        def inject_formula_results(formula_results, column_group_expression_totals, cross_report_expression_totals=None, cached_formulas=None):
+            for (formula, expressions), result in formula_results.items():
                 for expression in expressions:
                     subformula_error_format = _(
                         'Invalid subformula in expression "%(expression)s" of line "%(line)s": %(subformula)s',
@@ -3218,6 +3376,9 @@ class AccountReport(models.Model):
                         'has_sublines': expression_has_sublines,
                     }
 
+                    if cached_formulas is not None:
+                        expression_result['cache_hit'] = formula in cached_formulas
+
                     if expression.report_line_id.report_id == self:
                         if expression in column_group_expression_totals:
                             # This can happen because of a cross report aggregation referencing an expression of its own report,
@@ -3243,12 +3404,14 @@ class AccountReport(models.Model):
         ]
         for engine in batchable_engines:
             for (date_scope, current_groupby, next_groupby), formulas_dict in grouped_formulas.get(engine, {}).items():
+                cached_formulas = set() if self._is_engine_cache_applicable(column_group_options, engine) else None
                 formula_results = self._compute_formula_batch(column_group_options, engine, date_scope, formulas_dict, current_groupby, next_groupby,
-                                                              offset=offset, limit=limit, warnings=warnings)
+                                                              offset=offset, limit=limit, warnings=warnings, cached_formulas=cached_formulas)
                 inject_formula_results(
                     formula_results,
                     column_group_expression_totals,
-                    cross_report_expression_totals=cross_report_expr_totals_by_scope.setdefault(date_scope, {})
+                    cross_report_expression_totals=cross_report_expr_totals_by_scope.setdefault(date_scope, {}),
+                    cached_formulas=cached_formulas,
                 )
 
         # Now that everything else has been computed, resolve aggregation expressions
@@ -3561,7 +3724,7 @@ class AccountReport(models.Model):
 
         return unbound_value
 
-    def _compute_formula_batch(self, column_group_options, formula_engine, date_scope, formulas_dict, current_groupby, next_groupby, offset=0, limit=None, warnings=None):
+    def _compute_formula_batch(self, column_group_options, formula_engine, date_scope, formulas_dict, current_groupby, next_groupby, offset=0, limit=None, warnings=None, cached_formulas=None):
         """ Evaluates a batch of formulas.
 
         :param column_group_options: The options for the column group being evaluated, as obtained from _split_options_per_column_group.
@@ -3586,6 +3749,8 @@ class AccountReport(models.Model):
 
         :param limit: The SQL limit to apply when computing these expressions' result.
 
+        :param cached_formulas: If provided, a set to which the formulas whose result was found in account.report.cache get added.
+
         :return: The result might have two different formats depending on the situation:
             - if we're computing a groupby: {(formula, expressions): [(grouping_key, {'result': value, 'has_sublines': boolean}), ...], ...}
             - if we're not: {(formula, expressions): {'result': value, 'has_sublines': boolean}, ...}
@@ -3593,9 +3758,68 @@ class AccountReport(models.Model):
             (e.g. 'sum', 'sum_if_pos', ...)
         """
         engine_function_name = f'_compute_formula_batch_with_engine_{formula_engine}'
-        return getattr(self, engine_function_name)(
-            column_group_options, date_scope, formulas_dict, current_groupby, next_groupby,
-            offset=offset, limit=limit, warnings=warnings,
+        if not self._is_engine_cache_applicable(column_group_options, formula_engine):
+            return getattr(self, engine_function_name)(
+                column_group_options, date_scope, formulas_dict, current_groupby, next_groupby,
+                offset=offset, limit=limit, warnings=warnings,
+            )
+
+        # Only compute the formulas whose result is not cached yet
+        report_cache = self.env['account.report.cache'].sudo()
+        key_per_formula = {
+            formula: report_cache._get_cache_key(self, column_group_options, formula_engine, date_scope, formula, current_groupby, next_groupby, offset, limit)
+            for formula in formulas_dict
+        }
+        cached_values = report_cache._get_cached_values(list(key_per_formula.values()))
+
+        rslt = {}
+        formulas_dict_to_compute = {}
+        for formula, expressions in formulas_dict.items():
+            formula_key = key_per_formula[formula]
+            if formula_key in cached_values:
+                rslt[(formula, expressions)] = cached_values[formula_key]
+                if cached_formulas is not None:
+                    cached_formulas.add(formula)
+            else:
+                formulas_dict_to_compute[formula] = expressions
+
+        if formulas_dict_to_compute:
+            computed_rslt = getattr(self, engine_function_name)(
+                column_group_options, date_scope, formulas_dict_to_compute, current_groupby, next_groupby,
+                offset=offset, limit=limit, warnings=warnings,
+            )
+            rslt.update(computed_rslt)
+            report_cache._store_values(
+                self,
+                column_group_options,
+                date_scope,
+                {key_per_formula[formula]: formula_rslt for (formula, _expressions), formula_rslt in computed_rslt.items()},
+                depends_on_reconciliation_keys={
+                    key_per_formula[formula]
+                    for formula in formulas_dict_to_compute
+                    if self._is_engine_cache_depending_on_reconciliation(column_group_options, formula_engine, formula)
+                },
+            )
+
+        return rslt
+
+    def _is_engine_cache_applicable(self, column_group_options, formula_engine):
+        """ Whether or not the results of formula_engine can be taken from, and stored into, account.report.cache.
+        Draft entries, budgets and currency rates are not tracked by the cache invalidation, so we don't use it when they are involved.
+        """
+        return (
+            self.use_engine_cache
+            and formula_engine in CACHED_ENGINES
+            and column_group_options['currency_table']['type'] == 'monocurrency'
+            and not column_group_options.get('all_entries')
+            and not column_group_options.get('compute_budget')
+        )
+
+    def _is_engine_cache_depending_on_reconciliation(self, column_group_options, formula_engine, formula):
+        # The cash basis amounts are computed from the partial reconciliations of the journal items
+        return column_group_options.get('unreconciled') or column_group_options.get('report_cash_basis') or (
+            formula_engine == 'domain'
+            and any(field_name in formula for field_name in RECONCILIATION_FIELDS)
         )
 
     def _compute_formula_batch_with_engine_tax_tags(self, options, date_scope, formulas_dict, current_groupby, next_groupby, offset=0, limit=None, warnings=None):
@@ -3723,35 +3947,45 @@ class AccountReport(models.Model):
                     line=expressions.report_line_id.name,
                     formula=formula,
                 ))
-            query = self._get_report_query(options, date_scope, domain=line_domain)
+            # The rollup can only count journal items, not distinct values of the next groupby
+            balances_query = None
+            if not next_groupby and not (offset or limit):
+                balances_query = self.env['account.report.balance.rollup']._get_balances_query(
+                    self, options, date_scope, domain=line_domain, current_groupby=current_groupby, count_alias='count_rows',
+                )
 
-            groupby_sql = self.env['account.move.line']._field_to_sql('account_move_line', current_groupby, query) if current_groupby else None
-            select_count_field = self.env['account.move.line']._field_to_sql('account_move_line', next_groupby.split(',')[0] if next_groupby else 'id', query)
+            if balances_query:
+                query = balances_query
+            else:
+                query = self._get_report_query(options, date_scope, domain=line_domain)
 
-            tail_query = self._get_engine_query_tail(offset, limit)
-            query = SQL(
-                """
-                SELECT
-                    COALESCE(SUM(%(balance_select)s), 0.0) AS sum,
-                    COUNT(DISTINCT %(select_count_field)s) AS count_rows
-                    %(select_groupby_sql)s
-                FROM %(table_references)s
-                %(currency_table_join)s
-                WHERE %(search_condition)s
-                %(group_by_groupby_sql)s
-                %(order_by_sql)s
-                %(tail_query)s
-                """,
-                select_count_field=select_count_field,
-                select_groupby_sql=SQL(', %s AS grouping_key', groupby_sql) if groupby_sql else SQL(),
-                table_references=query.from_clause,
-                balance_select=self._currency_table_apply_rate(SQL("account_move_line.balance")),
-                currency_table_join=self._currency_table_aml_join(options),
-                search_condition=query.where_clause,
-                group_by_groupby_sql=SQL('GROUP BY %s', groupby_sql) if groupby_sql else SQL(),
-                order_by_sql=SQL(' ORDER BY %s', groupby_sql) if groupby_sql else SQL(),
-                tail_query=tail_query,
-            )
+                groupby_sql = self.env['account.move.line']._field_to_sql('account_move_line', current_groupby, query) if current_groupby else None
+                select_count_field = self.env['account.move.line']._field_to_sql('account_move_line', next_groupby.split(',')[0] if next_groupby else 'id', query)
+
+                tail_query = self._get_engine_query_tail(offset, limit)
+                query = SQL(
+                    """
+                    SELECT
+                        COALESCE(SUM(%(balance_select)s), 0.0) AS sum,
+                        COUNT(DISTINCT %(select_count_field)s) AS count_rows
+                        %(select_groupby_sql)s
+                    FROM %(table_references)s
+                    %(currency_table_join)s
+                    WHERE %(search_condition)s
+                    %(group_by_groupby_sql)s
+                    %(order_by_sql)s
+                    %(tail_query)s
+                    """,
+                    select_count_field=select_count_field,
+                    select_groupby_sql=SQL(', %s AS grouping_key', groupby_sql) if groupby_sql else SQL(),
+                    table_references=query.from_clause,
+                    balance_select=self._currency_table_apply_rate(SQL("account_move_line.balance")),
+                    currency_table_join=self._currency_table_aml_join(options),
+                    search_condition=query.where_clause,
+                    group_by_groupby_sql=SQL('GROUP BY %s', groupby_sql) if groupby_sql else SQL(),
+                    order_by_sql=SQL(' ORDER BY %s', groupby_sql) if groupby_sql else SQL(),
+                    tail_query=tail_query,
+                )
 
             # Fetch the results.
             formula_rslt = []
@@ -3897,57 +4131,66 @@ class AccountReport(models.Model):
         for prefix, account_id in self.env.execute_query(SQL(' UNION ALL ').join(all_prefixes_queries)):
             accounts_prefix_map[account_id].append(tuple(prefix))
 
-        # Run main query
-        query = self._get_report_query(options, date_scope)
+        # Run main query, using the monthly balances rollup if possible
+        balances_query = None
+        if not (offset or limit):
+            balances_query = self.env['account.report.balance.rollup']._get_balances_query(
+                self, options, date_scope, current_groupby=current_groupby, groupby_account=True,
+            )
 
-        current_groupby_aml_sql = self.env['account.move.line']._field_to_sql('account_move_line', current_groupby, query) if current_groupby else None
-        tail_query = self._get_engine_query_tail(offset, limit)
-        if current_groupby_aml_sql and tail_query:
-            tail_query_additional_groupby_where_sql = SQL(
-                """
-                AND %(current_groupby_aml_sql)s IN (
-                    SELECT DISTINCT %(current_groupby_aml_sql)s
-                    FROM account_move_line
-                    WHERE %(search_condition)s
-                    ORDER BY %(current_groupby_aml_sql)s
-                    %(tail_query)s
+        if balances_query:
+            query = balances_query
+        else:
+            query = self._get_report_query(options, date_scope)
+
+            current_groupby_aml_sql = self.env['account.move.line']._field_to_sql('account_move_line', current_groupby, query) if current_groupby else None
+            tail_query = self._get_engine_query_tail(offset, limit)
+            if current_groupby_aml_sql and tail_query:
+                tail_query_additional_groupby_where_sql = SQL(
+                    """
+                    AND %(current_groupby_aml_sql)s IN (
+                        SELECT DISTINCT %(current_groupby_aml_sql)s
+                        FROM account_move_line
+                        WHERE %(search_condition)s
+                        ORDER BY %(current_groupby_aml_sql)s
+                        %(tail_query)s
+                    )
+                    """,
+                    current_groupby_aml_sql=current_groupby_aml_sql,
+                    search_condition=query.where_clause,
+                    tail_query=tail_query,
                 )
+            else:
+                tail_query_additional_groupby_where_sql = SQL()
+
+            extra_groupby_sql =  SQL(", %s", current_groupby_aml_sql) if current_groupby_aml_sql else SQL()
+            extra_select_sql = SQL(", %s AS grouping_key", current_groupby_aml_sql) if current_groupby_aml_sql else SQL()
+
+            query = SQL(
+                """
+                SELECT
+                    account_move_line.account_id AS account_id,
+                    SUM(%(balance_select)s) AS sum,
+                    COUNT(account_move_line.id) AS aml_count
+                    %(extra_select_sql)s
+                FROM %(table_references)s
+                %(currency_table_join)s
+                WHERE %(search_condition)s
+                %(tail_query_additional_groupby_where_sql)s
+                GROUP BY account_move_line.account_id%(extra_groupby_sql)s
+                %(order_by_sql)s
+                %(tail_query)s
                 """,
-                current_groupby_aml_sql=current_groupby_aml_sql,
+                extra_select_sql=extra_select_sql,
+                table_references=query.from_clause,
+                balance_select=self._currency_table_apply_rate(SQL("account_move_line.balance")),
+                currency_table_join=self._currency_table_aml_join(options),
                 search_condition=query.where_clause,
-                tail_query=tail_query,
+                extra_groupby_sql=extra_groupby_sql,
+                tail_query_additional_groupby_where_sql=tail_query_additional_groupby_where_sql,
+                order_by_sql=SQL('ORDER BY %s', current_groupby_aml_sql) if current_groupby_aml_sql else SQL(),
+                tail_query=tail_query if not tail_query_additional_groupby_where_sql else SQL(),
             )
-        else:
-            tail_query_additional_groupby_where_sql = SQL()
-
-        extra_groupby_sql =  SQL(", %s", current_groupby_aml_sql) if current_groupby_aml_sql else SQL()
-        extra_select_sql = SQL(", %s AS grouping_key", current_groupby_aml_sql) if current_groupby_aml_sql else SQL()
-
-        query = SQL(
-            """
-            SELECT
-                account_move_line.account_id AS account_id,
-                SUM(%(balance_select)s) AS sum,
-                COUNT(account_move_line.id) AS aml_count
-                %(extra_select_sql)s
-            FROM %(table_references)s
-            %(currency_table_join)s
-            WHERE %(search_condition)s
-            %(tail_query_additional_groupby_where_sql)s
-            GROUP BY account_move_line.account_id%(extra_groupby_sql)s
-            %(order_by_sql)s
-            %(tail_query)s
-            """,
-            extra_select_sql=extra_select_sql,
-            table_references=query.from_clause,
-            balance_select=self._currency_table_apply_rate(SQL("account_move_line.balance")),
-            currency_table_join=self._currency_table_aml_join(options),
-            search_condition=query.where_clause,
-            extra_groupby_sql=extra_groupby_sql,
-            tail_query_additional_groupby_where_sql=tail_query_additional_groupby_where_sql,
-            order_by_sql=SQL('ORDER BY %s', current_groupby_aml_sql) if current_groupby_aml_sql else SQL(),
-            tail_query=tail_query if not tail_query_additional_groupby_where_sql else SQL(),
-        )
         self._cr.execute(query)
 
         # Parse result
@@ -4650,6 +4893,18 @@ class AccountReport(models.Model):
             'context': ctx,
         }
 
+    def action_save_snapshot(self, options):
+        self.env['account.report.snapshot']._save_snapshot(self, options)
+        return {'type': 'ir.actions.client', 'tag': 'reload'}
+
+    def action_refresh_snapshot(self, options, params=None):
+        self.env['account.report.snapshot']._get_snapshot(self, options)._compute_snapshot()
+        return {'type': 'ir.actions.client', 'tag': 'reload'}
+
+    def action_discard_snapshot(self, options, params=None):
+        self.env['account.report.snapshot']._get_snapshot(self, options).unlink()
+        return {'type': 'ir.actions.client', 'tag': 'reload'}
+
     def open_unposted_moves(self, options, params=None):
         ''' Open the list of draft journal entries that might impact the reporting'''
         action = self.env["ir.actions.actions"]._for_xml_id("account.action_move_journal_line")
@@ -5144,12 +5399,16 @@ class AccountReport(models.Model):
         """
         self.ensure_one()
 
-        warnings = {}
-        self._init_currency_table(options)
-        all_column_groups_expression_totals = self._compute_expression_totals_for_each_column_group(self.line_ids.expression_ids, options, warnings=warnings)
-
-        # Convert all_column_groups_expression_totals to a json-friendly form (its keys are records)
-        json_friendly_column_group_totals = self._get_json_friendly_column_group_totals(all_column_groups_expression_totals)
+        snapshot = self.use_snapshots and self.env['account.report.snapshot']._get_snapshot(self, options)
+        if snapshot:
+            json_friendly_column_group_totals = snapshot.column_groups_totals
+            lines = snapshot.lines
+            warnings = {
+                **snapshot.warnings,
+                'account_reports.common_warning_snapshot': {'computed_at': format_datetime(self.env, snapshot.computed_at)},
+            }
+        else:
+            json_friendly_column_group_totals, lines, warnings = self._compute_report_information_values(options)
 
         if self.custom_handler_model_name:
             custom_display_config = self.env[self.custom_handler_model_name]._get_custom_display_config()
@@ -5182,7 +5441,7 @@ class AccountReport(models.Model):
                 'account_readonly': self.env.user.has_group('account.group_account_readonly'),
                 'account_user': self.env.user.has_group('account.group_account_user'),
             },
-            'lines': self._get_lines(options, all_column_groups_expression_totals=all_column_groups_expression_totals, warnings=warnings),
+            'lines': lines,
             'warnings': warnings,
             'report': {
                 'company_name': self.env.company.name,
@@ -5193,6 +5452,20 @@ class AccountReport(models.Model):
             }
         }
 
+    def _compute_report_information_values(self, options):
+        """ Computes the part of get_report_information depending on the accounting data, which is stored by the snapshots.
+        Returns a tuple (json-friendly column groups totals, lines, warnings).
+        """
+        warnings = {}
+        self._init_currency_table(options)
+        all_column_groups_expression_totals = self._compute_expression_totals_for_each_column_group(self.line_ids.expression_ids, options, warnings=warnings)
+
+        # Convert all_column_groups_expression_totals to a json-friendly form (its keys are records)
+        json_friendly_column_group_totals = self._get_json_friendly_column_group_totals(all_column_groups_expression_totals)
+
+        lines = self._get_lines(options, all_column_groups_expression_totals=all_column_groups_expression_totals, warnings=warnings)
+        return json_friendly_column_group_totals, lines, warnings
+
     @api.readonly
     def get_report_information_readonly(self, options):
         """ Readonly version of get_report_information, to be called from RPC when options['readonly_query'] is True,
@@ -5344,6 +5617,14 @@ class AccountReport(models.Model):
 
         return self._add_totals_below_sections(rslt, options)
 
+    def _get_expand_batch_limit(self, options):
+        """ Returns the maximum number of sublines an expand function should generate at once, or None if they should all be generated.
+        All the sublines are generated at once when printing, unless they are streamed into an XLSX file.
+        """
+        if options['export_mode'] == 'print':
+            return options.get('xlsx_stream_batch_size')
+        return self.load_more_limit or None
+
     def _add_totals_below_sections(self, lines, options):
         """ Returns a new list, corresponding to lines with the required total lines added as sublines of the sections it contains.
         """
@@ -5837,11 +6118,6 @@ class AccountReport(models.Model):
 
     def export_to_xlsx(self, options, response=None):
         self.ensure_one()
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output, {
-            'in_memory': True,
-            'strings_to_formulas': False,
-        })
 
         print_options = self.get_options(previous_options={**options, 'export_mode': 'print'})
         if print_options['sections']:
@@ -5852,7 +6128,22 @@ class AccountReport(models.Model):
         reports_options = []
         for report in reports_to_print:
             report_options = report.get_options(previous_options={**print_options, 'selected_section_id': report.id})
+            stream_batch_size = report._get_xlsx_stream_batch_size(report_options)
+            if stream_batch_size:
+                report_options['xlsx_stream_batch_size'] = stream_batch_size
             reports_options.append(report_options)
+
+        # When the lines of a report are streamed, the rows are written one by one and flushed to temporary files
+        # by xlsxwriter, so that the whole report is never held in memory.
+        streamed = any(report_options.get('xlsx_stream_batch_size') for report_options in reports_options)
+        output = tempfile.TemporaryFile() if streamed else io.BytesIO()
+        workbook = xlsxwriter.Workbook(output, {
+            'in_memory': not streamed,
+            'constant_memory': streamed,
+            'strings_to_formulas': False,
+        })
+
+        for report, report_options in zip(reports_to_print, reports_options):
             report._inject_report_into_xlsx_sheet(report_options, workbook, workbook.add_worksheet(report.name[:31]))
 
         self._add_options_xlsx_sheet(workbook, reports_options)
@@ -5954,13 +6245,21 @@ class AccountReport(models.Model):
         col1_styles = {}
 
         print_mode_self = self.with_context(no_format=True)
-        lines = self._filter_out_folded_children(print_mode_self._get_lines(options))
+        report_lines = self._filter_out_folded_children(print_mode_self._get_lines(options))
+        if options.get('order_column'):
+            report_lines = self.sort_lines(report_lines, options)
+
+        if options.get('xlsx_stream_batch_size'):
+            # report_lines only contains the lines before any unfolding; their sublines are generated while writing the rows.
+            lines = print_mode_self._get_xlsx_streamed_lines(options, report_lines)
+        else:
+            lines = report_lines
         annotations = self.get_annotations(options)
 
         # For reports with lines generated for accounts, the account name and codes are shown in a single column.
         # To help user post-process the report if they need, we should in such a case split the account name and code in two columns.
         account_lines_split_names = {}
-        for line in lines:
+        for line in report_lines:
             line_model = self._get_model_info_from_id(line['id'])[0]
             if line_model == 'account.account':
                 # Reuse the _split_code_name to split the name and code in two values.
@@ -6029,14 +6328,11 @@ class AccountReport(models.Model):
 
         y_offset += 1
 
-        if options.get('order_column'):
-            lines = self.sort_lines(lines, options)
-
         # Add lines.
         counter = 1
-        for y in range(0, len(lines)):
-            level = lines[y].get('level')
-            is_total_line = 'total' in lines[y].get('class', '').split(' ')
+        for y, line in enumerate(lines):
+            level = line.get('level')
+            is_total_line = 'total' in line.get('class', '').split(' ')
             if level == 0:
                 y_offset += 1
                 style = level_0_style
@@ -6068,45 +6364,118 @@ class AccountReport(models.Model):
 
             # write the (Account) Name column, with a specific style to manage the indentation
             x_offset = original_x_offset + 1
-            if lines[y]['id'] in account_lines_split_names:
-                code, name = account_lines_split_names[lines[y]['id']]
+            if line['id'] in account_lines_split_names:
+                code, name = account_lines_split_names[line['id']]
                 write_cell(sheet, 0, y + y_offset, code, col2_style)
                 write_cell(sheet, 1, y + y_offset, name, col1_style)
             else:
-                cell_type, cell_value = self._get_cell_type_value(lines[y])
+                cell_type, cell_value = self._get_cell_type_value(line)
                 if cell_type == 'date':
                     write_cell(sheet, original_x_offset, y + y_offset, cell_value, date_default_col1_style, datetime=True)
                 else:
                     write_cell(sheet, original_x_offset, y + y_offset, cell_value, col1_style)
 
-                if lines[y].get('parent_id') and lines[y]['parent_id'] in account_lines_split_names:
-                    write_cell(sheet, 1 + original_x_offset, y + y_offset, account_lines_split_names[lines[y]['parent_id']][0], col2_style)
+                if line.get('parent_id') and line['parent_id'] in account_lines_split_names:
+                    write_cell(sheet, 1 + original_x_offset, y + y_offset, account_lines_split_names[line['parent_id']][0], col2_style)
                 elif account_lines_split_names:
                     write_cell(sheet, 1 + original_x_offset, y + y_offset, "", col2_style)
 
             #write all the remaining cells
-            columns = lines[y]['columns']
-            if options.get('column_percent_comparison') and 'column_percent_comparison_data' in lines[y]:
-                columns += [lines[y].get('column_percent_comparison_data')]
+            columns = line['columns']
+            if options.get('column_percent_comparison') and 'column_percent_comparison_data' in line:
+                columns += [line.get('column_percent_comparison_data')]
 
             if options['show_horizontal_group_total']:
-                columns += [lines[y].get('horizontal_group_total_data', {'name': 0})]
+                columns += [line.get('horizontal_group_total_data', {'name': 0})]
 
             for x, column in enumerate(columns, start=x_offset):
                 cell_type, cell_value = self._get_cell_type_value(column)
                 if cell_type == 'date':
-                    write_cell(sheet, x + lines[y].get('colspan', 1) - 1, y + y_offset, cell_value, date_default_style, datetime=True)
+                    write_cell(sheet, x + line.get('colspan', 1) - 1, y + y_offset, cell_value, date_default_style, datetime=True)
                 else:
-                    write_cell(sheet, x + lines[y].get('colspan', 1) - 1, y + y_offset, cell_value, style)
+                    write_cell(sheet, x + line.get('colspan', 1) - 1, y + y_offset, cell_value, style)
 
             # Write annotations.
-            if annotations and (line_annotations := annotations.get(lines[y]['id'])):
+            if annotations and (line_annotations := annotations.get(line['id'])):
                 line_annotation_text = []
                 for line_annotation in line_annotations:
                     line_annotation_text.append(f"{counter} - {line_annotation['text']}")
                     counter += 1
                 write_cell(sheet, annotations_x_offset, y + y_offset, "\n".join(line_annotation_text), annotation_style)
 
+    def _get_xlsx_stream_batch_size(self, options):
+        """ Returns the number of sublines to generate at once when writing the unfolded lines of this report to an XLSX file,
+        or None if all the lines of the report need to be computed before writing it.
+        """
+        if self.custom_handler_model_id:
+            return self.env[self.custom_handler_model_name]._custom_xlsx_stream_batch_size(self, options)
+        return None
+
+    @api.model
+    def _get_default_xlsx_stream_batch_size(self):
+        return int(self.env['ir.config_parameter'].sudo().get_param('account_reports.xlsx_stream_batch_size', XLSX_STREAM_BATCH_SIZE))
+
+    def _get_xlsx_streamed_lines(self, options, lines):
+        """ Generator yielding lines, each unfolded line being followed by its sublines. The sublines are generated
+        by batches of options['xlsx_stream_batch_size'] lines, and only kept in memory while the rows are written.
+        """
+        for line in lines:
+            yield line
+
+            if line.get('unfolded') and line.get('expand_function'):
+                yield from self._get_xlsx_streamed_sublines(options, line)
+
+    def _get_xlsx_streamed_sublines(self, options, parent_line):
+        expand_function = self._get_custom_report_function(parent_line['expand_function'], 'expand_unfoldable_line')
+        progress = parent_line.get('progress') or {column_group_key: 0 for column_group_key in options['column_groups']}
+        offset = 0
+        has_more = True
+        while has_more:
+            expansion_result = expand_function(parent_line['id'], parent_line.get('groupby'), options, progress, offset)
+            has_more = expansion_result.get('has_more')
+
+            sublines = expansion_result['lines']
+            if not has_more:
+                sublines += expansion_result.get('after_load_more_lines', [])
+
+            if parent_line.get('horizontal_split_side'):
+                for line in sublines:
+                    line['horizontal_split_side'] = parent_line['horizontal_split_side']
+
+            if parent_line['expand_function'] != '_report_expand_unfoldable_line_with_groupby':
+                self._apply_integer_rounding_to_dynamic_lines(options, sublines)
+
+            sublines = self._add_totals_below_sections(sublines, options)
+            if self.custom_handler_model_id:
+                sublines = self.env[self.custom_handler_model_name]._custom_line_postprocessor(self, options, sublines)
+            self._format_column_values(options, sublines)
+            if options.get('hide_0_lines'):
+                sublines = self._filter_out_0_lines(sublines)
+
+            yield from self._get_xlsx_streamed_lines(options, sublines)
+
+            offset += expansion_result['offset_increment']
+            progress = expansion_result.get('progress', progress)
+
+    def action_export_to_xlsx_in_background(self, options):
+        """ Queues the XLSX export of the report; the file is generated by a cron and sent to the current user once ready. """
+        self.ensure_one()
+        self.env['account.report.xlsx.export'].sudo().create({
+            'report_id': self.id,
+            'options': {**options, 'export_mode': 'file'},
+            'company_ids': [Command.set(self.env.companies.ids)],
+        })
+        self.env.ref('account_reports.ir_cron_account_report_xlsx_export')._trigger()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'type': 'info',
+                'title': _("Exporting %s", self.name),
+                'message': _("The XLSX file is being generated in the background. You will be notified when it is ready."),
+            },
+        }
+
     def _add_options_xlsx_sheet(self, workbook, options_list):
         """Adds a new sheet for xlsx report exports with a summary of all filters and options activated at the moment of the export."""
         filters_sheet = workbook.add_worksheet(_("Filters"))
@@ -6860,6 +7229,18 @@ class AccountReportLine(models.Model):
             report_line.report_id._check_groupby_fields(report_line.user_groupby)
             report_line.report_id._check_groupby_fields(report_line.groupby)
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        if any(lines.report_id.mapped('use_engine_cache')):
+            self.env.registry.clear_cache()
+        return lines
+
+    def write(self, vals):
+        if {'groupby', 'user_groupby'} & vals.keys() and any(self.report_id.mapped('use_engine_cache')):
+            self.env.registry.clear_cache()
+        return super().write(vals)
+
     def _expand_groupby(self, line_dict_id, groupby, options, offset=0, limit=None, load_one_more=False, unfold_all_batch_data=None):
         """ Expand function used to get the sublines of a groupby.
         groupby param is a string consisting of one or more coma-separated field names. Only the first one
@@ -7118,6 +7499,18 @@ class AccountReportLine(models.Model):
 class AccountReportExpression(models.Model):
     _inherit = 'account.report.expression'
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        expressions = super().create(vals_list)
+        if any(expressions.report_line_id.report_id.mapped('use_engine_cache')):
+            self.env.registry.clear_cache()
+        return expressions
+
+    def write(self, vals):
+        if {'engine', 'formula'} & vals.keys() and any(self.report_line_id.report_id.mapped('use_engine_cache')):
+            self.env.registry.clear_cache()
+        return super().write(vals)
+
     def action_view_carryover_lines(self, options, column_group_key=None):
         if column_group_key:
             options = self.report_line_id.report_id._get_column_group_options(options, column_group_key)
@@ -7228,6 +7621,13 @@ class AccountReportCustomHandler(models.AbstractModel):
         """
         return None
 
+    def _custom_xlsx_stream_batch_size(self, report, options):
+        """ To be overridden by reports whose unfolded lines can be expanded by batches, using offset and the limit given by
+        report._get_expand_batch_limit, in order to write them to XLSX files without loading all of them in memory.
+        Returns the number of sublines to generate at once, or None (default) to compute all the lines before writing them.
+        """
+        return None
+
     def _get_custom_display_config(self):
         """ To be overridden in order to change the templates used by Javascript to render this report (keeping the same
         OWL components), and/or replace some of the default OWL components by custom-made ones.
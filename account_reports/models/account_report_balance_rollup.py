@@ -0,0 +1,368 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import api, fields, models, osv
+from odoo.tools import SQL, date_utils
+
+# The account.move.line fields the balances are rolled up on. The rollup can only be used to evaluate domains and groupbys on these fields.
+ROLLUP_FIELDS = ('company_id', 'account_id', 'partner_id', 'journal_id', 'currency_id')
+
+
+class AccountReportBalanceRollup(models.Model):
+    """ Monthly balances of the posted journal items, per company, account, partner, journal and currency.
+
+    When enabled in the settings, the account_codes and domain engines read these balances instead of account_move_line for the
+    months fully included in the period of the report, which are up to date. Months which are outdated or only partially included in the period
+    are still read from the journal items, so that the results are always exactly the same as without the rollup.
+
+    Writing on a posted entry only marks its month as outdated; the outdated months are rebuilt by a cron.
+    """
+    _name = 'account.report.balance.rollup'
+    _description = "Accounting Report Monthly Balances"
+    _log_access = False
+
+    period = fields.Date(required=True, help="First day of the month of the rolled up journal items.")
+    company_id = fields.Many2one(comodel_name='res.company', required=True, ondelete='cascade')
+    account_id = fields.Many2one(comodel_name='account.account', ondelete='cascade')
+    partner_id = fields.Many2one(comodel_name='res.partner', ondelete='cascade')
+    journal_id = fields.Many2one(comodel_name='account.journal', ondelete='cascade')
+    currency_id = fields.Many2one(comodel_name='res.currency', ondelete='cascade')
+    company_currency_id = fields.Many2one(comodel_name='res.currency', related='company_id.currency_id')
+    balance = fields.Monetary(currency_field='company_currency_id')
+    debit = fields.Monetary(currency_field='company_currency_id')
+    credit = fields.Monetary(currency_field='company_currency_id')
+    amount_currency = fields.Monetary(currency_field='currency_id')
+    line_count = fields.Integer()
+
+    def init(self):
+        super().init()
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS account_report_balance_rollup_company_period_account_idx
+                ON account_report_balance_rollup (company_id, period, account_id)
+        """)
+
+    @api.model
+    def _is_rollup_enabled(self):
+        return bool(self.env['ir.config_parameter'].sudo().get_param('account_reports.balance_rollup'))
+
+    # -------------------------------------------------------------------------
+    # MAINTENANCE
+    # -------------------------------------------------------------------------
+
+    @api.model
+    def _initialize_rollup(self):
+        """ Marks every month containing posted journal items as outdated, so that the cron builds the whole rollup. """
+        self._clear_rollup()
+        self.env.cr.execute("""
+            INSERT INTO account_report_balance_rollup_outdated (company_id, period)
+            SELECT DISTINCT company_id, DATE_TRUNC('month', date)::date
+              FROM account_move_line
+             WHERE parent_state = 'posted'
+        """)
+        self.env.ref('account_reports.ir_cron_account_report_balance_rollup')._trigger()
+
+    @api.model
+    def _clear_rollup(self):
+        """ Drops the rollup entirely. As the outdated months are not tracked anymore when it is disabled, it has to be rebuilt from scratch
+        if enabled again.
+        """
+        self.env.cr.execute("""
+            TRUNCATE account_report_balance_rollup, account_report_balance_rollup_period, account_report_balance_rollup_outdated
+        """)
+
+    @api.model
+    def _mark_outdated(self, moves):
+        """ Marks the months of moves as outdated. To be called on posted moves, before and after they are written. """
+        if not moves or not self._is_rollup_enabled():
+            return
+
+        company_periods = {(move.company_id.id, move.date + relativedelta(day=1)) for move in moves if move.date}
+        if company_periods:
+            self.env.cr.execute(SQL(
+                "INSERT INTO account_report_balance_rollup_outdated (company_id, period) VALUES %s",
+                SQL(", ").join(SQL("(%s, %s)", company_id, period) for company_id, period in company_periods),
+            ))
+
+    @api.model
+    def _cron_refresh_outdated_months(self, batch_size=50):
+        if not self._is_rollup_enabled():
+            return
+
+        self.env.cr.execute(SQL(
+            """
+            SELECT DISTINCT company_id, period
+              FROM account_report_balance_rollup_outdated
+          ORDER BY period, company_id
+             LIMIT %s
+            """,
+            batch_size,
+        ))
+        company_periods = self.env.cr.fetchall()
+        for company_id, period in company_periods:
+            self._refresh_month(company_id, period)
+
+        self.env.cr.execute("SELECT COUNT(DISTINCT (company_id, period)) FROM account_report_balance_rollup_outdated")
+        remaining = self.env.cr.fetchone()[0]
+        self.env['ir.cron']._notify_progress(done=len(company_periods), remaining=remaining)
+
+    @api.model
+    def _refresh_month(self, company_id, period):
+        """ Rebuilds the balances of a month from the journal items.
+        Only the outdated marks visible in the snapshot of the current transaction are removed; if a concurrent transaction posts an entry
+        in this month, its mark will remain and the month will still be read from the journal items until next refresh.
+        """
+        self.env.cr.execute(SQL(
+            """
+            DELETE FROM account_report_balance_rollup
+                  WHERE company_id = %(company_id)s
+                    AND period = %(period)s;
+
+            INSERT INTO account_report_balance_rollup (
+                period, company_id, account_id, partner_id, journal_id, currency_id,
+                balance, debit, credit, amount_currency, line_count
+            )
+            SELECT %(period)s, company_id, account_id, partner_id, journal_id, currency_id,
+                   SUM(balance), SUM(debit), SUM(credit), SUM(amount_currency), COUNT(*)
+              FROM account_move_line
+             WHERE company_id = %(company_id)s
+               AND parent_state = 'posted'
+               AND (display_type IS NULL OR display_type NOT IN ('line_section', 'line_note'))
+               AND date >= %(period)s
+               AND date < %(next_period)s
+          GROUP BY company_id, account_id, partner_id, journal_id, currency_id;
+
+            INSERT INTO account_report_balance_rollup_period (company_id, period)
+                 VALUES (%(company_id)s, %(period)s)
+            ON CONFLICT DO NOTHING;
+
+            DELETE FROM account_report_balance_rollup_outdated
+                  WHERE company_id = %(company_id)s
+                    AND period = %(period)s;
+            """,
+            company_id=company_id,
+            period=period,
+            next_period=period + relativedelta(months=1),
+        ))
+
+    # -------------------------------------------------------------------------
+    # REPORT ENGINES
+    # -------------------------------------------------------------------------
+
+    @api.model
+    def _get_rollup_domain(self, report, options, domain):
+        """ Converts the domain on account.move.line the report would use with these options into a domain on the rollup.
+        Dates are excluded, as they are handled separately.
+
+        The record rules of the journal items apply to the rollup as well, so they must only use rolled up fields too.
+
+        The analytic and cash basis options don't go through the domain: they filter the journal items in the query, or replace their table.
+        The rollup can't be used with them.
+
+        :return: The domain, or None if it uses fields that are not rolled up.
+        """
+        if (
+            options.get('analytic_accounts')
+            or options.get('analytic_groupby_option')
+            or options.get('report_cash_basis')
+            or report.env.context.get('account_report_analytic_groupby')
+            or report.env.context.get('account_report_cash_basis')
+        ):
+            return None
+
+        aml_domain = report._get_options_domain(options, None) + (domain or [])
+        if not report.env.su:
+            aml_domain = osv.expression.AND([aml_domain, report.env['ir.rule']._compute_domain('account.move.line', 'read')])
+
+        rollup_domain = []
+        for leaf in osv.expression.normalize_domain(aml_domain):
+            if not osv.expression.is_leaf(leaf) or tuple(leaf) in (osv.expression.TRUE_LEAF, osv.expression.FALSE_LEAF):
+                rollup_domain.append(leaf)
+            elif tuple(leaf) == ('parent_state', '=', 'posted'):
+                # Only posted journal items are rolled up
+                rollup_domain.append(osv.expression.TRUE_LEAF)
+            elif leaf[0] == 'display_type' and leaf[1] == 'not in' and set(leaf[2]) == {'line_section', 'line_note'}:
+                # Sections and notes are never rolled up
+                rollup_domain.append(osv.expression.TRUE_LEAF)
+            elif leaf[0].split('.')[0] in ROLLUP_FIELDS:
+                rollup_domain.append(leaf)
+            else:
+                return None
+        return rollup_domain
+
+    @api.model
+    def _get_up_to_date_periods_by_company(self, company_ids, first_period, last_period):
+        self.env.cr.execute(SQL(
+            """
+            SELECT built.company_id, ARRAY_AGG(built.period ORDER BY built.period)
+              FROM account_report_balance_rollup_period built
+             WHERE built.company_id IN %(company_ids)s
+               AND built.period <= %(last_period)s
+               %(first_period_condition)s
+               AND NOT EXISTS (
+                    SELECT 1
+                      FROM account_report_balance_rollup_outdated outdated
+                     WHERE outdated.company_id = built.company_id
+                       AND outdated.period = built.period
+               )
+          GROUP BY built.company_id
+            """,
+            company_ids=tuple(company_ids),
+            last_period=last_period,
+            first_period_condition=SQL("AND built.period >= %s", first_period) if first_period else SQL(),
+        ))
+        return dict(self.env.cr.fetchall())
+
+    @api.model
+    def _get_balances_query(self, report, options, date_scope, domain=None, current_groupby=None, groupby_account=False, count_alias='aml_count'):
+        """ Builds a query aggregating the balance of the journal items matching domain under these options, using the rollup for the up to date
+        months of the period, and the journal items for the rest.
+
+        The query returns the 'sum' and count_alias columns, as well as 'account_id' if groupby_account is True and 'grouping_key' if
+        current_groupby is provided.
+
+        :return: An SQL object, or None if the rollup can't be used for this computation.
+        """
+        if (
+            not self._is_rollup_enabled()
+            or options['currency_table']['type'] != 'monocurrency'
+            or options.get('compute_budget')
+            or (current_groupby and current_groupby not in ROLLUP_FIELDS)
+        ):
+            return None
+
+        rollup_domain = self._get_rollup_domain(report, options, domain)
+        if rollup_domain is None:
+            return None
+
+        # Only the months fully included in the period can be read from the rollup
+        date_from, date_to = report._get_date_bounds_info(options, date_scope)
+        date_from = fields.Date.to_date(date_from)
+        date_to = fields.Date.to_date(date_to)
+        first_period = date_from and date_utils.start_of(date_from + relativedelta(days=-1), 'month') + relativedelta(months=1)
+        last_period = date_utils.start_of(date_to + relativedelta(days=1), 'month') + relativedelta(months=-1)
+        if first_period and first_period > last_period:
+            return None
+
+        company_ids = report.get_report_company_ids(options)
+        periods_by_company = self._get_up_to_date_periods_by_company(company_ids, first_period, last_period)
+        if not periods_by_company:
+            return None
+
+        # Rolled up balances
+        rollup_query = self._where_calc(rollup_domain)
+        rollup_groupby_sql = self._field_to_sql('account_report_balance_rollup', current_groupby, rollup_query) if current_groupby else None
+        rollup_sql = SQL(
+            """
+            SELECT account_report_balance_rollup.company_id AS company_id,
+                   account_report_balance_rollup.account_id AS account_id,
+                   %(grouping_key)s AS grouping_key,
+                   account_report_balance_rollup.balance AS balance,
+                   account_report_balance_rollup.line_count AS line_count
+              FROM %(table_references)s
+             WHERE %(search_condition)s
+               AND (account_report_balance_rollup.company_id, account_report_balance_rollup.period) IN %(company_periods)s
+            """,
+            grouping_key=rollup_groupby_sql or SQL("NULL"),
+            table_references=rollup_query.from_clause,
+            search_condition=rollup_query.where_clause,
+            company_periods=tuple(
+                (company_id, period)
+                for company_id, periods in periods_by_company.items()
+                for period in periods
+            ),
+        )
+
+        # Journal items of the months not covered by the rollup. They are expressed as positive date ranges, so that the date index can be used.
+        aml_query = report._get_report_query(options, date_scope, domain=domain)
+        aml_groupby_sql = self.env['account.move.line']._field_to_sql('account_move_line', current_groupby, aml_query) if current_groupby else None
+        company_conditions = []
+        for company_id in company_ids:
+            date_conditions = []
+            range_start = date_from
+            for period in periods_by_company.get(company_id, []):
+                if not range_start or range_start < period:
+                    date_conditions.append(SQL(
+                        "(%s AND account_move_line.date < %s)",
+                        SQL("account_move_line.date >= %s", range_start) if range_start else SQL("TRUE"),
+                        period,
+                    ))
+                range_start = period + relativedelta(months=1)
+            date_conditions.append(SQL("account_move_line.date >= %s", range_start) if range_start else SQL("TRUE"))
+            company_conditions.append(SQL(
+                "(account_move_line.company_id = %s AND (%s))",
+                company_id,
+                SQL(" OR ").join(date_conditions),
+            ))
+
+        aml_sql = SQL(
+            """
+            SELECT account_move_line.company_id AS company_id,
+                   account_move_line.account_id AS account_id,
+                   %(grouping_key)s AS grouping_key,
+                   account_move_line.balance AS balance,
+                   1 AS line_count
+              FROM %(table_references)s
+             WHERE %(search_condition)s
+               AND (%(company_conditions)s)
+            """,
+            grouping_key=aml_groupby_sql or SQL("NULL"),
+            table_references=aml_query.from_clause,
+            search_condition=aml_query.where_clause,
+            company_conditions=SQL(" OR ").join(company_conditions),
+        )
+
+        select_groupby_sqls = []
+        groupby_sqls = []
+        if groupby_account:
+            select_groupby_sqls.append(SQL("balances.account_id AS account_id,"))
+            groupby_sqls.append(SQL("balances.account_id"))
+        if current_groupby:
+            select_groupby_sqls.append(SQL("balances.grouping_key AS grouping_key,"))
+            groupby_sqls.append(SQL("balances.grouping_key"))
+
+        return SQL(
+            """
+            SELECT %(select_groupby)s
+                   COALESCE(SUM(%(balance_select)s), 0.0) AS sum,
+                   COALESCE(SUM(balances.line_count), 0) AS %(count_alias)s
+              FROM (%(rollup_sql)s UNION ALL %(aml_sql)s) AS balances
+              %(currency_table_join)s
+              %(groupby)s
+              %(orderby)s
+            """,
+            select_groupby=SQL(" ").join(select_groupby_sqls),
+            balance_select=report._currency_table_apply_rate(SQL("balances.balance")),
+            count_alias=SQL.identifier(count_alias),
+            rollup_sql=rollup_sql,
+            aml_sql=aml_sql,
+            currency_table_join=report._currency_table_aml_join(options, aml_alias=SQL("balances")),
+            groupby=SQL("GROUP BY %s", SQL(", ").join(groupby_sqls)) if groupby_sqls else SQL(),
+            orderby=SQL("ORDER BY balances.grouping_key") if current_groupby else SQL(),
+        )
+
+
+class AccountReportBalanceRollupPeriod(models.Model):
+    """ Months for which account.report.balance.rollup has been built. """
+    _name = 'account.report.balance.rollup.period'
+    _description = "Accounting Report Monthly Balances Period"
+    _log_access = False
+
+    company_id = fields.Many2one(comodel_name='res.company', required=True, ondelete='cascade')
+    period = fields.Date(required=True)
+
+    _sql_constraints = [
+        ('company_period_uniq', 'unique (company_id, period)', "A period can only be built once per company."),
+    ]
+
+
+class AccountReportBalanceRollupOutdated(models.Model):
+    """ Months of account.report.balance.rollup whose journal items changed since they were built.
+    Those are only ever inserted (never updated) when posting, so that concurrent transactions posting in the same month don't conflict.
+    """
+    _name = 'account.report.balance.rollup.outdated'
+    _description = "Accounting Report Monthly Balances Outdated Period"
+    _log_access = False
+
+    company_id = fields.Many2one(comodel_name='res.company', required=True, ondelete='cascade', index=True)
+    period = fields.Date(required=True)
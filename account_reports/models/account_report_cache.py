@@ -0,0 +1,324 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import ast
+import hashlib
+import json
+
+import psycopg2.errors
+from dateutil.relativedelta import relativedelta
+
+from odoo import api, fields, models, tools
+from odoo.tools import SQL
+
+# Options keys only impacting the rendering of the report, and not the values computed by the engines.
+# They are ignored when building the cache keys, so that unfolding a line or sorting a column can reuse the cached totals.
+CACHE_KEY_IGNORED_OPTIONS = {
+    'unfolded_lines', 'unfold_all', 'order_column', 'hide_0_lines', 'export_mode', 'loading_call_number',
+    'buttons', 'show_debug_column', 'search_bar', 'filter_search_bar', 'annotations', 'readonly_query',
+}
+
+CACHE_ENTRY_LIFETIME_DAYS = 30
+
+# The invalidations are kept for this long, to recognize the entries computed by transactions that were running when they happened.
+# It only needs to exceed the duration of the longest transaction computing a report.
+INVALIDATION_LIFETIME_HOURS = 24
+
+# Fields of the journal items and of the journal entries that the engines always depend on. The fields used in the domain formulas
+# and in the groupbys of the reports using the cache are added to them.
+ENGINE_MOVE_LINE_FIELDS = {
+    'account_id', 'balance', 'debit', 'credit', 'amount_currency', 'currency_id', 'date', 'company_id', 'journal_id', 'move_id',
+    'parent_state', 'display_type', 'partner_id', 'tax_ids', 'tax_tag_ids', 'tax_line_id', 'tax_repartition_line_id', 'analytic_distribution',
+}
+ENGINE_MOVE_FIELDS = {'state', 'date', 'company_id', 'journal_id', 'line_ids'}
+
+# Fields whose value changes on reconciliation, without the journal entry itself being written.
+RECONCILIATION_FIELDS = (
+    'reconciled', 'amount_residual', 'amount_residual_currency', 'full_reconcile_id', 'matching_number',
+    'matched_debit_ids', 'matched_credit_ids', 'payment_state',
+)
+
+
+class AccountReportCache(models.Model):
+    """ Stores the results of the engines of account.report, so that opening, filtering or unfolding
+    a report with the same options does not query account_move_line again.
+
+    Entries are dropped as soon as a posted journal entry of their companies, dated within their date range, changes.
+    As reports are mostly computed in readonly transactions, an entry can be stored after the invalidation that should have dropped it:
+    each entry keeps the snapshot it was computed in, and is ignored if an invalidation of its scope was not visible in this snapshot.
+    """
+    _name = 'account.report.cache'
+    _description = "Accounting Report Engine Cache"
+    _log_access = False
+
+    key = fields.Char(required=True)
+    report_id = fields.Many2one(comodel_name='account.report', required=True, ondelete='cascade', index=True)
+    company_ids = fields.Many2many(
+        comodel_name='res.company',
+        relation='account_report_cache_res_company_rel',
+        column1='cache_id',
+        column2='company_id',
+    )
+    date_from = fields.Date()
+    date_to = fields.Date(required=True)
+    depends_on_reconciliation = fields.Boolean()
+    value = fields.Json()
+    computed_at = fields.Datetime(required=True)
+    computed_snapshot = fields.Char(required=True, help="The txid_snapshot of the transaction which computed the value.")
+
+    _sql_constraints = [
+        ('key_uniq', 'unique (key)', "A cache entry already exists for this key."),
+    ]
+
+    @api.model
+    def _get_cache_key(self, report, options, engine, date_scope, formula, current_groupby, next_groupby, offset, limit):
+        options_to_hash = {key: value for key, value in options.items() if key not in CACHE_KEY_IGNORED_OPTIONS}
+        # The uid and the active company are part of the key, as the engines apply the record rules and use the company's fiscal year.
+        key_data = [
+            report.id, self.env.uid, self.env.company.id,
+            engine, date_scope, formula, current_groupby, next_groupby, offset, limit,
+            options_to_hash,
+        ]
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True, default=str).encode()).hexdigest()
+
+    @api.model
+    def _get_cached_values(self, keys):
+        """ Returns a dict {key: value} with the cached values found for keys. """
+        if not keys:
+            return {}
+
+        # An invalidation made by the transaction storing the entry (the same xmin) was already visible when computing it.
+        self.env.cr.execute(SQL(
+            """
+            SELECT cache.key, cache.value
+              FROM account_report_cache cache
+             WHERE cache.key IN %s
+               AND NOT EXISTS (
+                    SELECT 1
+                      FROM account_report_cache_invalidation invalidation
+                      JOIN account_report_cache_res_company_rel rel ON rel.company_id = invalidation.company_id
+                     WHERE rel.cache_id = cache.id
+                       AND (cache.depends_on_reconciliation OR NOT invalidation.reconciliation_only)
+                       AND (invalidation.date_from IS NULL OR cache.date_to >= invalidation.date_from)
+                       AND (invalidation.date_to IS NULL OR cache.date_from IS NULL OR cache.date_from <= invalidation.date_to)
+                       AND NOT invalidation.xmin = cache.xmin
+                       AND NOT txid_visible_in_snapshot(invalidation.txid, cache.computed_snapshot::txid_snapshot)
+               )
+            """,
+            tuple(keys),
+        ))
+        return {key: self._json_to_engine_result(value) for key, value in self.env.cr.fetchall()}
+
+    @api.model
+    def _store_values(self, report, options, date_scope, values_by_key, depends_on_reconciliation_keys=()):
+        """ Stores the engine results provided in values_by_key, a dict {key: engine_result}.
+
+        Reports are often computed within a readonly transaction; in this case, the entries are stored
+        using a new cursor, so that the next call can benefit from them.
+        """
+        values_to_store = {}
+        for key, value in values_by_key.items():
+            if self._is_engine_result_storable(value):
+                try:
+                    values_to_store[key] = json.dumps(value)
+                except TypeError:
+                    continue
+        if not values_to_store:
+            return
+
+        date_from, date_to = report._get_date_bounds_info(options, date_scope)
+        company_ids = report.get_report_company_ids(options)
+        if not company_ids:
+            return
+
+        # The snapshot of the current transaction is the one the values were computed in.
+        self.env.cr.execute("SELECT txid_current_snapshot()::text")
+        snapshot = self.env.cr.fetchone()[0]
+
+        # Replacing an entry updated by a concurrent transaction raises a serialization failure; the value is then simply not stored.
+        try:
+            if self.env.cr.readonly:
+                with self.env.registry.cursor() as cr:
+                    self._insert_cache_entries(cr, report, company_ids, date_from, date_to, values_to_store, depends_on_reconciliation_keys, snapshot)
+            else:
+                with self.env.cr.savepoint(flush=False):
+                    self._insert_cache_entries(self.env.cr, report, company_ids, date_from, date_to, values_to_store, depends_on_reconciliation_keys, snapshot)
+        except psycopg2.errors.SerializationFailure:
+            pass
+
+    @api.model
+    def _insert_cache_entries(self, cr, report, company_ids, date_from, date_to, values_by_key, depends_on_reconciliation_keys, snapshot):
+        # An existing entry for the key is outdated (otherwise, it would have been used): it is replaced.
+        cr.execute(SQL(
+            """
+            INSERT INTO account_report_cache (key, report_id, date_from, date_to, depends_on_reconciliation, value, computed_at, computed_snapshot)
+            VALUES %s
+            ON CONFLICT (key) DO UPDATE
+               SET value = EXCLUDED.value,
+                   computed_at = EXCLUDED.computed_at,
+                   computed_snapshot = EXCLUDED.computed_snapshot
+            RETURNING id
+            """,
+            SQL(", ").join(
+                SQL(
+                    "(%s, %s, %s, %s, %s, %s, NOW() AT TIME ZONE 'UTC', %s)",
+                    key, report.id, date_from, date_to, key in depends_on_reconciliation_keys, value, snapshot,
+                )
+                for key, value in values_by_key.items()
+            ),
+        ))
+        cache_ids = [cache_id for cache_id, in cr.fetchall()]
+        if cache_ids:
+            cr.execute(SQL(
+                """
+                INSERT INTO account_report_cache_res_company_rel (cache_id, company_id)
+                SELECT cache.id, company.id
+                  FROM unnest(%s) AS cache(id)
+                 CROSS JOIN unnest(%s) AS company(id)
+                ON CONFLICT DO NOTHING
+                """,
+                cache_ids,
+                list(company_ids),
+            ))
+
+    @api.model
+    def _is_engine_result_storable(self, engine_result):
+        """ Only results whose grouping keys survive a json round trip can be cached. """
+        if isinstance(engine_result, list):
+            return all(isinstance(grouping_key, (int, float, str, bool, type(None))) for grouping_key, _totals in engine_result)
+        return True
+
+    @api.model
+    def _json_to_engine_result(self, value):
+        if isinstance(value, list):
+            return [(grouping_key, totals) for grouping_key, totals in value]
+        return value
+
+    @api.model
+    @tools.ormcache()
+    def _get_engine_dependencies(self):
+        """ Returns a tuple (move_line_fields, move_fields) with the names of the account.move.line and account.move fields whose change
+        must invalidate the cache. Both are empty when no report uses the cache, so that writing journal entries does not invalidate anything.
+        """
+        reports = self.env['account.report'].sudo().with_context(active_test=False).search([('use_engine_cache', '=', True)])
+        if not reports:
+            return frozenset(), frozenset()
+
+        move_line_fields = set(ENGINE_MOVE_LINE_FIELDS)
+        move_fields = set(ENGINE_MOVE_FIELDS)
+        for groupby in reports.line_ids.mapped('groupby') + reports.line_ids.mapped('user_groupby'):
+            move_line_fields.update(field_name.strip() for field_name in (groupby or '').split(','))
+        move_line_fields.update(reports.horizontal_group_ids.rule_ids.mapped('field_name'))
+
+        for expression in reports.line_ids.expression_ids.filtered(lambda expr: expr.engine == 'domain'):
+            try:
+                domain = ast.literal_eval(expression.formula)
+            except (ValueError, SyntaxError):
+                continue
+            for leaf in domain:
+                if isinstance(leaf, (list, tuple)) and leaf and isinstance(leaf[0], str):
+                    field_path = leaf[0].split('.')
+                    move_line_fields.add(field_path[0])
+                    if field_path[0] == 'move_id' and len(field_path) > 1:
+                        move_fields.add(field_path[1])
+
+        return frozenset(move_line_fields), frozenset(move_fields)
+
+    @api.model
+    def _invalidate_for_moves(self, moves):
+        """ Drops the cache entries that might have been impacted by a change on moves. """
+        dates_per_company = {}
+        for move in moves:
+            company_dates = dates_per_company.setdefault(move.company_id.id, set())
+            company_dates.add(move.date)
+
+        for company_id, dates in dates_per_company.items():
+            if not all(dates):
+                self._invalidate_companies(self.env['res.company'].browse(company_id))
+                continue
+
+            # An entry is impacted if its date range contains the date of the move.
+            self._log_invalidation([company_id], min(dates), max(dates))
+            self.env.cr.execute(SQL(
+                """
+                DELETE FROM account_report_cache cache
+                 USING account_report_cache_res_company_rel rel
+                 WHERE rel.cache_id = cache.id
+                   AND rel.company_id = %(company_id)s
+                   AND cache.date_to >= %(min_date)s
+                   AND (cache.date_from IS NULL OR cache.date_from <= %(max_date)s)
+                """,
+                company_id=company_id,
+                min_date=min(dates),
+                max_date=max(dates),
+            ))
+
+    @api.model
+    def _invalidate_companies(self, companies, reconciliation_only=False):
+        """ Drops all the cache entries of companies, or only the ones depending on reconciliation if reconciliation_only is True. """
+        if not companies:
+            return
+
+        self._log_invalidation(companies.ids, reconciliation_only=reconciliation_only)
+        self.env.cr.execute(SQL(
+            """
+            DELETE FROM account_report_cache cache
+             USING account_report_cache_res_company_rel rel
+             WHERE rel.cache_id = cache.id
+               AND rel.company_id IN %s
+               %s
+            """,
+            tuple(companies.ids),
+            SQL("AND cache.depends_on_reconciliation") if reconciliation_only else SQL(),
+        ))
+
+    @api.model
+    def _log_invalidation(self, company_ids, date_from=None, date_to=None, reconciliation_only=False):
+        """ Keeps track of an invalidation, so that the entries computed by the transactions not seeing it yet are not used once stored. """
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO account_report_cache_invalidation (company_id, date_from, date_to, reconciliation_only, logged_at, txid)
+            SELECT company.id, %s, %s, %s, NOW() AT TIME ZONE 'UTC', txid_current()
+              FROM unnest(%s) AS company(id)
+            """,
+            date_from,
+            date_to,
+            reconciliation_only,
+            list(company_ids),
+        ))
+
+    @api.autovacuum
+    def _gc_report_cache(self):
+        """ Entries are only dropped when the data they depend on changes; make sure the table does not grow forever. """
+        self.env.cr.execute(SQL(
+            "DELETE FROM account_report_cache WHERE computed_at < %s",
+            fields.Datetime.now() - relativedelta(days=CACHE_ENTRY_LIFETIME_DAYS),
+        ))
+        self.env.cr.execute(SQL(
+            "DELETE FROM account_report_cache_invalidation WHERE logged_at < %s",
+            fields.Datetime.now() - relativedelta(hours=INVALIDATION_LIFETIME_HOURS),
+        ))
+
+
+class AccountReportCacheInvalidation(models.Model):
+    """ Invalidations of account.report.cache, kept for a while after they deleted the impacted entries.
+
+    An entry computed in a snapshot where an invalidation was not visible yet (typically, in a readonly transaction running concurrently)
+    can be stored after the invalidation is committed; it is then ignored. Like the outdated months of account.report.balance.rollup,
+    those are only ever inserted, so that concurrent transactions writing entries of the same company don't conflict.
+    """
+    _name = 'account.report.cache.invalidation'
+    _description = "Accounting Report Engine Cache Invalidation"
+    _log_access = False
+
+    company_id = fields.Many2one(comodel_name='res.company', required=True, ondelete='cascade', index=True)
+    date_from = fields.Date()
+    date_to = fields.Date()
+    reconciliation_only = fields.Boolean()
+    logged_at = fields.Datetime(required=True)
+
+    def init(self):
+        super().init()
+        # The id of the invalidating transaction; it is a bigint, which no field type maps to.
+        self.env.cr.execute("""
+            ALTER TABLE account_report_cache_invalidation ADD COLUMN IF NOT EXISTS txid BIGINT NOT NULL DEFAULT txid_current()
+        """)
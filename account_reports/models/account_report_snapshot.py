@@ -0,0 +1,123 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import hashlib
+import json
+import logging
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import api, fields, models
+from odoo.tools.json import json_default
+
+# Options keys which are not part of the state of the report, and are ignored when matching the options of a snapshot.
+SNAPSHOT_IGNORED_OPTIONS = {'loading_call_number', 'readonly_query', 'buttons'}
+
+# Snapshots older than this are recomputed by the cron.
+SNAPSHOT_REFRESH_HOURS = 12
+
+# Models whose record rules restrict the data shown by the reports: a snapshot is only shown to the users having the same rules
+# on them as the user it was computed for.
+SNAPSHOT_ACCESS_MODELS = ('account.move.line', 'account.move', 'account.account', 'res.partner')
+
+_logger = logging.getLogger(__name__)
+
+
+class AccountReportSnapshot(models.Model):
+    """ Precomputed lines of a report for a set of saved options.
+
+    When a user opens the report with the same options, companies and language as a snapshot, and has the same record rules as
+    the user it was computed for, the stored lines are displayed instead of being computed again, along with the date they were
+    computed at. The snapshots are recomputed regularly by a cron, or on demand from the report.
+    """
+    _name = 'account.report.snapshot'
+    _description = "Accounting Report Snapshot"
+    _order = 'computed_at'
+
+    report_id = fields.Many2one(comodel_name='account.report', required=True, ondelete='cascade')
+    options = fields.Json(required=True)
+    options_hash = fields.Char(required=True, index=True)
+    access_hash = fields.Char(required=True)
+    company_ids = fields.Many2many(
+        comodel_name='res.company',
+        relation='account_report_snapshot_res_company_rel',
+        column1='snapshot_id',
+        column2='company_id',
+    )
+    lang = fields.Char()
+    lines = fields.Json()
+    column_groups_totals = fields.Json()
+    warnings = fields.Json()
+    computed_at = fields.Datetime()
+
+    _sql_constraints = [
+        ('options_hash_access_hash_uniq', 'unique (options_hash, access_hash)', "A snapshot already exists for these options."),
+    ]
+
+    @api.model
+    def _get_options_hash(self, report, options):
+        options_to_hash = {key: value for key, value in options.items() if key not in SNAPSHOT_IGNORED_OPTIONS}
+        # The lines depend on the companies being browsed, and are translated.
+        key_data = [report.id, sorted(self.env.companies.ids), self.env.lang, options_to_hash]
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True, default=str).encode()).hexdigest()
+
+    @api.model
+    def _get_access_hash(self):
+        """ Returns the hash of the record rules of the current user on SNAPSHOT_ACCESS_MODELS, for the companies being browsed. """
+        rule_domains = [str(self.env['ir.rule']._compute_domain(model_name, 'read')) for model_name in SNAPSHOT_ACCESS_MODELS]
+        return hashlib.sha256(json.dumps(rule_domains).encode()).hexdigest()
+
+    @api.model
+    def _get_snapshot(self, report, options):
+        """ Returns the snapshot for these options the current user can access. The lines of a snapshot only contain what the user it
+        was computed for could see, so it is only returned to the users having the same record rules.
+        """
+        return self.sudo().search([
+            ('options_hash', '=', self._get_options_hash(report, options)),
+            ('access_hash', '=', self._get_access_hash()),
+        ], limit=1)
+
+    @api.model
+    def _save_snapshot(self, report, options):
+        """ Creates the snapshot of report for options, or refreshes it if it already exists. """
+        snapshot = self._get_snapshot(report, options)
+        if not snapshot:
+            snapshot = self.sudo().create({
+                'report_id': report.id,
+                'options': {key: value for key, value in options.items() if key not in SNAPSHOT_IGNORED_OPTIONS},
+                'options_hash': self._get_options_hash(report, options),
+                'access_hash': self._get_access_hash(),
+                'company_ids': [fields.Command.set(self.env.companies.ids)],
+                'lang': self.env.lang,
+            })
+        snapshot._compute_snapshot()
+        return snapshot
+
+    def _compute_snapshot(self):
+        """ Computes the lines of the snapshots, as the user who saved them, so that they only contain what this user can see. """
+        for snapshot in self:
+            report = snapshot.report_id\
+                .with_user(snapshot.create_uid)\
+                .with_context(allowed_company_ids=snapshot.company_ids.ids, lang=snapshot.lang)
+            column_groups_totals, lines, warnings = report._compute_report_information_values(dict(snapshot.options))
+            # Lines may contain dates, which are serialized the same way as when sending them to the client.
+            snapshot.write({
+                'access_hash': snapshot.with_env(report.env)._get_access_hash(),
+                'lines': json.loads(json.dumps(lines, default=json_default)),
+                'column_groups_totals': column_groups_totals,
+                'warnings': json.loads(json.dumps(warnings, default=json_default)),
+                'computed_at': fields.Datetime.now(),
+            })
+
+    @api.model
+    def _cron_refresh_snapshots(self, batch_size=10):
+        domain = [('computed_at', '<', fields.Datetime.now() - relativedelta(hours=SNAPSHOT_REFRESH_HOURS))]
+        snapshots = self.search(domain, limit=batch_size)
+        for snapshot in snapshots:
+            try:
+                with self.env.cr.savepoint():
+                    snapshot._compute_snapshot()
+            except Exception:
+                # e.g. the user lost the access to the report; don't retry it before the next refresh, so that it doesn't block the others
+                _logger.exception("Could not refresh the snapshot %s of report %s", snapshot.id, snapshot.report_id.id)
+                snapshot.computed_at = fields.Datetime.now()
+        self.env['ir.cron']._notify_progress(done=len(snapshots), remaining=self.search_count(domain))
@@ -0,0 +1,103 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import logging
+
+from dateutil.relativedelta import relativedelta
+from markupsafe import Markup
+
+from odoo import _, api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+EXPORT_LIFETIME_DAYS = 7
+
+
+class AccountReportXlsxExport(models.Model):
+    """ XLSX exports of accounting reports queued by users, to be generated by a cron.
+    Once the file is generated, it is attached to the export and its link is sent to the user who requested it.
+    """
+    _name = 'account.report.xlsx.export'
+    _description = "Accounting Report XLSX Export"
+    _order = 'id'
+
+    report_id = fields.Many2one(comodel_name='account.report', required=True, ondelete='cascade')
+    options = fields.Json(required=True)
+    company_ids = fields.Many2many(
+        comodel_name='res.company',
+        relation='account_report_xlsx_export_res_company_rel',
+        column1='export_id',
+        column2='company_id',
+    )
+    state = fields.Selection(
+        selection=[
+            ('pending', "Pending"),
+            ('done', "Done"),
+            ('failed', "Failed"),
+        ],
+        required=True,
+        default='pending',
+    )
+    attachment_id = fields.Many2one(comodel_name='ir.attachment', ondelete='set null')
+
+    @api.model
+    def _cron_generate_exports(self, job_count=5):
+        exports = self.search([('state', '=', 'pending')], limit=job_count)
+        for export in exports:
+            export._generate_export()
+
+        remaining = self.search_count([('state', '=', 'pending')])
+        self.env['ir.cron']._notify_progress(done=len(exports), remaining=remaining)
+
+    def _generate_export(self):
+        """ Generates the file as the user who requested the export, with the companies they had selected. """
+        self.ensure_one()
+        report = self.report_id.with_user(self.create_uid).with_context(allowed_company_ids=self.company_ids.ids)
+
+        try:
+            with self.env.cr.savepoint():
+                file_data = report.export_to_xlsx(self.options)
+                # Created by the requesting user and linked to no record, so that only they can download it.
+                attachment = self.env['ir.attachment'].with_user(self.create_uid).create({
+                    'name': file_data['file_name'],
+                    'raw': file_data['file_content'],
+                    'mimetype': report.get_export_mime_type('xlsx'),
+                })
+        except Exception:
+            _logger.exception("Failed to generate the XLSX export of report %s", self.report_id.id)
+            self.state = 'failed'
+            self._notify_user(
+                _("%s: export failed", self.report_id.name),
+                _("The XLSX export of %s could not be generated. Please try again, or export a shorter period.", self.report_id.name),
+            )
+            return
+
+        self.write({
+            'state': 'done',
+            'attachment_id': attachment.id,
+        })
+        self._notify_user(
+            _("%s: export ready", self.report_id.name),
+            Markup('%s <a href="/web/content/%s?download=true">%s</a>') % (
+                _("Your XLSX export is ready:"),
+                attachment.id,
+                attachment.name,
+            ),
+        )
+
+    def _notify_user(self, subject, body):
+        self.env['mail.thread'].sudo().message_notify(
+            partner_ids=self.create_uid.partner_id.ids,
+            subject=subject,
+            body=body,
+            model_description=_("Accounting Report"),
+            email_layout_xmlid='mail.mail_notification_light',
+        )
+
+    @api.autovacuum
+    def _gc_xlsx_exports(self):
+        exports = self.search([
+            ('state', '!=', 'pending'),
+            ('create_date', '<', fields.Datetime.now() - relativedelta(days=EXPORT_LIFETIME_DAYS)),
+        ])
+        exports.attachment_id.unlink()
+        exports.unlink()
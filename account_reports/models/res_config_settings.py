@@ -19,6 +19,21 @@ class ResConfigSettings(models.TransientModel):
     account_tax_periodicity_journal_id = fields.Many2one(related='company_id.account_tax_periodicity_journal_id', string='Journal', readonly=False)
 
     account_reports_show_per_company_setting = fields.Boolean(compute="_compute_account_reports_show_per_company_setting")
+    account_reports_balance_rollup = fields.Boolean(
+        string="Monthly Balances Rollup",
+        config_parameter='account_reports.balance_rollup',
+        help="Keep the monthly balances of the posted entries up to date, so that the reports covering several months or years don't need to "
+             "read all the journal items.",
+    )
+
+    def set_values(self):
+        balance_rollup = self.env['account.report.balance.rollup'].sudo()
+        rollup_was_enabled = balance_rollup._is_rollup_enabled()
+        super().set_values()
+        if self.account_reports_balance_rollup and not rollup_was_enabled:
+            balance_rollup._initialize_rollup()
+        elif not self.account_reports_balance_rollup and rollup_was_enabled:
+            balance_rollup._clear_rollup()
 
     def open_tax_group_list(self):
         self.ensure_one()
@@ -127,11 +127,13 @@ export class AccountReportLine extends Component {
         if (this.popoverCloseFn)
             close();
 
+        const debugPopupData = JSON.parse(this.props.line.debug_popup_data);
         this.popoverCloseFn = this.popover.add(
             ev.currentTarget,
             AccountReportDebugPopover,
             {
-                expressionsDetail: JSON.parse(this.props.line.debug_popup_data).expressions_detail,
+                expressionsDetail: debugPopupData.expressions_detail,
+                cacheStats: debugPopupData.cache_stats,
                 onClose: close,
             },
             {
@@ -5,6 +5,7 @@ import { Component } from "@odoo/owl";
 export class AccountReportDebugPopover extends Component {
     static template = "account_reports.AccountReportDebugPopover";
     static props = {
+        cacheStats: { type: Object, optional: true },
         close: Function,
         expressionsDetail: Array,
         onClose: Function,
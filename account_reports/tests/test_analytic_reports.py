@@ -599,3 +599,51 @@ class TestAnalyticReport(TestAccountReportsCommon):
             ],
             options,
         )
+
+    def test_report_analytic_filter_with_balance_rollup(self):
+        # The balance rollup has no analytic distribution: it can't be used with an analytic filter
+        out_invoice = self.env['account.move'].create([{
+            'move_type': 'out_invoice',
+            'partner_id': self.partner_a.id,
+            'date': '2023-02-01',
+            'invoice_date': '2023-02-01',
+            'invoice_line_ids': [
+                Command.create({
+                    'product_id': self.product_a.id,
+                    'price_unit': 1000.0,
+                    'analytic_distribution': {
+                        self.analytic_account_parent.id: 100,
+                    },
+                }),
+                Command.create({
+                    'product_id': self.product_a.id,
+                    'price_unit': 500.0,
+                }),
+            ]
+        }])
+        out_invoice.action_post()
+
+        options = self._generate_options(
+            self.report,
+            '2023-01-01',
+            '2023-12-31',
+            default_options={
+                'analytic_accounts': [self.analytic_account_parent.id],
+            }
+        )
+
+        def get_lines_values():
+            return [
+                (line['name'], [column['no_format'] for column in line['columns']])
+                for line in self.report._get_lines(options)
+            ]
+
+        expected_values = get_lines_values()
+        self.assertIn(('Net Profit', [1000.0]), expected_values)
+
+        self.env['ir.config_parameter'].set_param('account_reports.balance_rollup', True)
+        balance_rollup = self.env['account.report.balance.rollup']
+        balance_rollup._initialize_rollup()
+        balance_rollup._cron_refresh_outdated_months()
+        self.assertIsNone(balance_rollup._get_rollup_domain(self.report, options, []))
+        self.assertEqual(get_lines_values(), expected_values)
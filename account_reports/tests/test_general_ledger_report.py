@@ -1,13 +1,16 @@
 # -*- coding: utf-8 -*-
 # pylint: disable=C0326
-from .common import TestAccountReportsCommon
+from .common import TestAccountReportsCommon, load_workbook
 import odoo.tests
 
 from odoo import fields, Command
 from odoo.tests import tagged
 from freezegun import freeze_time
+from unittest.mock import patch
 
+import io
 import json
+import unittest
 
 @tagged('post_install', '-at_install')
 class TestGeneralLedgerReport(TestAccountReportsCommon, odoo.tests.HttpCase):
@@ -395,6 +398,27 @@ class TestGeneralLedgerReport(TestAccountReportsCommon, odoo.tests.HttpCase):
             options,
         )
 
+    def test_general_ledger_xlsx_streamed_export(self):
+        ''' Ensure the XLSX file is the same when the move lines are written by batches as when they are all loaded at once. '''
+        if load_workbook is None:
+            raise unittest.SkipTest("openpyxl not available")
+
+        def get_sheet_values(file_content):
+            return list(load_workbook(filename=io.BytesIO(file_content), data_only=True).worksheets[0].values)
+
+        self.env.companies = self.env.company
+        self.env['ir.config_parameter'].sudo().set_param('account_reports.xlsx_stream_batch_size', 2)
+        options = self._generate_options(self.report, fields.Date.from_string('2017-01-01'), fields.Date.from_string('2017-12-31'))
+
+        streamed_file = self.report.export_to_xlsx(options)['file_content']
+        with patch.object(self.env.registry['account.general.ledger.report.handler'], '_custom_xlsx_stream_batch_size', lambda *args, **kwargs: None):
+            regular_file = self.report.export_to_xlsx(options)['file_content']
+
+        streamed_values = get_sheet_values(streamed_file)
+        self.assertEqual(streamed_values, get_sheet_values(regular_file))
+        # The five move lines of the revenue account are written in three batches.
+        self.assertEqual(sum(1 for row in streamed_values if 'INV/2017/00001' in row), 9)
+
     def test_general_ledger_foreign_currency_account(self):
         ''' Ensure the total in foreign currency of an account is displayed only if all journal items are sharing the
         same currency.
@@ -1,10 +1,18 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+
+from dateutil.relativedelta import relativedelta
+
 from .common import TestAccountReportsCommon
 
 from odoo import fields, Command
-from odoo.tests import tagged
+from odoo.exceptions import UserError
+from odoo.tests import tagged, new_test_user
 from odoo.tools import frozendict
 
-from unittest.mock import patch
+from unittest.mock import PropertyMock, patch
 
 
 @tagged('post_install', '-at_install')
@@ -1838,3 +1846,324 @@ class TestReportEngines(TestAccountReportsCommon):
             ],
             options,
         )
+
+    def test_engine_cache(self):
+        # As long as no report uses the cache, writing journal entries doesn't invalidate anything
+        self.env.registry.clear_cache()
+        invalidations_count = self.env['account.report.cache.invalidation'].sudo().search_count([])
+        self._create_test_account_moves([
+            self._prepare_test_account_move_line(10, account_code='104'),
+            self._prepare_test_account_move_line(-10, account_code='204'),
+        ])
+        self.assertEqual(self.env['account.report.cache.invalidation'].sudo().search_count([]), invalidations_count)
+
+        report = self._create_report(
+            [
+                self._prepare_test_report_line(self._prepare_test_expression_account_codes('1')),
+                self._prepare_test_report_line(self._prepare_test_expression_domain("[('account_id.code', '=like', '1%')]", 'sum')),
+            ],
+            use_engine_cache=True,
+        )
+
+        moves = self._create_test_account_moves([
+            self._prepare_test_account_move_line(100, account_code='101'),
+            self._prepare_test_account_move_line(-100, account_code='201'),
+        ])
+
+        options = self._generate_options(report, '2020-01-01', '2020-01-31')
+        expected_lines = [
+            ('test_line_1', 110.0),
+            ('test_line_2', 110.0),
+        ]
+        self.assertLinesValues(report._get_lines(options), [0, 1], expected_lines, options)
+        self.assertEqual(self.env['account.report.cache'].sudo().search_count([('report_id', '=', report.id)]), 2)
+
+        # Writing fields the engines don't depend on keeps the cache
+        moves.ref = "Test reference"
+        moves.line_ids.name = "Test label"
+        self.assertEqual(self.env['account.report.cache'].sudo().search_count([('report_id', '=', report.id)]), 2)
+
+        # A second computation is only served by the cache
+        expression_totals = report._compute_expression_totals_for_each_column_group(report.line_ids.expression_ids, options)
+        for totals in expression_totals.values():
+            self.assertTrue(all(expression_totals['cache_hit'] for expression_totals in totals.values()))
+        self.assertLinesValues(report._get_lines(options), [0, 1], expected_lines, options)
+
+        # Posting an entry in the period invalidates the cache
+        self._create_test_account_moves([
+            self._prepare_test_account_move_line(50, account_code='102', date='2020-01-15'),
+            self._prepare_test_account_move_line(-50, account_code='202', date='2020-01-15'),
+        ])
+        self.assertFalse(self.env['account.report.cache'].sudo().search_count([('report_id', '=', report.id)]))
+        self.assertLinesValues(
+            report._get_lines(options),
+            [   0,              1],
+            [
+                ('test_line_1', 160.0),
+                ('test_line_2', 160.0),
+            ],
+            options,
+        )
+
+        # Entries posted after the period don't
+        self._create_test_account_moves([
+            self._prepare_test_account_move_line(50, account_code='103', date='2020-02-15'),
+            self._prepare_test_account_move_line(-50, account_code='203', date='2020-02-15'),
+        ])
+        self.assertEqual(self.env['account.report.cache'].sudo().search_count([('report_id', '=', report.id)]), 2)
+
+    def test_engine_balance_rollup(self):
+        report = self._create_report(
+            [
+                self._prepare_test_report_line(self._prepare_test_expression_account_codes('1'), groupby='account_id'),
+                self._prepare_test_report_line(self._prepare_test_expression_domain("[('account_id.code', '=like', '1%')]", 'sum')),
+            ],
+        )
+
+        self._create_test_account_moves([
+            self._prepare_test_account_move_line(100, account_code='101', date='2020-01-10'),
+            self._prepare_test_account_move_line(200, account_code='102', date='2020-02-10'),
+            self._prepare_test_account_move_line(400, account_code='101', date='2020-03-10'),
+            self._prepare_test_account_move_line(800, account_code='101', date='2020-03-25'),
+            self._prepare_test_account_move_line(-1500, account_code='201', date='2020-01-10'),
+        ])
+
+        self.env['ir.config_parameter'].set_param('account_reports.balance_rollup', True)
+        balance_rollup = self.env['account.report.balance.rollup']
+        balance_rollup._initialize_rollup()
+        balance_rollup._cron_refresh_outdated_months()
+        self.assertTrue(balance_rollup.search_count([('company_id', '=', self.env.company.id)]))
+
+        # January and February are read from the rollup; March is not fully included in the period and read from the journal items
+        options = self._generate_options(report, '2020-01-01', '2020-03-20', default_options={'unfold_all': True})
+        self.assertLinesValues(
+            report._get_lines(options),
+            [   0,              1],
+            [
+                ('test_line_1', 700.0),
+                ('101',         500.0),
+                ('102',         200.0),
+                ('test_line_2', 700.0),
+            ],
+            options,
+        )
+
+        # The months of newly posted entries are outdated, and read from the journal items until the cron refreshes them
+        self._create_test_account_moves([
+            self._prepare_test_account_move_line(50, account_code='103', date='2020-02-15'),
+            self._prepare_test_account_move_line(-50, account_code='202', date='2020-02-15'),
+        ])
+        expected_lines = [
+            ('test_line_1', 750.0),
+            ('101',         500.0),
+            ('102',         200.0),
+            ('103',          50.0),
+            ('test_line_2', 750.0),
+        ]
+        self.assertLinesValues(report._get_lines(options), [0, 1], expected_lines, options)
+
+        balance_rollup._cron_refresh_outdated_months()
+        self.assertFalse(self.env['account.report.balance.rollup.outdated'].search_count([]))
+        self.assertLinesValues(report._get_lines(options), [0, 1], expected_lines, options)
+
+        # The record rules of the journal items apply to the rollup; if they use fields that are not rolled up, it can't be used
+        user_report = report.with_user(self.env.user)
+        self.assertIsNotNone(balance_rollup._get_rollup_domain(user_report, options, []))
+        self.env['ir.rule'].create({
+            'name': "Hide some journal items",
+            'model_id': self.env['ir.model']._get_id('account.move.line'),
+            'domain_force': "[('name', '!=', 'hidden')]",
+        })
+        self.assertIsNone(balance_rollup._get_rollup_domain(user_report, options, []))
+        self.assertIsNotNone(balance_rollup._get_rollup_domain(report.sudo(), options, []))
+
+    def test_column_groups_in_parallel_conditions(self):
+        report = self._create_report(
+            [self._prepare_test_report_line(self._prepare_test_expression_domain("[('account_id.code', '=like', '1%')]", 'sum'))],
+        )
+        self.env['ir.config_parameter'].set_param('account_reports.column_groups_workers', 2)
+
+        def can_compute_in_parallel(options):
+            options_per_column_group = report._split_options_per_column_group(options)
+            return report._can_compute_column_groups_in_parallel(options, list(options_per_column_group.values()))
+
+        with (
+            patch.object(type(self.env.cr), 'readonly', new_callable=PropertyMock, return_value=True),
+            patch.object(threading.current_thread(), 'testing', False),
+        ):
+            options = self._generate_options(report, '2020-01-01', '2020-01-31')
+            self.assertTrue(can_compute_in_parallel(options))
+
+            # Converting currencies requires the currency table, a temporary table the worker cursors can't see
+            multi_company_report = report.with_context(allowed_company_ids=(self.env.company + self.company_data_2['company']).ids)
+            multicurrency_options = self._generate_options(multi_company_report, '2020-01-01', '2020-01-31')
+            self.assertNotEqual(multicurrency_options['currency_table']['type'], 'monocurrency')
+            self.assertFalse(can_compute_in_parallel(multicurrency_options))
+            # Even if the options were forced to be computed in a readonly query
+            multicurrency_options['readonly_query'] = True
+            self.assertFalse(can_compute_in_parallel(multicurrency_options))
+
+            # The cash basis creates a temporary table replacing the journal items
+            cash_basis_options = self._generate_options(report, '2020-01-01', '2020-01-31')
+            cash_basis_options['report_cash_basis'] = True
+            self.assertFalse(can_compute_in_parallel(cash_basis_options))
+
+        warnings = {'account_reports.common_warning_draft_in_period': {'args': ['a']}}
+        report._merge_column_group_warnings(warnings, {
+            'account_reports.common_warning_draft_in_period': {'args': ['a', 'b'], 'alert_type': 'warning'},
+            'account_reports.common_warning_tax_unit': {},
+        })
+        self.assertEqual(warnings, {
+            'account_reports.common_warning_draft_in_period': {'args': ['a', 'b'], 'alert_type': 'warning'},
+            'account_reports.common_warning_tax_unit': {},
+        })
+
+    def test_column_groups_in_parallel_results(self):
+        report = self._create_report(
+            [
+                self._prepare_test_report_line(self._prepare_test_expression_account_codes('1'), groupby='account_id'),
+                self._prepare_test_report_line(self._prepare_test_expression_domain("[('account_id.code', '=like', '1%')]", 'sum')),
+            ],
+            filter_period_comparison=True,
+        )
+        self._create_test_account_moves([
+            self._prepare_test_account_move_line(100, account_code='101', date='2020-01-10'),
+            self._prepare_test_account_move_line(200, account_code='102', date='2020-02-10'),
+            self._prepare_test_account_move_line(400, account_code='101', date='2020-03-10'),
+            self._prepare_test_account_move_line(-700, account_code='201', date='2020-01-10'),
+        ])
+        self.env['ir.config_parameter'].set_param('account_reports.column_groups_workers', 2)
+        options = self._generate_options(report, '2020-03-01', '2020-03-31', default_options={'unfold_all': True})
+        options = self._update_comparison_filter(options, report, 'previous_period', 2)
+
+        def get_lines_values():
+            return [
+                (line['name'], [column['no_format'] for column in line['columns']])
+                for line in report._get_lines(options)
+            ]
+
+        # Computed sequentially, as in testing mode
+        expected_values = get_lines_values()
+        self.assertIn(('test_line_1', [400.0, 200.0, 100.0]), expected_values)
+
+        # The worker cursors can't see the data of the test transaction: they use the test cursor instead, one at a time
+        class WorkerCursor:
+            def __init__(self, cr):
+                self._cr = cr
+
+            def __getattr__(self, name):
+                return getattr(self._cr, name)
+
+            def execute(self, query, params=None, log_exceptions=True):
+                if not getattr(query, 'code', str(query)).startswith('SET TRANSACTION SNAPSHOT'):
+                    self._cr.execute(query, params, log_exceptions)
+
+        @contextmanager
+        def worker_cursor(readonly=False):
+            yield WorkerCursor(self.env.cr)
+
+        report_class = type(report)
+        compute_in_parallel = report_class._compute_expression_totals_for_column_groups_in_parallel
+        with (
+            patch.object(type(self.env.cr), 'readonly', new_callable=PropertyMock, return_value=True),
+            patch.object(threading.current_thread(), 'testing', False),
+            patch.object(self.env.registry, 'cursor', worker_cursor),
+            patch('odoo.addons.account_reports.models.account_report.ThreadPoolExecutor', partial(ThreadPoolExecutor, max_workers=1)),
+            patch.object(report_class, '_compute_expression_totals_for_column_groups_in_parallel', autospec=True, side_effect=compute_in_parallel) as parallel_mock,
+        ):
+            options['readonly_query'] = True
+            self.assertEqual(get_lines_values(), expected_values)
+        self.assertTrue(parallel_mock.called)
+
+    def test_report_snapshot(self):
+        report = self._create_report(
+            [self._prepare_test_report_line(self._prepare_test_expression_domain("[('account_id.code', '=like', '1%')]", 'sum'))],
+            use_snapshots=True,
+        )
+
+        self._create_test_account_moves([
+            self._prepare_test_account_move_line(100, account_code='101'),
+            self._prepare_test_account_move_line(-100, account_code='201'),
+        ])
+
+        options = self._generate_options(report, '2020-01-01', '2020-01-31')
+        report.action_save_snapshot(options)
+
+        # The snapshot is served until it is refreshed, even if the data changed
+        self._create_test_account_moves([
+            self._prepare_test_account_move_line(50, account_code='102', date='2020-01-15'),
+            self._prepare_test_account_move_line(-50, account_code='202', date='2020-01-15'),
+        ])
+        report_information = report.get_report_information(options)
+        self.assertIn('account_reports.common_warning_snapshot', report_information['warnings'])
+        self.assertLinesValues(report_information['lines'], [0, 1], [('test_line_1', 100.0)], options)
+
+        report.action_refresh_snapshot(options)
+        self.assertLinesValues(report.get_report_information(options)['lines'], [0, 1], [('test_line_1', 150.0)], options)
+
+        # Other options are computed as usual
+        other_options = self._generate_options(report, '2020-01-01', '2020-01-10')
+        report_information = report.get_report_information(other_options)
+        self.assertNotIn('account_reports.common_warning_snapshot', report_information['warnings'])
+        self.assertLinesValues(report_information['lines'], [0, 1], [('test_line_1', 100.0)], other_options)
+
+        # Snapshots are shared with the users having the same record rules as the user who saved them
+        snapshot_user, same_access_user, restricted_user = (
+            new_test_user(
+                self.env,
+                login=login,
+                groups='account.group_account_manager',
+                company_id=self.env.company.id,
+                company_ids=[Command.set(self.env.company.ids)],
+            )
+            for login in ('snapshot_user', 'snapshot_same_access_user', 'snapshot_restricted_user')
+        )
+        restricted_group = self.env['res.groups'].create({
+            'name': 'Restricted Journal Items',
+            'users': [Command.link(restricted_user.id)],
+        })
+        self.env['ir.rule'].create({
+            'name': 'Restricted Journal Items',
+            'model_id': self.env['ir.model']._get_id('account.move.line'),
+            'domain_force': "[('account_id.code', '!=', '102')]",
+            'groups': [Command.link(restricted_group.id)],
+        })
+
+        shared_options = self._generate_options(report, '2020-01-01', '2020-01-20')
+        report.with_user(snapshot_user).action_save_snapshot(shared_options)
+        self._create_test_account_moves([
+            self._prepare_test_account_move_line(25, account_code='101', date='2020-01-16'),
+            self._prepare_test_account_move_line(-25, account_code='201', date='2020-01-16'),
+        ])
+
+        report_information = report.with_user(same_access_user).get_report_information(shared_options)
+        self.assertIn('account_reports.common_warning_snapshot', report_information['warnings'])
+        self.assertLinesValues(report_information['lines'], [0, 1], [('test_line_1', 150.0)], shared_options)
+
+        restricted_user_report = report.with_user(restricted_user)
+        report_information = restricted_user_report.get_report_information(shared_options)
+        self.assertNotIn('account_reports.common_warning_snapshot', report_information['warnings'])
+        self.assertLinesValues(report_information['lines'], [0, 1], [('test_line_1', 125.0)], shared_options)
+        restricted_user_report.action_discard_snapshot(shared_options)
+        self.assertTrue(self.env['account.report.snapshot'].with_user(snapshot_user)._get_snapshot(report, shared_options))
+
+        # A snapshot failing to be refreshed doesn't prevent the cron from refreshing the other ones
+        Snapshot = self.env['account.report.snapshot']
+        snapshots = Snapshot.search([('report_id', '=', report.id)])
+        outdated_date = fields.Datetime.now() - relativedelta(days=1)
+        snapshots.computed_at = outdated_date
+        failing_snapshot = Snapshot.with_user(snapshot_user)._get_snapshot(report, shared_options)
+        compute_snapshot = type(Snapshot)._compute_snapshot
+
+        def _compute_snapshot(snapshot):
+            if snapshot == failing_snapshot:
+                raise UserError("Refresh failure")
+            return compute_snapshot(snapshot)
+
+        with (
+            patch.object(type(Snapshot), '_compute_snapshot', autospec=True, side_effect=_compute_snapshot),
+            self.assertLogs('odoo.addons.account_reports.models.account_report_snapshot', level='ERROR'),
+        ):
+            Snapshot._cron_refresh_snapshots()
+        self.assertTrue(all(computed_at > outdated_date for computed_at in snapshots.mapped('computed_at')))
+        self.assertLinesValues(report.get_report_information(options)['lines'], [0, 1], [('test_line_1', 175.0)], options)
@@ -174,6 +174,58 @@ class TestAccountReports(TestAccountReportsCommon):
             options,
         )
 
+    def test_balance_sheet_cash_basis_with_balance_rollup(self):
+        # The cash basis replaces the table of the journal items: the balance rollup, built from the journal items, can't be used
+        report = self.env.ref('account_reports.balance_sheet')
+        options = self._generate_options(report, fields.Date.from_string('2016-01-01'), fields.Date.from_string('2016-12-31'))
+        options['report_cash_basis'] = True
+
+        def get_lines_values():
+            return [
+                (line['name'], [column['no_format'] for column in line['columns']])
+                for line in report._get_lines(options)
+            ]
+
+        expected_values = get_lines_values()
+        self.assertIn(('Bank and Cash Accounts', [460.0]), expected_values)
+
+        self.env['ir.config_parameter'].set_param('account_reports.balance_rollup', True)
+        balance_rollup = self.env['account.report.balance.rollup']
+        balance_rollup._initialize_rollup()
+        balance_rollup._cron_refresh_outdated_months()
+        self.assertIsNone(balance_rollup._get_rollup_domain(report, options, []))
+        self.assertEqual(get_lines_values(), expected_values)
+
+    def test_balance_sheet_cash_basis_engine_cache(self):
+        # The cash basis amounts depend on the reconciliations, the cached results must be dropped when reconciling
+        report = self.env.ref('account_reports.balance_sheet')
+        report.use_engine_cache = True
+        options = self._generate_options(report, fields.Date.from_string('2016-01-01'), fields.Date.from_string('2016-12-31'))
+        options['report_cash_basis'] = True
+
+        def get_line_value(line_name):
+            return next(line['columns'][0]['no_format'] for line in report._get_lines(options) if line['name'] == line_name)
+
+        payment_3 = self.env['account.move'].create({
+            'move_type': 'entry',
+            'date': '2016-04-01',
+            'journal_id': self.liquidity_journal_1.id,
+            'line_ids': [
+                (0, 0, {'debit': 0.0,       'credit': 230.0,    'account_id': self.receivable_account_1.id}),
+                (0, 0, {'debit': 230.0,     'credit': 0.0,      'account_id': self.liquidity_account.id}),
+            ],
+        })
+        payment_3.action_post()
+        self.assertEqual(get_line_value('Current Year Unallocated Earnings'), 460.0)
+        self.assertTrue(self.env['account.report.cache'].sudo().search_count([('report_id', '=', report.id)]))
+
+        invoice_lines = self.env['account.move.line'].search([
+            ('account_id', '=', self.receivable_account_1.id),
+            ('move_id.journal_id', '=', self.company_data['default_journal_misc'].id),
+        ])
+        self._reconcile_on(invoice_lines + payment_3.line_ids, self.receivable_account_1)
+        self.assertEqual(get_line_value('Current Year Unallocated Earnings'), 690.0)
+
     def test_cash_basis_payment_in_the_past(self):
         self.env['res.currency'].search([('name', '!=', 'USD')]).with_context(force_deactivate=True).active = False
 
@@ -5,6 +5,7 @@ import io
 import json
 import logging
 import pathlib
+import time
 import zipfile
 from collections import defaultdict
 from contextlib import ExitStack
@@ -23,6 +24,8 @@ from odoo.addons.mail.controllers.attachment import AttachmentController
 
 logger = logging.getLogger(__name__)
 
+ZIP_CHUNK_SIZE = 64 * 1024  # size of the chunks read from the files when streaming a zip
+
 
 class ShareRoute(http.Controller):
 
@@ -145,9 +148,13 @@ class ShareRoute(http.Controller):
 
     def _make_zip(self, name, documents):
         """
-        Create a zip file in memory out of the given ``documents``,
-        recursively exploring the folders, get an HTTP response to
-        download that zip file.
+        Create a zip file out of the given ``documents``, recursively
+        exploring the folders, get an HTTP response to download that
+        zip file.
+
+        The zip file is generated on the fly while the response is
+        streamed, the content of the files being read by chunks, so
+        that the memory doesn't grow with the size of the documents.
 
         :param str name: the name to give to the zip file
         :param odoo.models.Model documents: documents to load in the ZIP
@@ -155,7 +162,7 @@ class ShareRoute(http.Controller):
         """
         class Item(NamedTuple):
             path: str
-            content: str
+            stream: http.Stream | None
 
         seen_folders = set()  # because of shortcuts, we can have loops
         # many documents can have the same name
@@ -177,12 +184,12 @@ class ShareRoute(http.Controller):
             if document.type == 'folder':
                 # it is the ending slash that makes it appears as a
                 # folder inside the zip file.
-                return Item(unique(f'{folder.path}{document.name}') + '/', '')
+                return Item(unique(f'{folder.path}{document.name}') + '/', None)
             try:
                 stream = self._documents_content_stream(document.shortcut_document_id or document)
             except (ValueError, MissingError):
                 return None  # skip
-            return Item(unique(f'{folder.path}{stream.download_name}'), stream.read())
+            return Item(unique(f'{folder.path}{stream.download_name}'), stream)
 
         def generate_zip_items(documents_sudo, folder):
             documents_sudo = documents_sudo.sorted(lambda d: d.id)
@@ -202,26 +209,72 @@ class ShareRoute(http.Controller):
                 for sub_document_sudo in self._get_folder_children(folder_sudo):
                     yield from generate_zip_items(sub_document_sudo, sub_folder)
 
-        # TODO: zip on-the-fly while streaming instead of loading the
-        #       entire zip in memory and sending it all at once.
-
-        stream = io.BytesIO()
-        root_folder = Item('', '')
-        try:
-            with zipfile.ZipFile(stream, 'w') as doc_zip:
-                for (path, content) in generate_zip_items(documents, root_folder):
-                    doc_zip.writestr(path, content, compress_type=zipfile.ZIP_DEFLATED)
-        except zipfile.BadZipfile:
-            logger.exception("BadZipfile exception")
+        # The items are listed now, the response is streamed once the
+        # cursor is closed: only their streams can be read by then.
+        items = list(generate_zip_items(documents, Item('', None)))
 
-        content = stream.getvalue()
         headers = [
             ('Content-Type', 'zip'),
             ('X-Content-Type-Options', 'nosniff'),
-            ('Content-Length', len(content)),
             ('Content-Disposition', content_disposition(name))
         ]
-        return request.make_response(content, headers)
+        return request.make_response(self._generate_zip_chunks(items), headers)
+
+    @classmethod
+    def _generate_zip_chunks(cls, items):
+        """
+        Generate a zip file by chunks out of the given ``items``.
+
+        :param items: list of ``(path, stream)``, ``stream`` being None
+            for the folders
+        :return: an iterator of the chunks of the zip file
+        """
+        class ZipOutput(io.RawIOBase):
+            """ Unseekable output of the zip file, emptied at each chunk """
+            def __init__(self):
+                self.chunks = []
+
+            def writable(self):
+                return True
+
+            def write(self, data):
+                self.chunks.append(bytes(data))
+                return len(data)
+
+            def pop(self):
+                chunk, self.chunks = b''.join(self.chunks), []
+                return chunk
+
+        output = ZipOutput()
+        try:
+            with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as doc_zip:
+                for path, stream in items:
+                    if stream is None:
+                        doc_zip.writestr(path, '')
+                        continue
+                    zip_info = zipfile.ZipInfo(path, date_time=time.localtime()[:6])
+                    zip_info.compress_type = zipfile.ZIP_DEFLATED
+                    # the size allows zipfile to use the zip64 extensions for big files
+                    zip_info.file_size = stream.size or 0
+                    with doc_zip.open(zip_info, 'w') as zip_file:
+                        for content in cls._read_stream_chunks(stream):
+                            zip_file.write(content)
+                            if chunk := output.pop():
+                                yield chunk
+        except zipfile.BadZipfile:
+            logger.exception("BadZipfile exception")
+        yield output.pop()
+
+    @staticmethod
+    def _read_stream_chunks(stream, chunk_size=ZIP_CHUNK_SIZE):
+        if stream.type == 'path':
+            with open(stream.path, 'rb') as file:
+                while content := file.read(chunk_size):
+                    yield content
+        else:
+            content = stream.read()
+            for start in range(0, len(content), chunk_size):
+                yield content[start:start + chunk_size]
 
     # Download & upload routes #####################################################################
     @http.route('/documents/pdf_split', type='http', methods=['POST'], auth="user")
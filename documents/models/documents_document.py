@@ -75,6 +75,7 @@ class Document(models.Model):
             ('present', 'Present'),  # Document has a thumbnail
             ('error', 'Error'),  # Error when generating the thumbnail
             ('client_generated', 'Client Generated'),  # The PDF thumbnail is generated by the user browser
+            ('queued', 'Queued'),  # The thumbnail will be generated by the thumbnails cron
             ('restricted', 'Inaccessible'),  # Shortcut to no-permission source
         ], compute="_compute_thumbnail", store=True, readonly=False, recursive=True,
     )
@@ -512,21 +513,61 @@ class Document(models.Model):
                 else:
                     document.thumbnail = False
                     document.thumbnail_status = 'restricted'
-            elif document.mimetype and document.mimetype.startswith('application/pdf'):
-                # Thumbnails of pdfs are generated by the client. To force the generation, we invalidate the thumbnail.
+            elif document.mimetype and document.mimetype.startswith(('application/pdf', 'image/')):
+                # Thumbnails are generated in the background, see '_cron_generate_thumbnails'
                 document.thumbnail = False
-                document.thumbnail_status = 'client_generated'
-            elif document.mimetype and document.mimetype.startswith('image/'):
-                try:
-                    document.thumbnail = base64.b64encode(image_process(document.raw, size=(200, 140), crop='center'))
-                    document.thumbnail_status = 'present'
-                except (UserError, TypeError):
-                    document.thumbnail = False
-                    document.thumbnail_status = 'error'
+                document.thumbnail_status = 'queued'
+                self._trigger_thumbnails_generation()
             else:
                 document.thumbnail = False
                 document.thumbnail_status = False
 
+    def _trigger_thumbnails_generation(self):
+        """ Trigger the thumbnails cron once the transaction is committed. """
+        if not self.env.cr.precommit.data.get('documents_thumbnails_queued'):
+            self.env.cr.precommit.data['documents_thumbnails_queued'] = True
+            self.env.cr.precommit.add(self.env.ref('documents.ir_cron_generate_thumbnails')._trigger)
+
+    @api.model
+    def _cron_generate_thumbnails(self, batch_size=100):
+        """ Generate the thumbnails of the queued documents.
+
+        Documents with the same content share the same thumbnail: the thumbnail of
+        a document with the same checksum is reused when there is one. Otherwise,
+        the thumbnails of the images are generated here, while the thumbnails of the
+        pdfs are left to the browser ('client_generated').
+        """
+        # The shortcuts have the thumbnail of their target
+        domain = [('thumbnail_status', '=', 'queued'), ('shortcut_document_id', '=', False)]
+        Document = self.with_context(active_test=False)
+        documents = Document.search(domain, limit=batch_size)
+        thumbnails = {}  # {checksum: thumbnail}
+        if checksums := set(documents.filtered('checksum').mapped('checksum')):
+            sources = Document.search_fetch([
+                ('checksum', 'in', list(checksums)),
+                ('thumbnail_status', '=', 'present'),
+                ('shortcut_document_id', '=', False),
+            ], ['thumbnail'])
+            thumbnails = {source.checksum: source.thumbnail for source in sources if source.thumbnail}
+
+        document_ids_by_thumbnail = defaultdict(list)
+        for document in documents:
+            thumbnail, status = thumbnails.get(document.checksum), 'present'
+            if not thumbnail and document.mimetype and document.mimetype.startswith('image/'):
+                try:
+                    thumbnail = base64.b64encode(image_process(document.raw, size=(200, 140), crop='center'))
+                    if document.checksum:
+                        thumbnails[document.checksum] = thumbnail
+                except (UserError, TypeError):
+                    thumbnail, status = False, 'error'
+            elif not thumbnail:
+                thumbnail, status = False, 'client_generated'
+            document_ids_by_thumbnail[thumbnail, status].append(document.id)
+
+        for (thumbnail, status), document_ids in document_ids_by_thumbnail.items():
+            Document.browse(document_ids).write({'thumbnail': thumbnail, 'thumbnail_status': status})
+        self.env['ir.cron']._notify_progress(done=len(documents), remaining=Document.search_count(domain))
+
     @api.depends('type')
     def _compute_deletion_delay(self):
         folders = self.filtered(lambda d: d.type == 'folder')
@@ -1,5 +1,6 @@
 import base64
 import json
+import os
 import zipfile
 from base64 import b64decode, b64encode
 from datetime import timedelta
@@ -393,6 +394,20 @@ class TestDocumentsControllers(HttpCaseWithUserDemo):
             self.assertEqual(set(reszip.namelist()), expected)
             self.assertEqual(reszip.read('internal-file.png'), self.doc_icon)
 
+    def test_doc_ctrl_zip_chunks(self):
+        content = os.urandom(256 * 1024)  # not compressible, so that the zip is written along
+        items = [
+            ('folder/', None),
+            ('folder/file.bin', http.Stream(type='data', data=content, size=len(content))),
+            ('empty.txt', http.Stream(type='data', data=b'', size=0)),
+        ]
+        chunks = list(ShareRoute._generate_zip_chunks(items))
+        self.assertGreater(len(chunks), 2, "the zip file should be generated by chunks")
+        with zipfile.ZipFile(BytesIO(b''.join(chunks))) as reszip:
+            self.assertEqual(reszip.namelist(), ['folder/', 'folder/file.bin', 'empty.txt'])
+            self.assertEqual(reszip.read('folder/file.bin'), content)
+            self.assertEqual(reszip.read('empty.txt'), b'')
+
     def test_doc_ctrl_content_url(self):
         self.authenticate(None, None)
         res = self.url_open(f'/documents/content/{self.public_url.access_token}', allow_redirects=False)
@@ -484,6 +499,7 @@ class TestDocumentsControllers(HttpCaseWithUserDemo):
         self.assertIn("This document has been requested.", res.text)
 
     def test_doc_ctrl_thumbnail(self):
+        self.env['documents.document']._cron_generate_thumbnails()
         placeholder = self.env['ir.binary']._placeholder(
             self.internal_file._get_placeholder_filename('thumbnail'))
 
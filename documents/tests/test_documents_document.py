@@ -4,6 +4,7 @@
 import base64
 from datetime import datetime, timedelta
 from unittest import skip
+from unittest.mock import patch
 
 from odoo import Command, http
 from odoo.exceptions import AccessError, UserError, ValidationError
@@ -471,6 +472,9 @@ class TestCaseDocuments(TransactionCaseDocuments):
                     'folder_id': self.folder_b.id,
                 })
                 self.assertEqual(pdf_document.thumbnail, False)
+                self.assertEqual(pdf_document.thumbnail_status, 'queued')
+                self.env['documents.document']._cron_generate_thumbnails()
+                self.assertEqual(pdf_document.thumbnail, False)
                 self.assertEqual(pdf_document.thumbnail_status, 'client_generated')
 
             word_document = self.env['documents.document'].create({
@@ -488,9 +492,60 @@ class TestCaseDocuments(TransactionCaseDocuments):
                     'datas': GIF,
                     'folder_id': self.folder_b.id,
                 })
+                self.assertEqual(image_document.thumbnail_status, 'queued')
+                self.env['documents.document']._cron_generate_thumbnails()
                 self.assertEqual(image_document.thumbnail, GIF)
                 self.assertEqual(image_document.thumbnail_status, 'present')
 
+    def test_document_thumbnail_deduplication(self):
+        pdf_document, image_document = self.env['documents.document'].create([{
+            'name': 'Test PDF doc',
+            'mimetype': 'application/pdf',
+            'datas': "JVBERi0gRmFrZSBQREYgY29udGVudA==",
+            'folder_id': self.folder_b.id,
+        }, {
+            'name': 'Test image doc',
+            'mimetype': 'image/gif',
+            'datas': GIF,
+            'folder_id': self.folder_b.id,
+        }])
+        self.env['documents.document']._cron_generate_thumbnails()
+        # the browser posts the thumbnail of the pdf
+        pdf_document.write({'thumbnail': GIF, 'thumbnail_status': 'present'})
+
+        pdf_copy, image_copy = self.env['documents.document'].create([{
+            'name': 'Test PDF doc copy',
+            'mimetype': 'application/pdf',
+            'datas': "JVBERi0gRmFrZSBQREYgY29udGVudA==",
+            'folder_id': self.folder_b.id,
+        }, {
+            'name': 'Test image doc copy',
+            'mimetype': 'image/gif',
+            'datas': GIF,
+            'folder_id': self.folder_b.id,
+        }])
+        self.assertEqual((pdf_copy | image_copy).mapped('thumbnail_status'), ['queued', 'queued'])
+        with patch('odoo.addons.documents.models.documents_document.image_process') as image_process:
+            self.env['documents.document']._cron_generate_thumbnails()
+        image_process.assert_not_called()
+        self.assertEqual((pdf_copy | image_copy).mapped('thumbnail_status'), ['present', 'present'])
+        self.assertEqual(pdf_copy.thumbnail, pdf_document.thumbnail)
+        self.assertEqual(image_copy.thumbnail, image_document.thumbnail)
+
+    def test_document_thumbnail_shortcut(self):
+        image_document = self.env['documents.document'].create({
+            'name': 'Test image doc',
+            'mimetype': 'image/gif',
+            'datas': GIF,
+            'folder_id': self.folder_b.id,
+        })
+        shortcut = image_document.action_create_shortcut()
+        self.assertEqual(shortcut.thumbnail_status, 'queued')
+        # only the target is queued, the shortcut gets its thumbnail
+        self.env['documents.document']._cron_generate_thumbnails(batch_size=1)
+        self.assertEqual((image_document | shortcut).mapped('thumbnail_status'), ['present', 'present'])
+        self.assertEqual(shortcut.thumbnail, GIF)
+
     def test_document_max_upload_limit(self):
         Doc = self.env['documents.document']
         ICP = self.env['ir.config_parameter']
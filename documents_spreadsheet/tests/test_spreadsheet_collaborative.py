@@ -369,6 +369,28 @@ class SpreadsheetORMAccess(SpreadsheetTestCommon):
                 "It should have requested a snapshot",
             )
 
+    def test_join_snapshot_request_revisions_threshold(self):
+        self.env["ir.config_parameter"].set_param("spreadsheet_edition.snapshot_revisions_threshold", 3)
+        self.env["ir.config_parameter"].set_param("spreadsheet_edition.snapshot_revisions_min_age_minutes", 10)
+        with self._freeze_time("2020-02-02 18:00"):
+            for _i in range(2):
+                self.spreadsheet.dispatch_spreadsheet_message(
+                    self.new_revision_data(self.spreadsheet)
+                )
+        with self._freeze_time("2020-02-02 18:15"):
+            self.assertFalse(self.spreadsheet._should_be_snapshotted(), "Too few revisions to be snapshotted")
+            self.spreadsheet.dispatch_spreadsheet_message(
+                self.new_revision_data(self.spreadsheet)
+            )
+        with self._freeze_time("2020-02-02 18:20"):
+            self.assertFalse(self.spreadsheet._should_be_snapshotted(), "Too few revisions older than 10 minutes")
+            self.spreadsheet.dispatch_spreadsheet_message(
+                self.new_revision_data(self.spreadsheet)
+            )
+        with self._freeze_time("2020-02-02 18:28"):
+            # The spreadsheet is still being modified, but enough revisions are older than 10 minutes
+            self.assertTrue(self.spreadsheet._should_be_snapshotted())
+
     def test_snapshot_user(self):
         with self.assertRaises(AccessError):
             self.snapshot(
@@ -2,9 +2,91 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
 import math
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import timedelta
 
 from odoo import fields, models, api
 from odoo.osv import expression
+from odoo.addons.resource.models.utils import make_aware
+
+
+class WorkingTimeline:
+    """ Working intervals (leaves deducted) of a calendar, computed once over a horizon
+    to plan the deadlines of many SLA status without querying the calendar each time.
+
+    The planning methods give the same results as the ones of ``resource.calendar``
+    with ``compute_leaves=True``: they read the intervals by windows of 14 days starting
+    from the given datetime, like the calendar does. Outside of the horizon, they fall
+    back on the calendar methods.
+    """
+    WINDOW = timedelta(days=14)
+
+    def __init__(self, calendar, start_dt=None, end_dt=None):
+        self.calendar = calendar
+        self.start_dt = start_dt and make_aware(start_dt)[0]
+        self.end_dt = end_dt and make_aware(end_dt)[0]
+        self.starts = []
+        self.stops = []
+        if self.start_dt and self.end_dt and not calendar.flexible_hours:
+            for start, stop, _meta in calendar._work_intervals_batch(self.start_dt, self.end_dt)[False]:
+                self.starts.append(start)
+                self.stops.append(stop)
+
+    def _covers(self, start_dt, end_dt):
+        return (
+            bool(self.start_dt and self.end_dt) and not self.calendar.flexible_hours
+            and self.start_dt <= start_dt and end_dt <= self.end_dt
+        )
+
+    def _intervals(self, start_dt, end_dt):
+        """ Yield the working intervals between both aware datetimes, cut at the bounds. """
+        index = bisect_right(self.stops, start_dt)
+        while index < len(self.starts) and self.starts[index] < end_dt:
+            yield max(self.starts[index], start_dt), min(self.stops[index], end_dt)
+            index += 1
+
+    def plan_days(self, days, day_dt):
+        aware_dt, revert = make_aware(day_dt)
+        if days > 0:
+            found = set()
+            for n in range(100):
+                dt = aware_dt + self.WINDOW * n
+                if not self._covers(dt, dt + self.WINDOW):
+                    return self.calendar.plan_days(days, day_dt, compute_leaves=True)
+                for start, stop in self._intervals(dt, dt + self.WINDOW):
+                    found.add(start.date())
+                    if len(found) == days:
+                        return revert(stop)
+            return False
+        return self.calendar.plan_days(days, day_dt, compute_leaves=True)
+
+    def plan_hours(self, hours, day_dt):
+        aware_dt, revert = make_aware(day_dt)
+        if hours >= 0:
+            remaining_hours = hours
+            for n in range(100):
+                dt = aware_dt + self.WINDOW * n
+                if not self._covers(dt, dt + self.WINDOW):
+                    return self.calendar.plan_hours(hours, day_dt, compute_leaves=True)
+                for start, stop in self._intervals(dt, dt + self.WINDOW):
+                    interval_hours = (stop - start).total_seconds() / 3600
+                    if remaining_hours <= interval_hours:
+                        return revert(start + timedelta(hours=remaining_hours))
+                    remaining_hours -= interval_hours
+            return False
+        return self.calendar.plan_hours(hours, day_dt, compute_leaves=True)
+
+    def get_work_hours_count(self, start_dt, end_dt):
+        aware_start_dt, _revert = make_aware(start_dt)
+        aware_end_dt, _revert = make_aware(end_dt)
+        if not self._covers(aware_start_dt, aware_end_dt):
+            return self.calendar.get_work_hours_count(start_dt, end_dt, compute_leaves=True)
+        return sum(
+            (stop - start).total_seconds() / 3600
+            for start, stop in self._intervals(aware_start_dt, aware_end_dt)
+        )
+
 
 class HelpdeskSLAStatus(models.Model):
     _name = 'helpdesk.sla.status'
@@ -24,14 +106,14 @@ class HelpdeskSLAStatus(models.Model):
 
     @api.depends('ticket_id.create_date', 'sla_id', 'ticket_id.stage_id')
     def _compute_deadline(self):
+        status_ids_by_calendar = defaultdict(list)
         for status in self:
             if (status.deadline and status.reached_datetime) or (status.deadline and not status.sla_id.exclude_stage_ids) or (status.status == 'failed'):
                 continue
-            deadline = status.ticket_id.create_date
             working_calendar = status.ticket_id.team_id.resource_calendar_id
             if not working_calendar:
                 # Normally, having a working_calendar is mandatory
-                status.deadline = deadline
+                status.deadline = status.ticket_id.create_date
                 continue
 
             if status.sla_id.exclude_stage_ids:
@@ -39,29 +121,55 @@ class HelpdeskSLAStatus(models.Model):
                     # We are in the freezed time stage: No deadline
                     status.deadline = False
                     continue
+            status_ids_by_calendar[working_calendar].append(status.id)
 
+        if not status_ids_by_calendar:
+            return
+        statuses_to_plan = self.browse([status_id for status_ids in status_ids_by_calendar.values() for status_id in status_ids])
+        tracking_lines_per_ticket = statuses_to_plan.filtered(lambda s: s.sla_id.exclude_stage_ids)._get_stage_tracking_lines_per_ticket()
+        now = fields.Datetime.now()
+        for working_calendar, status_ids in status_ids_by_calendar.items():
+            statuses = self.browse(status_ids)
+            # The working intervals are computed once for all the statuses of the calendar, from the
+            # creation of the oldest ticket to a horizon large enough for most of the deadlines.
             avg_hour = working_calendar.hours_per_day or 8  # default to 8 working hours/day
-            time_days = math.floor(status.sla_id.time / avg_hour)
-            if time_days > 0:
-                deadline = working_calendar.plan_days(time_days + 1, deadline, compute_leaves=True)
-                # We should also depend on ticket creation time, otherwise for 1 day SLA, all tickets
-                # created on monday will have their deadline filled with tuesday 8:00
-                create_dt = working_calendar.plan_hours(0, status.ticket_id.create_date)
-                deadline = deadline and deadline.replace(hour=create_dt.hour, minute=create_dt.minute, second=create_dt.second, microsecond=create_dt.microsecond)
+            create_dates = statuses.ticket_id.mapped('create_date')
+            max_days = max(math.floor(sla_time / avg_hour) for sla_time in statuses.sla_id.mapped('time'))
+            timeline = WorkingTimeline(
+                working_calendar,
+                min(create_dates),
+                max(max(create_dates), now) + timedelta(days=2 * max_days + 28),
+            )
+            for status in statuses:
+                status.deadline = status._plan_deadline(timeline, tracking_lines_per_ticket)
 
-            sla_hours = status.sla_id.time % avg_hour
+    def _plan_deadline(self, timeline, tracking_lines_per_ticket=None):
+        """ Compute the deadline of the SLA status, from the working time of the given timeline. """
+        self.ensure_one()
+        working_calendar = timeline.calendar
+        deadline = self.ticket_id.create_date
+        avg_hour = working_calendar.hours_per_day or 8  # default to 8 working hours/day
+        time_days = math.floor(self.sla_id.time / avg_hour)
+        if time_days > 0:
+            deadline = timeline.plan_days(time_days + 1, deadline)
+            # We should also depend on ticket creation time, otherwise for 1 day SLA, all tickets
+            # created on monday will have their deadline filled with tuesday 8:00
+            create_dt = timeline.plan_hours(0, self.ticket_id.create_date)
+            deadline = deadline and deadline.replace(hour=create_dt.hour, minute=create_dt.minute, second=create_dt.second, microsecond=create_dt.microsecond)
 
-            if status.sla_id.exclude_stage_ids:
-                sla_hours += status._get_freezed_hours(working_calendar)
+        sla_hours = self.sla_id.time % avg_hour
 
-            # Except if ticket creation time is later than the end time of the working day
-            deadline_for_working_cal = working_calendar.plan_hours(0, deadline)
-            if deadline_for_working_cal and deadline.day < deadline_for_working_cal.day and time_days > 0:
-                deadline = deadline.replace(hour=0, minute=0, second=0, microsecond=0)
-            # We should execute the function plan_hours in any case because, in a 1 day SLA environment,
-            # if I create a ticket knowing that I'm not working the day after at the same time, ticket
-            # deadline will be set at time I don't work (ticket creation time might not be in working calendar).
-            status.deadline = deadline and working_calendar.plan_hours(sla_hours, deadline, compute_leaves=True)
+        if self.sla_id.exclude_stage_ids:
+            sla_hours += self._get_freezed_hours(working_calendar, timeline=timeline, tracking_lines_per_ticket=tracking_lines_per_ticket)
+
+        # Except if ticket creation time is later than the end time of the working day
+        deadline_for_working_cal = timeline.plan_hours(0, deadline)
+        if deadline_for_working_cal and deadline.day < deadline_for_working_cal.day and time_days > 0:
+            deadline = deadline.replace(hour=0, minute=0, second=0, microsecond=0)
+        # We should execute the function plan_hours in any case because, in a 1 day SLA environment,
+        # if I create a ticket knowing that I'm not working the day after at the same time, ticket
+        # deadline will be set at time I don't work (ticket creation time might not be in working calendar).
+        return deadline and timeline.plan_hours(sla_hours, deadline)
 
     @api.depends('deadline', 'reached_datetime')
     def _compute_status(self):
@@ -120,13 +228,38 @@ class HelpdeskSLAStatus(models.Model):
             else:
                 status.exceeded_hours = False
 
-    def _get_freezed_hours(self, working_calendar):
+    def _get_stage_tracking_lines_per_ticket(self):
+        """ Fetch the stage changes of the tickets of the SLA status in a single query.
+            :returns a map with the tracking values of the stage of each ticket, sorted by date
+            :rtype : dict {<helpdesk.ticket id>: <mail.tracking.value>}
+        """
+        tickets = self.ticket_id._origin
+        if not tickets:
+            return {}
+        field_stage = self.env['ir.model.fields']._get(tickets._name, "stage_id")
+        tracking_values = self.env['mail.tracking.value'].search([
+            ('field_id', '=', field_stage.id),
+            ('mail_message_id.model', '=', tickets._name),
+            ('mail_message_id.res_id', 'in', tickets.ids),
+        ])
+        tracking_value_ids_per_ticket = defaultdict(list)
+        for tracking_value in tracking_values.sorted(key=lambda tv: (tv.create_date, tv.id)):
+            tracking_value_ids_per_ticket[tracking_value.mail_message_id.res_id].append(tracking_value.id)
+        return {
+            ticket_id: self.env['mail.tracking.value'].browse(tracking_value_ids)
+            for ticket_id, tracking_value_ids in tracking_value_ids_per_ticket.items()
+        }
+
+    def _get_freezed_hours(self, working_calendar, timeline=None, tracking_lines_per_ticket=None):
         self.ensure_one()
         hours_freezed = 0
 
-        field_stage = self.env['ir.model.fields']._get(self.ticket_id._name, "stage_id")
+        if timeline is None:
+            timeline = WorkingTimeline(working_calendar)
+        if tracking_lines_per_ticket is None:
+            tracking_lines_per_ticket = self._get_stage_tracking_lines_per_ticket()
         freeze_stages = self.sla_id.exclude_stage_ids.ids
-        tracking_lines = self.ticket_id.message_ids.tracking_value_ids.filtered(lambda tv: tv.field_id == field_stage).sorted(key="create_date")
+        tracking_lines = tracking_lines_per_ticket.get(self.ticket_id._origin.id)
 
         if not tracking_lines:
             return 0
@@ -135,9 +268,9 @@ class HelpdeskSLAStatus(models.Model):
         for tracking_line in tracking_lines:
             if tracking_line.old_value_integer in freeze_stages:
                 # We must use get_work_hours_count to compute real waiting hours (as the deadline computation is also based on calendar)
-                hours_freezed += working_calendar.get_work_hours_count(old_time, tracking_line.create_date)
+                hours_freezed += timeline.get_work_hours_count(old_time, tracking_line.create_date)
             old_time = tracking_line.create_date
         if tracking_lines[-1].new_value_integer in freeze_stages:
             # the last tracking line is not yet created
-            hours_freezed += working_calendar.get_work_hours_count(old_time, fields.Datetime.now())
+            hours_freezed += timeline.get_work_hours_count(old_time, fields.Datetime.now())
         return hours_freezed
@@ -636,8 +636,7 @@ class HelpdeskTicket(models.Model):
             :returns a map with the tickets linked to the SLA to apply on them
             :rtype : dict {<helpdesk.ticket>: <helpdesk.sla>}
         """
-        tickets_map = {}
-        sla_domain_map = {}
+        ticket_ids_map = {}
 
         def _generate_key(ticket):
             """ Return a tuple identifying the combinaison of field determining the SLA to apply on the ticket """
@@ -652,21 +651,33 @@ class HelpdeskTicket(models.Model):
 
         for ticket in self:
             if ticket.team_id.use_sla:  # limit to the team using SLA
-                key = _generate_key(ticket)
                 # group the ticket per key
-                tickets_map.setdefault(key, self.env['helpdesk.ticket'])
-                tickets_map[key] |= ticket
-                # group the SLA to apply, by key
-                if key not in sla_domain_map:
-                    sla_domain_map[key] = expression.AND([[
-                        ('team_id', '=', ticket.team_id.id), ('priority', '=', ticket.priority),
-                        ('stage_id.sequence', '>=', ticket.stage_id.sequence),
-                    ], expression.OR([ticket._sla_find_extra_domain(), self._sla_find_false_domain()])])
+                ticket_ids_map.setdefault(_generate_key(ticket), []).append(ticket.id)
+        if not ticket_ids_map:
+            return {}
+
+        # fetch the SLA of all the teams at once, then match them in memory with each ticket group;
+        # only the customer part of the domain is searched, once per distinct domain
+        team_slas = self.env['helpdesk.sla'].search([('team_id', 'in', self.team_id.filtered('use_sla').ids)])
+        slas_per_team = team_slas.grouped('team_id')
+        customer_sla_ids_map = {}
 
         result = {}
-        for key, tickets in tickets_map.items():  # only one search per ticket group
-            domain = sla_domain_map[key]
-            slas = self.env['helpdesk.sla'].search(domain)
+        for ticket_ids in ticket_ids_map.values():
+            tickets = self.browse(ticket_ids)
+            ticket = tickets[0]
+            slas = slas_per_team.get(ticket.team_id, self.env['helpdesk.sla'])
+            customer_domain = expression.OR([ticket._sla_find_extra_domain(), self._sla_find_false_domain()])
+            customer_key = (ticket.team_id, str(customer_domain))
+            if customer_key not in customer_sla_ids_map:
+                customer_sla_ids_map[customer_key] = set(
+                    self.env['helpdesk.sla'].search(expression.AND([[('id', 'in', slas.ids)], customer_domain])).ids
+                ) if slas else set()
+            customer_sla_ids = customer_sla_ids_map[customer_key]
+            slas = slas.filtered(
+                lambda s: s.id in customer_sla_ids and s.priority == ticket.priority
+                and s.stage_id and s.stage_id.sequence >= ticket.stage_id.sequence
+            )
             result[tickets] = slas.filtered(lambda s: not s.tag_ids or (tickets.tag_ids & s.tag_ids))  # SLA to apply on ticket subset
         return result
 
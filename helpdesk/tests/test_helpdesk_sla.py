@@ -8,6 +8,7 @@ from freezegun import freeze_time
 
 from odoo import fields, Command
 from odoo.tests.common import TransactionCase
+from odoo.addons.helpdesk.models.helpdesk_sla_status import WorkingTimeline
 
 NOW = datetime(2018, 10, 10, 9, 18)
 NOW2 = datetime(2019, 1, 8, 9, 0)
@@ -251,6 +252,47 @@ class HelpdeskSLA(TransactionCase):
             ticket = self.create_ticket(team=self.test_team_reached, user_id=self.env.user.id)
             self.assertEqual(ticket.sla_deadline, fields.Datetime.now() + relativedelta(days=1, hour=11), "Day0:8h + 11h = Day0:8h + 1day:3h = Day1:8h + 3h = Day1:11h")
 
+    def test_deadlines_working_timeline(self):
+        """ The working timeline used to plan the deadlines in batch must give the same
+        results as the planning methods of the calendar. """
+        calendar = self.test_team_reached.resource_calendar_id
+        self.env['resource.calendar.leaves'].create({
+            'name': 'Holiday',
+            'calendar_id': calendar.id,
+            'date_from': datetime(2019, 1, 10, 0, 0),
+            'date_to': datetime(2019, 1, 11, 23, 59),
+        })
+        timeline = WorkingTimeline(calendar, NOW2, NOW2 + relativedelta(days=60))
+        for dt in [NOW2, NOW2 + relativedelta(hour=20), NOW2 + relativedelta(days=4, hour=3, minute=27)]:
+            for days in [1, 2, 5]:
+                self.assertEqual(timeline.plan_days(days, dt), calendar.plan_days(days, dt, compute_leaves=True))
+            for hours in [0, 2.5, 11, 40]:
+                self.assertEqual(timeline.plan_hours(hours, dt), calendar.plan_hours(hours, dt, compute_leaves=True))
+            self.assertEqual(
+                timeline.get_work_hours_count(dt, dt + relativedelta(days=9)),
+                calendar.get_work_hours_count(dt, dt + relativedelta(days=9), compute_leaves=True),
+            )
+        # outside of the horizon, the calendar is used
+        self.assertEqual(
+            timeline.plan_days(40, NOW2 + relativedelta(days=30)),
+            calendar.plan_days(40, NOW2 + relativedelta(days=30), compute_leaves=True),
+        )
+
+    def test_deadlines_batch(self):
+        with self._ticket_patch_now(NOW2):
+            tickets = self.env['helpdesk.ticket'].create([{
+                'name': 'Help me %s' % i,
+                'team_id': self.test_team_reached.id,
+                'tag_ids': [Command.link(self.tag_freeze.id)],
+                'stage_id': self.stage_new.id,
+                'priority': '1',
+                'create_date': NOW2 - relativedelta(hours=5 * i),
+            } for i in range(10)])
+            self.assertEqual(tickets.sla_status_ids.sla_id, self.sla | self.sla_2)
+            for status in tickets.sla_status_ids:
+                calendar = status.ticket_id.team_id.resource_calendar_id
+                self.assertEqual(status.deadline, status._plan_deadline(WorkingTimeline(calendar)))
+
     def test_teams_success_rate(self):
         # Create 6 tickets, 3 on-time according to SLA, 3 late.
         with self._ticket_patch_now(NOW):
@@ -9,6 +9,7 @@ from collections import defaultdict, Counter
 from datetime import date, datetime, time
 from dateutil.relativedelta import relativedelta
 from functools import reduce
+from time import perf_counter
 
 from odoo import api, Command, fields, models, _
 from odoo.exceptions import UserError, ValidationError
@@ -127,6 +128,7 @@ class HrPayslip(models.Model):
     is_superuser = fields.Boolean(compute="_compute_is_superuser")
     edited = fields.Boolean()
     queued_for_pdf = fields.Boolean(default=False)
+    queued_for_compute = fields.Boolean(default=False, copy=False)
 
     salary_attachment_ids = fields.Many2many(
         'hr.salary.attachment',
@@ -470,6 +472,8 @@ class HrPayslip(models.Model):
             raise ValidationError(_('You cannot validate a payslip on which the contract is cancelled'))
         if any(slip.state == 'cancel' for slip in self):
             raise ValidationError(_("You can't validate a cancelled payslip."))
+        if any(slip.queued_for_compute for slip in self):
+            raise ValidationError(_("You can't validate a payslip that is still being computed."))
         self.write({'state' : 'done'})
 
         line_values = self._get_line_values(['NET'])
@@ -596,6 +600,57 @@ class HrPayslip(models.Model):
             self._compute_worked_days_ytd()
         return True
 
+    @api.model
+    def _get_compute_sheet_async_threshold(self):
+        """ Number of payslips above which a batch is computed in the background, see '_queue_compute_sheet'. """
+        return int(self.env['ir.config_parameter'].sudo().get_param('hr_payroll.compute_sheet_async_threshold', 500))
+
+    def _queue_compute_sheet(self):
+        """ Compute the payslips in the background, by chunks committed separately, see '_cron_compute_sheet'. """
+        self.write({'queued_for_compute': True})
+        self.env.ref('hr_payroll.ir_cron_compute_payslips')._trigger()
+
+    def _compute_sheet_isolated(self):
+        """ Compute the payslips, isolating the failures so that a failing payslip doesn't prevent the others from
+        being computed. The payslips that can't be computed are left as they are and the error is posted on them.
+
+        :return: the payslips that could not be computed
+        """
+        if len(self) > 1:
+            try:
+                with self.env.cr.savepoint():
+                    self.compute_sheet()
+                return self.browse()
+            except Exception:
+                # Compute the payslips one by one to find the failing ones
+                pass
+        failed_payslips = self.browse()
+        for payslip in self:
+            try:
+                with self.env.cr.savepoint():
+                    payslip.compute_sheet()
+            except Exception as e:
+                _logger.warning("Payslip %s could not be computed", payslip.id, exc_info=True)
+                failed_payslips |= payslip
+                payslip.message_post(body=_("The payslip could not be computed: %s", e))
+        return failed_payslips
+
+    @api.model
+    def _cron_compute_sheet(self, batch_size=100):
+        domain = [('queued_for_compute', '=', True)]
+        payslips = self.search(domain, order='payslip_run_id, id', limit=batch_size)
+        failed_payslips = self.browse()
+        for company in payslips.company_id:
+            company_payslips = payslips.filtered(lambda p: p.company_id == company).with_company(company)
+            failed_payslips |= company_payslips._compute_sheet_isolated()
+        payslips.write({'queued_for_compute': False})
+        for payslip_run in failed_payslips.payslip_run_id:
+            run_failed_payslips = failed_payslips.filtered(lambda p: p.payslip_run_id == payslip_run)
+            payslip_run.message_post(body=_(
+                "The following payslips could not be computed: %s",
+                ", ".join(run_failed_payslips.mapped('name'))))
+        self.env['ir.cron']._notify_progress(done=len(payslips), remaining=self.search_count(domain))
+
     def action_refresh_from_work_entries(self):
         # Refresh the whole payslip in case the HR has modified some work entries
         # after the payslip generation
@@ -716,6 +771,9 @@ class HrPayslip(models.Model):
     def _sum(self, code, from_date, to_date=None):
         if to_date is None:
             to_date = fields.Date.today()
+        totals = self._get_history_totals('lines', code, from_date, to_date)
+        if totals is not None:
+            return sum(totals) or 0.0
         self.env.cr.execute("""
             SELECT sum(pl.total)
             FROM hr_payslip as hp, hr_payslip_line as pl
@@ -732,6 +790,9 @@ class HrPayslip(models.Model):
         self.ensure_one()
         if to_date is None:
             to_date = fields.Date.today()
+        totals = self._get_history_totals('categories', code, from_date, to_date)
+        if totals is not None:
+            return sum(totals) or 0.0
 
         self.env['hr.payslip'].flush_model(['employee_id', 'state', 'date_from', 'date_to'])
         self.env['hr.payslip.line'].flush_model(['total', 'slip_id', 'salary_rule_id'])
@@ -759,6 +820,9 @@ class HrPayslip(models.Model):
         self.ensure_one()
         if to_date is None:
             to_date = fields.Date.today()
+        totals = self._get_history_totals('worked_days', code, from_date, to_date)
+        if totals is not None:
+            return sum(totals) if totals else None
 
         query = """
             SELECT sum(hwd.amount)
@@ -779,6 +843,93 @@ class HrPayslip(models.Model):
         res = self.env.cr.fetchone()
         return res[0] if res else 0.0
 
+    def _get_payslip_history(self):
+        """ Prepare the history of the validated payslips of the employees, so that the '_sum', '_sum_category' and
+        '_sum_worked_days' helpers called by the salary rules don't run a query on each call. The totals of a code are
+        only loaded on the first call for this code, for all the employees at once, see '_get_history_totals'.
+        The payslips starting from the beginning of the year preceding the first payslip are loaded.
+
+        :return: {
+            'date_from': date,
+            'employee_ids': set of ids,
+            'lines' | 'categories' | 'worked_days': {code: {employee_id: [(date_from, date_to, total)]}},
+        }
+        """
+        return {
+            'date_from': date_utils.start_of(min(self.mapped('date_from')) - relativedelta(years=1), 'year'),
+            'employee_ids': set(self.employee_id.ids),
+            'lines': {},
+            'categories': {},
+            'worked_days': {},
+        }
+
+    def _load_payslip_history(self, history, key, code):
+        """ Load the totals by payslip of the given code for all the employees of the history. """
+        if key == 'lines':
+            self.env['hr.payslip.line'].flush_model(['code', 'total', 'slip_id'])
+            query = """
+                SELECT hp.employee_id, hp.date_from, hp.date_to, sum(pl.total)
+                FROM hr_payslip hp
+                JOIN hr_payslip_line pl ON pl.slip_id = hp.id
+                WHERE %(where)s
+                AND pl.code = %%s
+                GROUP BY hp.id"""
+        elif key == 'categories':
+            self.env['hr.payslip.line'].flush_model(['total', 'slip_id', 'salary_rule_id'])
+            self.env['hr.salary.rule'].flush_model(['category_id'])
+            self.env['hr.salary.rule.category'].flush_model(['code'])
+            query = """
+                SELECT hp.employee_id, hp.date_from, hp.date_to, sum(pl.total)
+                FROM hr_payslip hp
+                JOIN hr_payslip_line pl ON pl.slip_id = hp.id
+                JOIN hr_salary_rule sr ON sr.id = pl.salary_rule_id
+                JOIN hr_salary_rule_category rc ON rc.id = sr.category_id
+                WHERE %(where)s
+                AND rc.code = %%s
+                GROUP BY hp.id"""
+        else:
+            self.env['hr.payslip.worked_days'].flush_model(['amount', 'payslip_id', 'work_entry_type_id'])
+            self.env['hr.work.entry.type'].flush_model(['code'])
+            query = """
+                SELECT hp.employee_id, hp.date_from, hp.date_to, sum(hwd.amount)
+                FROM hr_payslip hp
+                JOIN hr_payslip_worked_days hwd ON hwd.payslip_id = hp.id
+                JOIN hr_work_entry_type hwet ON hwet.id = hwd.work_entry_type_id
+                WHERE %(where)s
+                AND hwet.code = %%s
+                GROUP BY hp.id"""
+        self.env['hr.payslip'].flush_model(['employee_id', 'state', 'date_from', 'date_to'])
+        where = """
+            hp.employee_id IN %s
+            AND hp.state in ('done', 'paid')
+            AND hp.date_from >= %s"""
+        self.env.cr.execute(query % {'where': where}, (tuple(history['employee_ids']), history['date_from'], code))
+        totals = history[key][code] = defaultdict(list)
+        for employee_id, slip_date_from, slip_date_to, total in self.env.cr.fetchall():
+            totals[employee_id].append((slip_date_from, slip_date_to, total))
+        return totals
+
+    def _get_history_totals(self, key, code, from_date, to_date):
+        """ Get the totals of the validated payslips of the employee within the given dates from the history prepared
+        by '_get_payslip_history', or None if the history doesn't cover the employee or the dates. """
+        history = self.env.cr.cache.get('hr_payslip_history')
+        if not history or self.employee_id.id not in history['employee_ids']:
+            return None
+        # The dates are compared as dates, leave the datetimes to the database
+        if isinstance(from_date, datetime) or isinstance(to_date, datetime):
+            return None
+        from_date, to_date = fields.Date.to_date(from_date), fields.Date.to_date(to_date)
+        if from_date < history['date_from']:
+            return None
+        totals = history[key].get(code)
+        if totals is None:
+            totals = self._load_payslip_history(history, key, code)
+        return [
+            total
+            for slip_date_from, slip_date_to, total in totals[self.employee_id.id]
+            if total is not None and slip_date_from >= from_date and slip_date_to <= to_date
+        ]
+
     def _get_base_local_dict(self):
         return {
             'float_round': float_round,
@@ -886,6 +1037,16 @@ class HrPayslip(models.Model):
         return last_ytd_payslips
 
     def _get_payslip_lines(self):
+        if not self:
+            return []
+        # The history used by the rule helpers is loaded once for the whole batch, on the first use of each code
+        self.env.cr.cache['hr_payslip_history'] = self._get_payslip_history()
+        try:
+            return self._get_payslip_lines_from_rules()
+        finally:
+            self.env.cr.cache.pop('hr_payslip_history', None)
+
+    def _get_payslip_lines_from_rules(self):
         line_vals = []
 
         if any(self.mapped('ytd_computation')):
@@ -901,6 +1062,8 @@ class HrPayslip(models.Model):
 
         line_values = ytd_payslips._get_line_values(code_set, ['ytd'])
 
+        # Evaluation time of the rules, by structure, to report the slow ones
+        rule_durations = defaultdict(lambda: defaultdict(float))
         for payslip in self:
             if not payslip.contract_id:
                 raise UserError(_("There's no contract set on payslip %(payslip)s for %(employee)s. Check that there is at least a contract set on the employee form.", payslip=payslip.name, employee=payslip.employee_id.name))
@@ -918,6 +1081,7 @@ class HrPayslip(models.Model):
             for rule in sorted(payslip.struct_id.rule_ids, key=lambda x: x.sequence):
                 if rule.id in blacklisted_rule_ids:
                     continue
+                rule_start = perf_counter()
                 localdict.update({
                     'result': None,
                     'result_qty': 1.0,
@@ -986,9 +1150,22 @@ class HrPayslip(models.Model):
                             'ytd': line_values[rule.code][last_ytd_payslips[payslip].id]
                                 ['ytd'] + tot_rule,
                         }
+                rule_durations[payslip.struct_id][rule] += perf_counter() - rule_start
             line_vals += list(result.values())
+        self._log_rule_durations(rule_durations)
         return line_vals
 
+    def _log_rule_durations(self, rule_durations, limit=5):
+        if not _logger.isEnabledFor(logging.DEBUG):
+            return
+        for struct, durations in rule_durations.items():
+            slowest_rules = sorted(durations.items(), key=lambda item: item[1], reverse=True)[:limit]
+            _logger.debug(
+                "Salary rules of structure %s (id %s) evaluated in %.3fs on %s payslip(s), slowest rules: %s",
+                struct.name, struct.id, sum(durations.values()),
+                len(self.filtered(lambda p: p.struct_id == struct)),
+                ", ".join("%s (%.3fs)" % (rule.code, duration) for rule, duration in slowest_rules))
+
     def _compute_worked_days_ytd(self):
         last_ytd_payslips = self._get_last_ytd_payslips()
         ytd_payslips = reduce(
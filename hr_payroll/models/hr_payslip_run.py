@@ -25,6 +25,7 @@ class HrPayslipRun(models.Model):
     date_end = fields.Date(string='Date To', required=True,
         default=lambda self: fields.Date.to_string((datetime.now() + relativedelta(months=+1, day=1, days=-1)).date()))
     payslip_count = fields.Integer(compute='_compute_payslip_count')
+    payslip_to_compute_count = fields.Integer(compute='_compute_payslip_count')
     company_id = fields.Many2one('res.company', string='Company', readonly=True, required=True,
         default=lambda self: self.env.company)
     country_id = fields.Many2one(
@@ -43,6 +44,7 @@ class HrPayslipRun(models.Model):
     def _compute_payslip_count(self):
         for payslip_run in self:
             payslip_run.payslip_count = len(payslip_run.slip_ids)
+            payslip_run.payslip_to_compute_count = len(payslip_run.slip_ids.filtered('queued_for_compute'))
 
     @api.depends('slip_ids', 'state')
     def _compute_state_change(self):
@@ -1,9 +1,37 @@
 # -*- coding:utf-8 -*-
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
+from functools import lru_cache
+
+from psycopg2 import OperationalError
+from werkzeug.exceptions import HTTPException
+
 from odoo import api, fields, models, _
-from odoo.exceptions import UserError
-from odoo.tools.safe_eval import safe_eval
+from odoo.exceptions import RedirectWarning, UserError
+from odoo.tools.safe_eval import _BUILTINS, _SAFE_OPCODES, check_values, test_expr, unsafe_eval
+
+
+@lru_cache(maxsize=1024)
+def _compile_rule_code(source, mode):
+    # The code objects only depend on the source, they can be shared by all the rules, databases and threads
+    return test_expr(source, _SAFE_OPCODES, mode=mode)
+
+
+def safe_eval_rule_code(source, localdict, mode='eval', nocopy=False):
+    """ Same as ``safe_eval(source, localdict, mode=mode, nocopy=nocopy)``, but the code is only parsed, checked
+    and compiled once per source, instead of each time a rule is computed on a payslip. As ``safe_eval`` can't
+    evaluate code objects, its evaluation is reproduced here and must be kept in sync, see test_safe_eval_rule_code.
+    """
+    code = _compile_rule_code(source, mode)
+    globals_dict = localdict if nocopy else dict(localdict)
+    check_values(globals_dict)
+    globals_dict['__builtins__'] = dict(_BUILTINS)
+    try:
+        return unsafe_eval(code, globals_dict)
+    except (UserError, RedirectWarning, HTTPException, OperationalError, ZeroDivisionError):
+        raise
+    except Exception as e:
+        raise ValueError('%r while evaluating\n%r' % (e, source))
 
 
 class HrSalaryRule(models.Model):
@@ -126,13 +154,13 @@ result = contract.wage * 0.10''')
         localdict['localdict'] = localdict
         if self.amount_select == 'fix':
             try:
-                return self.amount_fix or 0.0, float(safe_eval(self.quantity, localdict)), 100.0
+                return self.amount_fix or 0.0, float(safe_eval_rule_code(self.quantity, localdict)), 100.0
             except Exception as e:
                 self._raise_error(localdict, _("Wrong quantity defined for:"), e)
         if self.amount_select == 'percentage':
             try:
-                return (float(safe_eval(self.amount_percentage_base, localdict)),
-                        float(safe_eval(self.quantity, localdict)),
+                return (float(safe_eval_rule_code(self.amount_percentage_base, localdict)),
+                        float(safe_eval_rule_code(self.quantity, localdict)),
                         self.amount_percentage or 0.0)
             except Exception as e:
                 self._raise_error(localdict, _("Wrong percentage base or quantity defined for:"), e)
@@ -142,7 +170,7 @@ result = contract.wage * 0.10''')
             return localdict['inputs'][self.amount_other_input_id.code].amount, 1.0, 100.0
         # python code
         try:
-            safe_eval(self.amount_python_compute or 0.0, localdict, mode='exec', nocopy=True)
+            safe_eval_rule_code(self.amount_python_compute or '0.0', localdict, mode='exec', nocopy=True)
             return float(localdict['result']), localdict.get('result_qty', 1.0), localdict.get('result_rate', 100.0)
         except Exception as e:
             self._raise_error(localdict, _("Wrong python code defined for:"), e)
@@ -154,7 +182,7 @@ result = contract.wage * 0.10''')
             return True
         if self.condition_select == 'range':
             try:
-                result = safe_eval(self.condition_range, localdict)
+                result = safe_eval_rule_code(self.condition_range, localdict)
                 return self.condition_range_min <= result <= self.condition_range_max
             except Exception as e:
                 self._raise_error(localdict, _("Wrong range condition defined for:"), e)
@@ -162,7 +190,7 @@ result = contract.wage * 0.10''')
             return self.condition_other_input_id.code in localdict['inputs']
         # python code
         try:
-            safe_eval(self.condition_python, localdict, mode='exec', nocopy=True)
+            safe_eval_rule_code(self.condition_python, localdict, mode='exec', nocopy=True)
             return localdict.get('result', False)
         except Exception as e:
             self._raise_error(localdict, _("Wrong python condition defined for:"), e)
@@ -4,8 +4,11 @@
 from dateutil.rrule import rrule, DAILY
 from datetime import datetime, date, timedelta
 from dateutil.relativedelta import relativedelta
+from odoo.exceptions import UserError, ValidationError
 from odoo.fields import Date
 from odoo.tests import Form, tagged
+from odoo.tools.safe_eval import safe_eval
+from odoo.addons.hr_payroll.models.hr_salary_rule import safe_eval_rule_code
 from odoo.addons.hr_payroll.tests.common import TestPayslipContractBase
 
 
@@ -422,3 +425,125 @@ class TestPayslipComputation(TestPayslipContractBase):
             'date_to': date(2016, 1, 31)
         })
         payslip.compute_sheet()
+
+    def test_rule_code_change_recompiled(self):
+        # The compiled code of the rules is cached, writing the code must be taken into account
+        net_rule = self.developer_pay_structure.rule_ids.filtered(lambda r: r.code == "NET")
+        self.richard_payslip.compute_sheet()
+        net = self.richard_payslip.line_ids.filtered(lambda l: l.code == 'NET').total
+
+        net_rule.amount_python_compute = "result = categories['BASIC'] + categories['ALW'] + categories['DED'] + 10"
+        self.richard_payslip.compute_sheet()
+        self.assertAlmostEqual(self.richard_payslip.line_ids.filtered(lambda l: l.code == 'NET').total, net + 10, places=2)
+
+        net_rule.amount_python_compute = "result = 1 / 0"
+        with self.assertRaises(UserError):
+            self.richard_payslip.compute_sheet()
+
+    def test_safe_eval_rule_code(self):
+        # The rules evaluate their code like safe_eval, but with the compiled code cached
+        def evaluate(eval_function, source, mode, nocopy):
+            localdict = {'amount': 10.0, 'categories': {'BASIC': 100.0}, 'result': None}
+            try:
+                return eval_function(source, localdict, mode=mode, nocopy=nocopy), localdict
+            except Exception as e:
+                return type(e), localdict
+
+        for source, mode in [
+            ("amount * 2", 'eval'),
+            ("categories['BASIC'] + amount", 'eval'),
+            ("result = categories['BASIC'] * 0.1", 'exec'),
+            ("result_qty = 2\nresult = max(amount, 5)", 'exec'),
+            ("unknown_name", 'eval'),
+            ("amount / 0", 'eval'),
+            ("result = amount.__class__", 'exec'),
+            ("import os", 'exec'),
+            ("result =", 'exec'),
+        ]:
+            for nocopy in (False, True):
+                for _i in range(2):  # the second evaluation uses the cached code
+                    expected, expected_localdict = evaluate(safe_eval, source, mode, nocopy)
+                    result, result_localdict = evaluate(safe_eval_rule_code, source, mode, nocopy)
+                    self.assertEqual(result, expected, "Different result for %r" % source)
+                    expected_localdict.pop('__builtins__', None)
+                    result_localdict.pop('__builtins__', None)
+                    self.assertEqual(result_localdict, expected_localdict, "Different evaluation context for %r" % source)
+
+    def test_sum_helpers_history(self):
+        self.richard_payslip.compute_sheet()
+        self.richard_payslip.action_payslip_done()
+        payslip = self.env['hr.payslip'].create({
+            'name': 'Payslip of Richard',
+            'employee_id': self.richard_emp.id,
+            'contract_id': self.contract_cdi.id,
+            'struct_id': self.developer_pay_structure.id,
+            'date_from': date(2016, 2, 1),
+            'date_to': date(2016, 2, 29)
+        })
+
+        def get_sums():
+            return [
+                payslip._sum('NET', date(2016, 1, 1), date(2016, 12, 31)),
+                payslip._sum('NET', date(2016, 2, 1), date(2016, 12, 31)),
+                payslip._sum_category('ALW', date(2016, 1, 1), date(2016, 12, 31)),
+                payslip._sum_category('ALW', date(2016, 1, 1), date(2016, 1, 30)),
+                payslip._sum_worked_days('WORK100', date(2016, 1, 1), date(2016, 12, 31)),
+                payslip._sum_worked_days('WORK100', date(2016, 3, 1), date(2016, 12, 31)),
+            ]
+
+        expected_sums = get_sums()
+        self.assertTrue(expected_sums[0])
+        with self.assertQueryCount(0):
+            self.env.cr.cache['hr_payslip_history'] = payslip._get_payslip_history()
+        try:
+            # 1 query per loaded code, for all the employees
+            with self.assertQueryCount(3):
+                self.assertEqual(get_sums(), expected_sums)
+            with self.assertQueryCount(0):
+                self.assertEqual(get_sums(), expected_sums)
+        finally:
+            self.env.cr.cache.pop('hr_payslip_history')
+
+    def test_cron_compute_sheet(self):
+        self.richard_payslip.compute_sheet()
+        expected_lines = {line.code: line.total for line in self.richard_payslip.line_ids}
+        self.richard_payslip.action_payslip_draft()
+        self.richard_payslip.line_ids.unlink()
+        payslip_without_contract = self.env['hr.payslip'].create({
+            'name': 'Payslip of Richard without contract',
+            'employee_id': self.richard_emp.id,
+            'struct_id': self.developer_pay_structure.id,
+            'date_from': date(2016, 1, 1),
+            'date_to': date(2016, 1, 31),
+        })
+        payslip_without_contract.contract_id = False
+        payslips = self.richard_payslip + payslip_without_contract
+        payslips._queue_compute_sheet()
+        with self.assertRaises(ValidationError):
+            self.richard_payslip.action_payslip_done()
+
+        self.env['hr.payslip']._cron_compute_sheet()
+        self.assertFalse(any(payslips.mapped('queued_for_compute')))
+        self.assertEqual({line.code: line.total for line in self.richard_payslip.line_ids}, expected_lines)
+        self.assertEqual(self.richard_payslip.state, 'verify')
+        self.assertFalse(payslip_without_contract.line_ids)
+        self.assertEqual(payslip_without_contract.state, 'draft')
+
+    def test_cron_compute_sheet_from_batch(self):
+        # Above the threshold, the payslips generated for a batch are only computed, and confirmed, by the cron
+        self.env['ir.config_parameter'].sudo().set_param('hr_payroll.compute_sheet_async_threshold', 0)
+        payslip_wizard = self.env['hr.payslip.employees'].create({'employee_ids': [(4, self.richard_emp.id)]})
+        batch_id = payslip_wizard.with_context({
+            'default_date_start': '2016-01-01',
+            'default_date_end': '2016-01-31',
+        }).compute_sheet()['res_id']
+        payslips = self.env['hr.payslip'].search([('payslip_run_id', '=', batch_id)])
+        self.assertTrue(payslips)
+        self.assertTrue(all(payslips.mapped('queued_for_compute')))
+        self.assertEqual(set(payslips.mapped('state')), {'draft'})
+        self.assertFalse(payslips.line_ids)
+
+        self.env['hr.payslip']._cron_compute_sheet()
+        self.assertFalse(any(payslips.mapped('queued_for_compute')))
+        self.assertEqual(set(payslips.mapped('state')), {'verify'})
+        self.assertTrue(payslips.line_ids)
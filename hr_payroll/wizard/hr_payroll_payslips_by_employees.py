@@ -177,8 +177,12 @@ class HrPayslipEmployees(models.TransientModel):
             payslips_vals.append(values)
         payslips = Payslip.with_context(tracking_disable=True).create(payslips_vals)
         payslips._compute_name()
-        payslips.compute_sheet()
-        payslip_run.slip_ids.write({'state': 'verify'})
-        payslip_run.state = 'verify'
+        if len(payslips) > Payslip._get_compute_sheet_async_threshold():
+            # The payslips are set to verify by 'compute_sheet', once the cron computed them
+            payslips._queue_compute_sheet()
+        else:
+            payslips.compute_sheet()
+            payslip_run.slip_ids.write({'state': 'verify'})
+            payslip_run.state = 'verify'
 
         return success_result
@@ -204,6 +204,25 @@ class Article(models.Model):
     def init(self):
         super().init()
 
+        # Closure table of the ancestors from which each article inherits its permissions,
+        # see '_update_permission_paths'.
+        self.env.cr.execute("""
+            SELECT 1 FROM information_schema.tables WHERE table_name = 'knowledge_article_permission_path';
+        """)
+        if not self.env.cr.rowcount:
+            self.env.cr.execute("""
+                CREATE TABLE knowledge_article_permission_path (
+                    article_id INTEGER NOT NULL REFERENCES knowledge_article(id) ON DELETE CASCADE,
+                    ancestor_id INTEGER NOT NULL REFERENCES knowledge_article(id) ON DELETE CASCADE,
+                    level INTEGER NOT NULL,
+                    PRIMARY KEY (article_id, ancestor_id)
+                );
+                CREATE INDEX knowledge_article_permission_path_ancestor_id_idx
+                    ON knowledge_article_permission_path (ancestor_id);
+            """)
+            self.env.cr.execute("SELECT id FROM knowledge_article")
+            self.browse([article_id for article_id, in self.env.cr.fetchall()])._insert_permission_paths()
+
         self.env.cr.execute("""
             SELECT 1 FROM pg_ts_config WHERE cfgname = 'knowledge_config';
         """)
@@ -1015,6 +1034,10 @@ class Article(models.Model):
 
         result = super(Article, self).write(vals)
 
+        # moving articles updates the permission paths through '_parent_store_update'
+        if 'is_desynchronized' in vals:
+            self._update_permission_paths()
+
         # resequence only if a sequence was not already computed based on current
         # parent maximum to avoid unnecessary recomputation of sequences
         if _resequence:
@@ -2297,9 +2320,80 @@ class Article(models.Model):
     # PERMISSIONS BATCH COMPUTATION
     # ------------------------------------------------------------
 
+    def _parent_store_create(self):
+        super()._parent_store_create()
+        self._update_permission_paths()
+
+    def _parent_store_update(self):
+        super()._parent_store_update()
+        self._update_permission_paths()
+
+    def _update_permission_paths(self):
+        """ Update the closure table 'knowledge_article_permission_path' for the
+        articles in self and all their descendants.
+
+        The table holds, for each article, the articles from which it inherits
+        its permissions along with their distance to the article: the article
+        itself (level 0), then its ancestors, up to and including the first
+        desynchronized one. Permissions are then computed by joining on this
+        table instead of walking up the hierarchy on each access check.
+
+        It depends on the 'parent_id', 'parent_path' and 'is_desynchronized'
+        of the articles only, members being joined when computing permissions. """
+        if not self.ids:
+            return
+        self.flush_model(['parent_id', 'is_desynchronized'])
+
+        article_ids = [article_id for article_id, in self.env.execute_query(SQL(
+            """
+            SELECT descendant.id
+              FROM knowledge_article article
+              JOIN knowledge_article descendant
+                ON descendant.parent_path LIKE article.parent_path || '%%'
+             WHERE article.id IN %s
+            """,
+            tuple(self.ids),
+        ))]
+        articles = self.browse(set(article_ids) | set(self.ids))
+
+        self.env.cr.execute(SQL(
+            "DELETE FROM knowledge_article_permission_path WHERE article_id IN %s",
+            tuple(articles.ids),
+        ))
+        articles._insert_permission_paths()
+
+    def _insert_permission_paths(self):
+        """ Insert the rows of the permission paths of the articles in self, see
+        '_update_permission_paths'. """
+        if not self.ids:
+            return
+        self.env.cr.execute(SQL(
+            """
+            WITH RECURSIVE article_path AS (
+                SELECT id AS article_id, id AS ancestor_id, parent_id, is_desynchronized, 0 AS level, ARRAY[id] AS visited_ids
+                  FROM knowledge_article
+                 WHERE id IN %s
+                 UNION ALL
+                SELECT article_path.article_id, parent.id, parent.parent_id, parent.is_desynchronized, article_path.level + 1,
+                       article_path.visited_ids || parent.id
+                  FROM article_path
+                  JOIN knowledge_article parent
+                    ON parent.id = article_path.parent_id
+                 WHERE article_path.is_desynchronized IS NOT TRUE
+                   -- a recursive hierarchy is refused by the constraint on parent_id, checked after this update
+                   AND parent.id != ALL(article_path.visited_ids)
+            )
+            INSERT INTO knowledge_article_permission_path (article_id, ancestor_id, level)
+            SELECT article_id, ancestor_id, level
+              FROM article_path
+            """,
+            tuple(self.ids),
+        ))
+
     @api.model
     def _get_internal_permission(self, filter_domain=None):
-        """ Compute article based permissions.
+        """ Compute article based permissions: the internal permission of the
+        closest article on the permission path.
 
         Note: we don't use domain because we cannot include properly the where clause
         in the custom sql query. The query's output table and fields names does not match
@@ -2309,7 +2403,7 @@ class Article(models.Model):
 
         base_where_domain = SQL()
         if self.ids:
-            base_where_domain = SQL("WHERE id in %s", tuple(self.ids))
+            base_where_domain = SQL("WHERE path.article_id in %s", tuple(self.ids))
 
         where_clause = SQL()
         if filter_domain:
@@ -2320,24 +2414,19 @@ class Article(models.Model):
                 where_clause = SQL('WHERE %s', where_clause)
 
         return dict(self.env.execute_query(SQL('''
-    WITH RECURSIVE article_perms as (
-        SELECT id, id as article_id, parent_id, internal_permission, is_desynchronized
-          FROM knowledge_article
+    WITH article_perms as (
+        SELECT DISTINCT ON (path.article_id)
+               ancestor.id, path.article_id, ancestor.parent_id,
+               ancestor.internal_permission, ancestor.is_desynchronized
+          FROM knowledge_article_permission_path path
+          JOIN knowledge_article ancestor
+            ON ancestor.id = path.ancestor_id
           %s
-         UNION
-        SELECT parents.id, perms.article_id, parents.parent_id,
-               COALESCE(perms.internal_permission, parents.internal_permission),
-               perms.is_desynchronized
-          FROM knowledge_article parents
-    INNER JOIN article_perms perms
-            ON perms.parent_id=parents.id
-               AND perms.is_desynchronized IS NOT TRUE
-               AND perms.internal_permission IS NULL
+      ORDER BY path.article_id, ancestor.internal_permission IS NULL, path.level
     )
-    SELECT article_id, max(internal_permission)
+    SELECT article_id, internal_permission
       FROM article_perms
         %s
-    GROUP BY article_id
         ''', base_where_domain, where_clause)))
 
     @api.model
@@ -2350,35 +2439,19 @@ class Article(models.Model):
         self.env['knowledge.article.member'].flush_model()
 
         if self.ids:
-            base_where_domain = SQL("WHERE perms1.id in %s", tuple(self.ids))
+            base_where_domain = SQL("AND path.article_id in %s", tuple(self.ids))
         else:
             base_where_domain = SQL()
 
         return dict(self.env.execute_query(SQL('''
-    WITH RECURSIVE article_perms as (
-        SELECT a.id, a.parent_id, m.permission, a.is_desynchronized
-          FROM knowledge_article a
-     LEFT JOIN knowledge_article_member m
-            ON a.id=m.article_id and partner_id = %s
-    ), article_rec as (
-        SELECT perms1.id, perms1.id as article_id, perms1.parent_id,
-               perms1.permission, perms1.is_desynchronized
-          FROM article_perms as perms1
-            %s
-         UNION
-        SELECT perms2.id, perms_rec.article_id, perms2.parent_id,
-               COALESCE(perms_rec.permission, perms2.permission),
-               perms2.is_desynchronized
-          FROM article_perms as perms2
-    INNER JOIN article_rec perms_rec
-            ON perms_rec.parent_id=perms2.id
-               AND perms_rec.is_desynchronized IS NOT TRUE
-               AND perms_rec.permission IS NULL
-    )
-    SELECT article_id, max(permission)
-      FROM article_rec
-     WHERE permission IS NOT NULL
-  GROUP BY article_id''',
+    SELECT DISTINCT ON (path.article_id) path.article_id, m.permission
+      FROM knowledge_article_member m
+      JOIN knowledge_article_permission_path path
+        ON path.ancestor_id = m.article_id
+     WHERE m.partner_id = %s
+       AND m.permission IS NOT NULL
+           %s
+  ORDER BY path.article_id, path.level''',
             partner.id,
             base_where_domain,
         )))
@@ -2416,7 +2489,7 @@ class Article(models.Model):
         args = []
         if self.ids:
             args = [tuple(self.ids)]
-            add_where_clause += " AND article_id in %s"
+            add_where_clause += " AND path.article_id in %s"
 
         additional_select_fields = ''
         join_clause = ''
@@ -2462,34 +2535,13 @@ class Article(models.Model):
 
         sql = f'''
     WITH article_permission as (
-        WITH RECURSIVE article_perms as (
-            SELECT a.id, a.parent_id, a.is_desynchronized, m.id as member_id,
-                   m.partner_id, m.permission
-              FROM knowledge_article a
-         LEFT JOIN knowledge_article_member m
-                ON a.id = m.article_id
-        ), article_rec as (
-            SELECT perms1.id, perms1.id as article_id, perms1.parent_id,
-                   perms1.member_id, perms1.partner_id, perms1.permission,
-                   perms1.id as origin_id, 0 as level,
-                   perms1.is_desynchronized
-              FROM article_perms as perms1
-             UNION
-            SELECT perms2.id, perms_rec.article_id, perms2.parent_id,
-                   perms2.member_id, perms2.partner_id, perms2.permission,
-                   perms2.id as origin_id, perms_rec.level + 1,
-                   perms2.is_desynchronized
-              FROM article_perms as perms2
-        INNER JOIN article_rec perms_rec
-                ON perms_rec.parent_id=perms2.id
-                   AND perms_rec.is_desynchronized is not true
-        )
-        SELECT article_id, origin_id, member_id, partner_id,
-               permission, min(level) as min_level
-          FROM article_rec
-         WHERE partner_id is not null
+        SELECT path.article_id, path.ancestor_id as origin_id, m.id as member_id,
+               m.partner_id, m.permission, path.level as min_level
+          FROM knowledge_article_permission_path path
+          JOIN knowledge_article_member m
+            ON m.article_id = path.ancestor_id
+         WHERE m.partner_id is not null
                {add_where_clause}
-      GROUP BY article_id, origin_id, member_id, partner_id, permission
     )
     SELECT article_id, origin_id, member_id, partner_id, permission, min_level
            {additional_select_fields}
@@ -71,6 +71,46 @@ class TestKnowledgeArticlePermissions(KnowledgeArticlePermissionsCase):
         self.assertFalse(article_desync.user_has_write_access)
         self.assertFalse(article_desync.user_has_access, 'Permissions: member rights should not be fetch on parents')
 
+    def test_article_permission_paths(self):
+        """ Test the permission paths are kept up to date when moving and
+        desynchronizing articles: they go up to the first desynchronized
+        article. """
+        def assert_permission_paths(articles):
+            self.env.flush_all()
+            self.env.cr.execute("""
+                SELECT article_id, ancestor_id
+                  FROM knowledge_article_permission_path
+                 WHERE article_id IN %s
+              ORDER BY article_id, level
+            """, [tuple(articles.ids)])
+            paths = {article.id: [] for article in articles}
+            for article_id, ancestor_id in self.env.cr.fetchall():
+                paths[article_id].append(ancestor_id)
+
+            expected_paths = {}
+            for article in articles:
+                expected_paths[article.id] = path = [article.id]
+                while not article.is_desynchronized and article.parent_id:
+                    article = article.parent_id
+                    path.append(article.id)
+            self.assertEqual(paths, expected_paths)
+
+        article, child = self.article_write_contents_children[0:2]
+        article_desync, article_desync_child = self.article_write_desync[0:2]
+        all_articles = self.env['knowledge.article'].search([])
+        assert_permission_paths(all_articles)
+
+        # move under a desynchronized article: stop at the desynchronized ancestor
+        article.move_to(parent_id=article_desync_child.id)
+        self.assertEqual(child.parent_id.parent_id, article_desync_child)
+        assert_permission_paths(all_articles)
+        self.assertEqual(child.inherited_permission_parent_id, article_desync)
+
+        # restoring access re-synchronizes the article with its parents
+        article_desync.restore_article_access()
+        self.assertFalse(article_desync.is_desynchronized)
+        assert_permission_paths(all_articles)
+
     @mute_logger('odoo.addons.base.models.ir_rule')
     @users('employee')
     def test_article_permissions_inheritance_employee(self):
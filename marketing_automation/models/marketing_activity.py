@@ -6,8 +6,10 @@ import logging
 import threading
 
 from ast import literal_eval
+from collections import defaultdict
 from datetime import timedelta, date, datetime
 from dateutil.relativedelta import relativedelta
+from time import perf_counter
 
 from odoo import api, fields, models, _
 from odoo.fields import Datetime
@@ -105,6 +107,16 @@ class MarketingActivity(models.Model):
     statistics_graph_data = fields.Char(compute='_compute_statistics_graph_data')
     # activity summary
     activity_summary = fields.Html(string='Activity Summary', compute='_compute_activity_summary')
+    # execution metrics of the last run
+    execution_date = fields.Datetime('Last Execution', readonly=True, copy=False)
+    execution_trace_count = fields.Integer('Executed Traces', readonly=True, copy=False)
+    execution_duration = fields.Float('Execution Time', readonly=True, copy=False,
+        help='Time spent to execute the activity on its traces during the last run, in seconds.')
+    execution_filter_duration = fields.Float('Filter Time', readonly=True, copy=False,
+        help='Time spent to filter the traces with the activity filter during the last run, in seconds.')
+    execution_action_duration = fields.Float('Action Time', readonly=True, copy=False,
+        help='Time spent to send the mails or run the actions during the last run, in seconds.')
+    execution_trace_rate = fields.Float('Traces per Second', compute='_compute_execution_trace_rate')
 
     @api.constrains('trigger_type', 'parent_id')
     def _check_consistency_in_activities(self):
@@ -116,6 +128,14 @@ class MarketingActivity(models.Model):
                     _('You are trying to set the activity "%(parent_activity)s" as "%(parent_type)s" while its child "%(activity)s" has the trigger type "%(trigger_type)s"\nPlease modify one of those activities before saving.',
                       parent_activity=activity.parent_id.name, parent_type=activity.parent_id.activity_type, activity=activity.name, trigger_type=trigger_string))
 
+    @api.depends('execution_trace_count', 'execution_duration')
+    def _compute_execution_trace_rate(self):
+        for activity in self:
+            if activity.execution_duration:
+                activity.execution_trace_rate = activity.execution_trace_count / activity.execution_duration
+            else:
+                activity.execution_trace_rate = 0
+
     @api.depends('activity_type')
     def _compute_mass_mailing_id_mailing_type(self):
         for activity in self:
@@ -354,17 +374,42 @@ class MarketingActivity(models.Model):
         # execute activity on their traces
         BATCH_SIZE = 500  # same batch size as the MailComposer
         for activity, traces in trace_to_activities.items():
+            metrics = defaultdict(float)
             for traces_batch in (traces[i:i + BATCH_SIZE] for i in range(0, len(traces), BATCH_SIZE)):
-                activity.execute_on_traces(traces_batch)
+                activity.execute_on_traces(traces_batch, metrics=metrics)
                 if auto_commit:
                     self.env.cr.commit()
+            activity._save_execution_metrics(len(traces), metrics)
+            if auto_commit:
+                self.env.cr.commit()
+
+    def _save_execution_metrics(self, trace_count, metrics):
+        """ Store the throughput of the last run of the activity, see ``execute_on_traces``. """
+        self.ensure_one()
+        self.write({
+            'execution_date': Datetime.now(),
+            'execution_trace_count': trace_count,
+            'execution_duration': metrics['duration'],
+            'execution_filter_duration': metrics['filter_duration'],
+            'execution_action_duration': metrics['action_duration'],
+        })
+        _logger.info(
+            'Marketing Automation: activity <%s> executed on %s traces in %.2fs (%.1f traces/s, filter %.2fs, action %.2fs)',
+            self.id, trace_count, metrics['duration'], self.execution_trace_rate,
+            metrics['filter_duration'], metrics['action_duration'],
+        )
 
-    def execute_on_traces(self, traces):
+    def execute_on_traces(self, traces, metrics=None):
         """ Execute current activity on given traces.
 
         :param traces: record set of traces on which the activity should run
+        :param metrics: optional dict in which the time spent is accumulated, in
+          seconds: 'duration' in total, 'filter_duration' to apply the activity
+          filter and 'action_duration' in the activity method
         """
         self.ensure_one()
+        start = perf_counter()
+        metrics = metrics if metrics is not None else defaultdict(float)
         new_traces = self.env['marketing.trace']
 
         if self.validity_duration:
@@ -380,21 +425,27 @@ class MarketingActivity(models.Model):
             rec_domain = literal_eval(self.domain)
         else:
             rec_domain = literal_eval(self.campaign_id.domain or '[]')
+        filter_start = perf_counter()
         if rec_domain:
             user_id = self.campaign_id.user_id or self.env.user
-            rec_valid = self.env[self.model_name].with_context(lang=user_id.lang).search(rec_domain)
-            rec_ids_domain = rec_valid.ids
+            # only look at the records of the traces, not at all the records matching the filter
+            rec_ids_domain = set(self.env[self.model_name].with_context(lang=user_id.lang).search(
+                expression.AND([rec_domain, [('id', 'in', traces.mapped('res_id'))]])
+            ).ids)
 
             traces_allowed = traces.filtered(lambda trace: trace.res_id in rec_ids_domain)
-            traces_rejected = traces.filtered(lambda trace: trace.res_id not in rec_ids_domain)  # either rejected, either deleted record
+            traces_rejected = traces - traces_allowed  # either rejected, either deleted record
         else:
             traces_allowed = traces
             traces_rejected = self.env['marketing.trace']
+        metrics['filter_duration'] += perf_counter() - filter_start
 
         if traces_allowed:
             activity_method = getattr(self, '_execute_%s' % (self.activity_type))
             new_traces += self._generate_children_traces(traces_allowed)
+            action_start = perf_counter()
             activity_method(traces_allowed)
+            metrics['action_duration'] += perf_counter() - action_start
             traces.mapped('participant_id').check_completed()
 
         if traces_rejected:
@@ -404,6 +455,7 @@ class MarketingActivity(models.Model):
             })
             traces_rejected.mapped('participant_id').check_completed()
 
+        metrics['duration'] += perf_counter() - start
         return new_traces
 
     def _execute_action(self, traces):
@@ -10,7 +10,16 @@ from dateutil.relativedelta import relativedelta
 from odoo import api, fields, models, tools, _
 from odoo.fields import Datetime
 from odoo.exceptions import ValidationError, AccessError
-from odoo.tools import convert
+from odoo.osv import expression
+from odoo.tools import SQL, convert
+
+# records written shortly before the last participants synchronization may have been committed
+# after it: they are looked at again during the next incremental synchronization. The write date
+# of a record is the start of the transaction writing it: the records written by a transaction
+# running for longer than this overlap (e.g. a large import) when the last synchronization ran
+# are missed by the incremental synchronizations, until a full one (filter, model or unique
+# field changed) looks at them again.
+PARTICIPANTS_SYNC_OVERLAP = relativedelta(hours=1)
 
 
 class MarketingCampaign(models.Model):
@@ -52,6 +61,7 @@ class MarketingCampaign(models.Model):
     mass_mailing_count = fields.Integer('# Mailings', compute='_compute_mass_mailing_count')
     link_tracker_click_count = fields.Integer('# Clicks', compute='_compute_link_tracker_click_count')
     last_sync_date = fields.Datetime(string='Last activities synchronization', copy=False)
+    last_participants_sync_date = fields.Datetime(string='Last participants synchronization', copy=False)
     require_sync = fields.Boolean(string="Sync of participants is required", compute='_compute_require_sync')
     # participants
     participant_ids = fields.One2many('marketing.participant', 'campaign_id', string='Participants', copy=False)
@@ -183,6 +193,9 @@ class MarketingCampaign(models.Model):
     def write(self, vals):
         if not vals.get('active', True):
             vals['state'] = 'stopped'
+        if vals.keys() & {'model_id', 'domain', 'mailing_filter_id', 'unique_field_id'}:
+            # the targeted records changed: the next synchronization must look at all of them
+            vals['last_participants_sync_date'] = False
         return super().write(vals)
 
     def action_set_synchronized(self):
@@ -326,11 +339,10 @@ class MarketingCampaign(models.Model):
 
     def sync_participants(self):
         """ Creates new participants, taking into account already-existing ones
-        as well as campaign filter and unique field. """
-        def _uniquify_list(seq):
-            seen = set()
-            return [x for x in seq if x not in seen and not seen.add(x)]
-
+        as well as campaign filter and unique field. The differences between the
+        participants and the targeted records are computed in SQL; when the filter
+        allows it, only the records modified since the last synchronization are
+        looked at. """
         participants = self.env['marketing.participant']
         now = self.env.cr.now()
         # auto-commit except in testing mode
@@ -342,33 +354,13 @@ class MarketingCampaign(models.Model):
             user_id = campaign.user_id or self.env.user
             RecordModel = self.env[campaign.model_name].with_context(lang=user_id.lang)
 
-            # Fetch existing participants
-            participants_data = participants.search_read([('campaign_id', '=', campaign.id)], ['res_id'])
-            existing_rec_ids = _uniquify_list([live_participant['res_id'] for live_participant in participants_data])
-
             record_domain = literal_eval(campaign.domain or "[]")
-            db_rec_ids = _uniquify_list(RecordModel.search(record_domain).ids)
-            to_create = [rid for rid in db_rec_ids if rid not in existing_rec_ids]  # keep ordered IDs
-            to_remove = set(existing_rec_ids) - set(db_rec_ids)
-            unique_field = campaign.unique_field_id.sudo()
-            if unique_field.name != 'id':
-                without_duplicates = []
-                existing_records = RecordModel.with_context(prefetch_fields=False).browse(existing_rec_ids).exists()
-                # Split the read in batch of 1000 to avoid the prefetch
-                # crawling the cache for the next 1000 records to fetch
-                unique_field_vals = {rec[unique_field.name]
-                                        for index in range(0, len(existing_records), 1000)
-                                        for rec in existing_records[index:index+1000]}
-
-                for rec in RecordModel.with_context(prefetch_fields=False).browse(to_create):
-                    field_val = rec[unique_field.name]
-                    # we exclude the empty recordset with the first condition
-                    if (not unique_field.relation or field_val) and field_val not in unique_field_vals:
-                        without_duplicates.append(rec.id)
-                        unique_field_vals.add(field_val)
-                to_create = without_duplicates
-
-            BATCH_SIZE = 100
+            modified_since = False
+            if campaign.last_participants_sync_date and campaign._is_participants_sync_incremental(RecordModel, record_domain):
+                modified_since = campaign.last_participants_sync_date - PARTICIPANTS_SYNC_OVERLAP
+
+            to_create = campaign._get_participants_res_ids_to_create(RecordModel, record_domain, modified_since)
+            BATCH_SIZE = 1000
             for to_create_batch in tools.split_every(BATCH_SIZE, to_create, piece_maker=list):
                 participants += participants.create([{
                     'campaign_id': campaign.id,
@@ -378,21 +370,152 @@ class MarketingCampaign(models.Model):
                 if auto_commit:
                     self.env.cr.commit()
 
-            if to_remove:
-                participants_to_unlink = participants.search([
-                    ('res_id', 'in', list(to_remove)),
-                    ('campaign_id', '=', campaign.id),
-                    ('state', '!=', 'unlinked'),
-                ])
-                for index in range(0, len(participants_to_unlink), 1000):
-                    participants_to_unlink[index:index+1000].action_set_unlink()
-                    # Commit only every 100 operation to avoid committing to often
-                    # this mean every 10k record. It should be ok, it takes 1sec second to process 10k
-                    if not index % (BATCH_SIZE * 100):
-                        self.env.cr.commit()
+            participants_to_unlink = campaign._get_participants_to_remove(RecordModel, record_domain, modified_since)
+            for index in range(0, len(participants_to_unlink), 1000):
+                participants_to_unlink[index:index+1000].action_set_unlink()
+                # Commit only every 10 operation to avoid committing to often
+                # this mean every 10k record. It should be ok, it takes 1sec second to process 10k
+                if auto_commit and not index % 10000:
+                    self.env.cr.commit()
+
+            campaign.last_participants_sync_date = now
+            if auto_commit:
+                self.env.cr.commit()
 
         return participants
 
+    def _is_participants_sync_incremental(self, RecordModel, record_domain):
+        """ Whether the records matching the domain can only change when they are written,
+        i.e. the domain only uses stored fields of the model itself, which are not computed.
+        The x2many fields are excluded, as they are usually modified from the other side
+        (e.g. subscribing a contact to a mailing list), without writing the record. """
+        if not RecordModel._log_access:
+            return False
+        for leaf in record_domain:
+            if not expression.is_leaf(leaf) or tuple(leaf) in (expression.TRUE_LEAF, expression.FALSE_LEAF):
+                continue
+            field_name, operator, _value = leaf
+            field = RecordModel._fields.get(field_name)
+            if (not field or not field.store or field.compute or field.type in ('one2many', 'many2many')
+                    or operator in ('child_of', 'parent_of')):
+                return False
+        return True
+
+    def _get_participants_records_query(self, RecordModel, record_domain, modified_since=False):
+        """ Query of the records targeted by the campaign, modified since the given date if any. """
+        if modified_since:
+            record_domain = expression.AND([record_domain, [('write_date', '>=', modified_since)]])
+        return RecordModel._search(record_domain, order=RecordModel._order)
+
+    def _get_participants_res_ids_to_create(self, RecordModel, record_domain, modified_since=False):
+        """ Return the ids of the targeted records without participant yet, in the order of
+        their model, keeping only the first record of each value of the unique field. """
+        self.ensure_one()
+        self.env['marketing.participant'].flush_model(['campaign_id', 'res_id'])
+        query = self._get_participants_records_query(RecordModel, record_domain, modified_since)
+        record_id = SQL.identifier(query.table, 'id')
+        query.add_where(SQL(
+            "NOT EXISTS (SELECT 1 FROM marketing_participant WHERE campaign_id = %s AND res_id = %s)",
+            self.id, record_id,
+        ))
+
+        unique_field = self.unique_field_id.sudo()
+        field = RecordModel._fields.get(unique_field.name)
+        if unique_field.name == 'id' or not field:
+            return [rec_id for rec_id, in self.env.execute_query(query.select(record_id))]
+
+        if not field.column_type or field.translate or field.company_dependent:
+            # the values cannot be compared in SQL, compare them as the ORM reads them
+            return self._get_participants_res_ids_without_duplicates(
+                RecordModel, [rec_id for rec_id, in self.env.execute_query(query.select(record_id))])
+
+        # filter out the records having the same value as an existing participant
+        RecordModel.flush_model([field.name])
+        existing_record_sql = SQL(
+            """SELECT 1
+                 FROM marketing_participant participant
+                 JOIN %s existing_record ON existing_record.id = participant.res_id
+                WHERE participant.campaign_id = %s""",
+            SQL.identifier(RecordModel._table), self.id,
+        )
+        existing_value = SQL.identifier('existing_record', field.name)
+        value = SQL.identifier(query.table, field.name)
+        if field.type == 'integer':
+            # the ORM reads NULL as 0
+            existing_value = SQL("COALESCE(%s, 0)", existing_value)
+            value = SQL("COALESCE(%s, 0)", value)
+            query.add_where(SQL("NOT EXISTS (%s AND %s = %s)", existing_record_sql, existing_value, value))
+        elif field.relational:
+            # empty values are never targeted
+            query.add_where(SQL(
+                "%s IS NOT NULL AND NOT EXISTS (%s AND %s = %s)",
+                value, existing_record_sql, existing_value, value,
+            ))
+        else:
+            query.add_where(SQL(
+                """((%s IS NOT NULL AND NOT EXISTS (%s AND %s = %s))
+                 OR (%s IS NULL AND NOT EXISTS (%s AND %s IS NULL)))""",
+                value, existing_record_sql, existing_value, value,
+                value, existing_record_sql, existing_value,
+            ))
+
+        # keep the first record of each value among the new ones
+        res_ids = []
+        values = set()
+        for rec_id, rec_value in self.env.execute_query(query.select(record_id, value)):
+            if rec_value not in values:
+                res_ids.append(rec_id)
+                values.add(rec_value)
+        return res_ids
+
+    def _get_participants_res_ids_without_duplicates(self, RecordModel, res_ids):
+        """ Filter out the records having the same value for the unique field as an existing
+        participant or as a previous record, reading the values through the ORM. """
+        self.ensure_one()
+        unique_field = self.unique_field_id.sudo()
+        existing_rec_ids = [rec_id for rec_id, in self.env.execute_query(SQL(
+            "SELECT DISTINCT res_id FROM marketing_participant WHERE campaign_id = %s", self.id,
+        ))]
+        without_duplicates = []
+        existing_records = RecordModel.with_context(prefetch_fields=False).browse(existing_rec_ids).exists()
+        # Split the read in batch of 1000 to avoid the prefetch
+        # crawling the cache for the next 1000 records to fetch
+        unique_field_vals = {rec[unique_field.name]
+                                for index in range(0, len(existing_records), 1000)
+                                for rec in existing_records[index:index+1000]}
+
+        for rec in RecordModel.with_context(prefetch_fields=False).browse(res_ids):
+            field_val = rec[unique_field.name]
+            # we exclude the empty recordset with the first condition
+            if (not unique_field.relation or field_val) and field_val not in unique_field_vals:
+                without_duplicates.append(rec.id)
+                unique_field_vals.add(field_val)
+        return without_duplicates
+
+    def _get_participants_to_remove(self, RecordModel, record_domain, modified_since=False):
+        """ Return the participants whose record does not match the domain anymore. When
+        looking at the records modified since the given date only, the others still match. """
+        self.ensure_one()
+        self.env['marketing.participant'].flush_model(['campaign_id', 'res_id', 'state'])
+        query = self._get_participants_records_query(RecordModel, record_domain, modified_since)
+        query.add_where(SQL("%s = participant.res_id", SQL.identifier(query.table, 'id')))
+        conditions = [
+            SQL("participant.campaign_id = %s", self.id),
+            SQL("participant.state != 'unlinked'"),
+            SQL("NOT EXISTS (%s)", query.subselect(SQL("1"))),
+        ]
+        if modified_since:
+            RecordModel.flush_model(['write_date'])
+            conditions.append(SQL(
+                """NOT EXISTS (SELECT 1 FROM %(table)s WHERE id = participant.res_id AND write_date < %(date)s)""",
+                table=SQL.identifier(RecordModel._table), date=modified_since,
+            ))
+        participant_ids = [participant_id for participant_id, in self.env.execute_query(SQL(
+            "SELECT participant.id FROM marketing_participant participant WHERE %s ORDER BY participant.id",
+            SQL(" AND ").join(conditions),
+        ))]
+        return self.env['marketing.participant'].browse(participant_ids)
+
     def execute_activities(self):
         for campaign in self:
             campaign.marketing_activity_ids.execute()
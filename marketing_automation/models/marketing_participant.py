@@ -87,20 +87,22 @@ class MarketingParticipant(models.Model):
         participants = super().create(vals_list)
         now = Datetime.now()
         cron_trigger_dates = set()
-        for res in participants:
+        trace_vals_list = []
+        for campaign, campaign_participants in participants.grouped('campaign_id').items():
             # prepare first traces related to begin activities
-            primary_activities = res.campaign_id.marketing_activity_ids.filtered(lambda act: act.trigger_type == 'begin')
-            trace_ids = [
-                (0, 0, {
-                    'activity_id': activity.id,
-                    'schedule_date': now + relativedelta(**{activity.interval_type: activity.interval_number}),
-                }) for activity in primary_activities]
-            res.write({'trace_ids': trace_ids})
-
-            cron_trigger_dates |= set([
-                now + relativedelta(**{activity.interval_type: activity.interval_number})
+            primary_activities = campaign.marketing_activity_ids.filtered(lambda act: act.trigger_type == 'begin')
+            schedule_dates = {
+                activity: now + relativedelta(**{activity.interval_type: activity.interval_number})
                 for activity in primary_activities
-            ])
+            }
+            trace_vals_list += [{
+                'participant_id': participant.id,
+                'activity_id': activity.id,
+                'schedule_date': schedule_date,
+            } for participant in campaign_participants for activity, schedule_date in schedule_dates.items()]
+            cron_trigger_dates |= set(schedule_dates.values())
+        # create the traces of all the participants at once
+        self.env['marketing.trace'].create(trace_vals_list)
 
         if cron_trigger_dates:
             # based on activities with 'begin' trigger_type, we schedule CRON triggers
@@ -266,6 +266,39 @@ class TestSyncing(SyncingCase):
         # should not generate traces for other activities
         self.assertActivityWoTrace(new_activity_2)
 
+    @users('user_marketing_automation')
+    def test_activity_execution_metrics(self):
+        """ Executing the activities filters the traces of each batch and stores the
+        throughput of the run on the activities. """
+        self.activity_1.activity_domain = repr([('name', '!=', self.test_contacts[0].name)])
+        campaign = self.campaign.with_env(self.env)
+        with self.mock_datetime_and_now(self.date_reference):
+            campaign.sync_participants()
+        with self.mock_datetime_and_now(self.date_reference + timedelta(hours=1)), self.mock_mail_gateway():
+            campaign.execute_activities()
+
+        activity = self.activity_1.with_env(self.env)
+        self.assertMarketAutoTraces(
+            [{
+                'records': self.test_contacts[0],
+                'status': 'rejected',
+            }, {
+                'records': self.test_contacts[1:],
+                'status': 'processed',
+                'trace_status': 'sent',
+            }],
+            activity,
+        )
+        self.assertEqual(activity.execution_date, self.date_reference + timedelta(hours=1))
+        self.assertEqual(activity.execution_trace_count, len(self.test_contacts))
+        self.assertGreater(activity.execution_duration, 0)
+        self.assertGreaterEqual(
+            activity.execution_duration,
+            activity.execution_filter_duration + activity.execution_action_duration,
+        )
+        self.assertAlmostEqual(activity.execution_trace_rate, len(self.test_contacts) / activity.execution_duration)
+        self.assertFalse(self.activity_2.execution_date, "Not executed yet")
+
     @users('user_marketing_automation')
     def test_campaign_sync_participants(self):
         """ Test 'sync_participants' that should create participants, and create
@@ -290,6 +323,81 @@ class TestSyncing(SyncingCase):
         # should not generate traces for other activities
         self.assertActivityWoTrace(self.activity_2)
 
+    @users('user_marketing_automation')
+    def test_campaign_sync_participants_incremental(self):
+        """ Once synchronized, only the records written since the last synchronization
+        are looked at, unless the targeted records changed. """
+        campaign = self.campaign.with_env(self.env)
+        sync_date = Datetime.now() + timedelta(days=1)
+        with self.mock_datetime_and_now(sync_date):
+            campaign.sync_participants()
+        self.assertEqual(campaign.last_participants_sync_date, sync_date)
+        self.assertEqual(len(campaign.participant_ids), len(self.test_contacts))
+
+        # written long before the last synchronization: not looked at anymore
+        self.test_contacts[0].name = 'Not Targeted'
+        with self.mock_datetime_and_now(sync_date + timedelta(hours=2)):
+            campaign.sync_participants()
+        self.assertFalse(campaign.participant_ids.filtered(lambda p: p.state == 'unlinked'))
+
+        with self.mock_datetime_and_now(sync_date + timedelta(hours=3)):
+            self.test_contacts[1].name = 'Not Targeted Either'
+        with self.mock_datetime_and_now(sync_date + timedelta(hours=4)):
+            campaign.sync_participants()
+        unlinked = campaign.participant_ids.filtered(lambda p: p.state == 'unlinked')
+        self.assertEqual(unlinked.mapped('res_id'), self.test_contacts[1].ids)
+
+        # changing the unique field requires to look at all the records again
+        campaign.unique_field_id = self.env['ir.model.fields']._get('mailing.contact', 'email')
+        self.assertFalse(campaign.last_participants_sync_date)
+        new_contacts = self.env['mailing.contact'].sudo().create([
+            {'email': self.test_contacts[2].email, 'name': 'MATest_new_0'},
+            {'email': 'ma.test.new@example.com', 'name': 'MATest_new_1'},
+            {'email': 'ma.test.new@example.com', 'name': 'MATest_new_2'},
+        ])
+        with self.mock_datetime_and_now(sync_date + timedelta(hours=5)):
+            campaign.sync_participants()
+        unlinked = campaign.participant_ids.filtered(lambda p: p.state == 'unlinked')
+        self.assertEqual(sorted(unlinked.mapped('res_id')), sorted(self.test_contacts[:2].ids))
+        new_participants = campaign.participant_ids.filtered(lambda p: p.res_id in new_contacts.ids)
+        self.assertEqual(len(new_participants), 1, "Only one of the contacts with a new email should be targeted")
+        self.assertIn(new_participants.res_id, new_contacts[1:].ids)
+
+    @users('user_marketing_automation')
+    def test_campaign_sync_participants_many2many(self):
+        """ Subscribing to a mailing list doesn't write the contact: the synchronization
+        of a campaign targeting a mailing list must look at all the contacts. """
+        mailing_list = self.env['mailing.list'].sudo().create({
+            'name': 'MATest List',
+            'contact_ids': [(6, 0, self.test_contacts[:2].ids)],
+        })
+        campaign = self.campaign.with_env(self.env)
+        campaign.domain = str([('list_ids', 'in', mailing_list.ids)])
+        self.assertFalse(campaign._is_participants_sync_incremental(
+            self.env['mailing.contact'], [('list_ids', 'in', mailing_list.ids)]))
+
+        sync_date = Datetime.now() + timedelta(days=1)
+        with self.mock_datetime_and_now(sync_date):
+            campaign.sync_participants()
+        self.assertEqual(sorted(campaign.participant_ids.mapped('res_id')), sorted(self.test_contacts[:2].ids))
+
+        # subscribe and unsubscribe contacts from the list side
+        with self.mock_datetime_and_now(sync_date + timedelta(hours=2)):
+            self.env['mailing.subscription'].sudo().create({
+                'contact_id': self.test_contacts[2].id,
+                'list_id': mailing_list.id,
+            })
+            self.env['mailing.subscription'].sudo().search([
+                ('contact_id', '=', self.test_contacts[0].id),
+                ('list_id', '=', mailing_list.id),
+            ]).unlink()
+        with self.mock_datetime_and_now(sync_date + timedelta(hours=3)):
+            campaign.sync_participants()
+        running = campaign.participant_ids.filtered(lambda p: p.state != 'unlinked')
+        unlinked = campaign.participant_ids.filtered(lambda p: p.state == 'unlinked')
+        self.assertEqual(sorted(running.mapped('res_id')), sorted(self.test_contacts[1:3].ids))
+        self.assertEqual(unlinked.mapped('res_id'), self.test_contacts[0].ids)
+
     @users('user_marketing_automation')
     def test_participants_creation_dupes(self):
         """ This test may fail randomly based on time if not launched with
@@ -8,4 +8,6 @@ from . import product_template
 from . import purchase_order
 from . import res_company
 from . import res_config_settings
+from . import stock_move
+from . import stock_move_line
 from . import stock_rule
@@ -1,17 +1,25 @@
 # -*- coding: utf-8 -*-
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
+import hashlib
+import json
+
+import psycopg2.errors
 from collections import defaultdict, namedtuple
 from dateutil.relativedelta import relativedelta
 from math import log10
 
 from odoo import api, fields, models, _
 from odoo.exceptions import ValidationError
+from odoo.tools import SQL, ormcache
 from odoo.tools.date_utils import add, subtract
 from odoo.tools.float_utils import float_round, float_compare
 from odoo.osv.expression import OR, AND, FALSE_DOMAIN
 from collections import OrderedDict
 
+# Cached period aggregates older than this are removed by the autovacuum.
+PERIOD_CACHE_LIFETIME_DAYS = 1
+
 
 class MrpProductionSchedule(models.Model):
     _name = 'mrp.production.schedule'
@@ -78,6 +86,44 @@ class MrpProductionSchedule(models.Model):
         ('warehouse_product_ref_uniq', 'unique (warehouse_id, product_id)', 'The combination of warehouse and product must be unique!'),
     ]
 
+    def init(self):
+        super().init()
+        # Incoming and outgoing quantities of the schedules by period, see '_get_period_aggregates'.
+        self.env.cr.execute("""
+            CREATE TABLE IF NOT EXISTS mrp_production_schedule_period_cache (
+                production_schedule_id INTEGER NOT NULL REFERENCES mrp_production_schedule(id) ON DELETE CASCADE,
+                key VARCHAR NOT NULL,
+                product_id INTEGER NOT NULL,
+                aggregates JSONB NOT NULL,
+                computed_snapshot TEXT NOT NULL,
+                create_date TIMESTAMP NOT NULL DEFAULT (now() at time zone 'UTC'),
+                PRIMARY KEY (production_schedule_id, key)
+            );
+            CREATE INDEX IF NOT EXISTS mrp_production_schedule_period_cache_product_id_idx
+                ON mrp_production_schedule_period_cache (product_id);
+        """)
+        # Invalidations of the cache, see '_invalidate_period_cache'. A NULL product_id invalidates all the products.
+        self.env.cr.execute("""
+            CREATE TABLE IF NOT EXISTS mrp_production_schedule_period_cache_invalidation (
+                product_id INTEGER,
+                txid BIGINT NOT NULL DEFAULT txid_current(),
+                create_date TIMESTAMP NOT NULL DEFAULT (now() at time zone 'UTC')
+            );
+            CREATE INDEX IF NOT EXISTS mrp_production_schedule_period_cache_invalidation_product_id_idx
+                ON mrp_production_schedule_period_cache_invalidation (product_id);
+        """)
+
+    @api.autovacuum
+    def _gc_period_cache(self):
+        self.env.cr.execute(SQL(
+            "DELETE FROM mrp_production_schedule_period_cache WHERE create_date < %s",
+            fields.Datetime.now() - relativedelta(days=PERIOD_CACHE_LIFETIME_DAYS),
+        ))
+        self.env.cr.execute(SQL(
+            "DELETE FROM mrp_production_schedule_period_cache_invalidation WHERE create_date < %s",
+            fields.Datetime.now() - relativedelta(days=PERIOD_CACHE_LIFETIME_DAYS),
+        ))
+
     # TODO: move logic to stock.replenish.mixin
     @api.depends('product_id', 'product_id.route_ids')
     def _compute_route_and_supplier(self):
@@ -352,6 +398,8 @@ class MrpProductionSchedule(models.Model):
         for i, mps_id in existing_mps:
             mps_ids.insert(i, mps_id)
         mps = self.browse(mps_ids)
+        # The period cache is only invalidated for the products having a schedule, see '_get_scheduled_product_ids'
+        self.env.registry.clear_cache()
 
         mps._assign_mps_sequence()
 
@@ -383,6 +431,15 @@ class MrpProductionSchedule(models.Model):
             self.env['mrp.production.schedule'].create(components_vals)
         return mps
 
+    def write(self, vals):
+        if 'product_id' in vals:
+            self.env.registry.clear_cache()
+        return super().write(vals)
+
+    def unlink(self):
+        self.env.registry.clear_cache()
+        return super().unlink()
+
     def _assign_mps_sequence(self):
         """ Determine the sequence of the new MPS records as well as any existing record they impact.
         Will parse the indirect_demand_trees for each record and see at what level the corresponding product is found.
@@ -450,7 +507,9 @@ class MrpProductionSchedule(models.Model):
         # the state is not saved, it needs to recompute the quantity to
         # replenish of finished products. It will modify the indirect
         # demand and replenish_qty of schedules in self.
-        schedules_to_compute = self.env['mrp.production.schedule'].browse(self.get_impacted_schedule()) | self
+        # The schedules using the products in self as components do not impact
+        # them, there is no need to compute their state.
+        schedules_to_compute = self._get_supplying_schedule() | self
 
         # Dependencies between schedules
         indirect_demand_trees = schedules_to_compute._get_indirect_demand_tree()
@@ -461,10 +520,7 @@ class MrpProductionSchedule(models.Model):
         # order to compute the schedule state only once.
         indirect_demand_order = schedules_to_compute._get_indirect_demand_order(indirect_demand_trees)
         demand_qty_dict = defaultdict(lambda: defaultdict(float))
-        incoming_qty, incoming_qty_done = self._get_incoming_qty(date_range)
-        outgoing_qty, outgoing_qty_done = self._get_outgoing_qty(date_range)
-        dummy, outgoing_qty_year_minus_1 = self._get_outgoing_qty(date_range_year_minus_1)
-        dummy, outgoing_qty_year_minus_2 = self._get_outgoing_qty(date_range_year_minus_2)
+        period_aggregates = self._get_period_aggregates(date_range, date_range_year_minus_1, date_range_year_minus_2)
         read_fields = [
             'forecast_target_qty',
             'min_to_replenish_qty',
@@ -495,24 +551,23 @@ class MrpProductionSchedule(models.Model):
                 production_schedule_state['forecast_ids'] = []
 
             starting_inventory_qty = production_schedule.product_id.with_context(warehouse_id=production_schedule.warehouse_id.id).qty_available
-            if len(date_range):
-                starting_inventory_qty -= incoming_qty_done.get((date_range[0], production_schedule.product_id, production_schedule.warehouse_id), 0.0)
-                starting_inventory_qty += outgoing_qty_done.get((date_range[0], production_schedule.product_id, production_schedule.warehouse_id), 0.0)
+            aggregates = period_aggregates.get(production_schedule.id)
+            if len(date_range) and aggregates:
+                starting_inventory_qty -= aggregates['incoming_qty_done'][0]
+                starting_inventory_qty += aggregates['outgoing_qty_done'][0]
 
             for index, (date_start, date_stop) in enumerate(date_range):
                 forecast_values = {}
                 key = ((date_start, date_stop), production_schedule.product_id, production_schedule.warehouse_id)
-                key_y_1 = (date_range_year_minus_1[index], *key[1:])
-                key_y_2 = (date_range_year_minus_2[index], *key[1:])
                 existing_forecasts = production_schedule.forecast_ids.filtered(lambda p: p.date >= date_start and p.date <= date_stop and
                                                                                          (p.forecast_qty or p.replenish_qty or p.procurement_launched or p.replenish_qty_updated))
                 if production_schedule in self:
                     forecast_values['date_start'] = date_start
                     forecast_values['date_stop'] = date_stop
-                    forecast_values['incoming_qty'] = float_round(incoming_qty.get(key, 0.0) + incoming_qty_done.get(key, 0.0), precision_rounding=rounding)
-                    forecast_values['outgoing_qty'] = float_round(outgoing_qty.get(key, 0.0) + outgoing_qty_done.get(key, 0.0), precision_rounding=rounding)
-                    forecast_values['outgoing_qty_year_minus_1'] = float_round(outgoing_qty_year_minus_1.get(key_y_1, 0.0), precision_rounding=rounding)
-                    forecast_values['outgoing_qty_year_minus_2'] = float_round(outgoing_qty_year_minus_2.get(key_y_2, 0.0), precision_rounding=rounding)
+                    forecast_values['incoming_qty'] = float_round(aggregates['incoming_qty'][index] + aggregates['incoming_qty_done'][index], precision_rounding=rounding)
+                    forecast_values['outgoing_qty'] = float_round(aggregates['outgoing_qty'][index] + aggregates['outgoing_qty_done'][index], precision_rounding=rounding)
+                    forecast_values['outgoing_qty_year_minus_1'] = float_round(aggregates['outgoing_qty_year_minus_1'][index], precision_rounding=rounding)
+                    forecast_values['outgoing_qty_year_minus_2'] = float_round(aggregates['outgoing_qty_year_minus_2'][index], precision_rounding=rounding)
 
                 indirect_qty_value = sum(demand_qty_dict.get(key, {0: 0}).values())
                 forecast_values['indirect_demand_qty'] = float_round(indirect_qty_value, precision_rounding=rounding, rounding_method='UP')
@@ -577,6 +632,23 @@ class MrpProductionSchedule(models.Model):
         :return ids of supplied and supplying schedules
         :rtype list
         """
+        return (self._get_supplying_schedule(domain) | self._get_supplied_schedule(domain)).ids
+
+    def get_supplied_schedule(self, domain=False):
+        """ Return the schedules impacted by a change on the schedules in self,
+        i.e. the ones using the products in self as finished products (no matter
+        at which BoM level). The schedules using the products in self as
+        components are not impacted, and do not need to be reloaded.
+
+        :param domain: filter supplied schedules with the domain
+        :return ids of supplied schedules
+        :rtype list
+        """
+        return self._get_supplied_schedule(domain).ids
+
+    def _get_supplying_schedule(self, domain=False):
+        """ Return the schedules of the finished products that use the products
+        in self as components (no matter at which BoM level). """
         if not domain:
             domain = []
 
@@ -592,12 +664,18 @@ class MrpProductionSchedule(models.Model):
             related_products |= products
             return _used_in_bom(products, related_products)
 
-        supplying_mps = self.env['mrp.production.schedule'].search(
+        return self.env['mrp.production.schedule'].search(
             AND([domain, [
                 ('warehouse_id', 'in', self.mapped('warehouse_id').ids),
                 ('product_id', 'in', _used_in_bom(self.mapped('product_id'), self.env['product.product']).ids)
             ]]))
 
+    def _get_supplied_schedule(self, domain=False):
+        """ Return the schedules of the components used by the products in self
+        (no matter at which BoM level). """
+        if not domain:
+            domain = []
+
         def _use_boms(products, related_products):
             """ Explore bom line from products's BoMs in order to get components
             used.
@@ -610,12 +688,11 @@ class MrpProductionSchedule(models.Model):
             related_products |= components
             return _use_boms(components, related_products)
 
-        supplied_mps = self.env['mrp.production.schedule'].search(
+        return self.env['mrp.production.schedule'].search(
             AND([domain, [
                 ('warehouse_id', 'in', self.mapped('warehouse_id').ids),
                 ('product_id', 'in', _use_boms(self.mapped('product_id'), self.env['product.product']).ids)
             ]]))
-        return (supplying_mps | supplied_mps).ids
 
     def remove_replenish_qty(self, date_index, period_scale=False):
         """ Remove the quantity to replenish on the forecast cell.
@@ -877,6 +954,145 @@ class MrpProductionSchedule(models.Model):
 
         return incoming_qty, incoming_qty_done
 
+    def _get_period_aggregates(self, date_range, date_range_year_minus_1, date_range_year_minus_2):
+        """ Get the incoming and outgoing quantities of the schedules in self
+        for each period of the date ranges.
+
+        They are read from the table 'mrp_production_schedule_period_cache' and
+        only computed for the schedules missing in it. The rows of a product are
+        removed whenever its stock moves or RFQ lines change, see
+        '_invalidate_period_cache'. Their key depends on the date ranges and the
+        lead times of the schedule, which are used to select the moves and RFQ.
+
+        A transaction can store rows computed before a concurrent change of the
+        moves, after this change removed the rows of the product. Each row keeps
+        the snapshot it was computed in, and is ignored if an invalidation of its
+        product was not visible in this snapshot.
+
+        return: a dict with as key a production schedule id and as values a dict
+        of lists of quantities for each date range.
+        """
+        if not self:
+            return {}
+        key_by_schedule = {}
+        for schedule in self:
+            rules = schedule.product_id._get_rules_from_location(schedule.warehouse_id.lot_stock_id)
+            rfq_lead_days, dummy = rules._get_lead_days(schedule.product_id)
+            moves_lead_days, dummy = rules.filtered(lambda r: r.action not in ['buy', 'manufacture'])._get_lead_days(schedule.product_id)
+            key_data = [
+                schedule.product_id.id,
+                schedule.warehouse_id.id,
+                date_range,
+                date_range_year_minus_1,
+                date_range_year_minus_2,
+                rfq_lead_days['total_delay'],
+                moves_lead_days['total_delay'],
+            ]
+            key_by_schedule[schedule] = hashlib.sha256(json.dumps(key_data, default=str).encode()).hexdigest()
+
+        # An invalidation made by the transaction storing the row (the same xmin)
+        # was already visible when computing it.
+        aggregates_by_schedule = dict(self.env.execute_query(SQL(
+            """
+            SELECT cache.production_schedule_id, cache.aggregates
+              FROM mrp_production_schedule_period_cache cache
+             WHERE (cache.production_schedule_id, cache.key) IN %s
+               AND NOT EXISTS (
+                    SELECT 1
+                      FROM mrp_production_schedule_period_cache_invalidation invalidation
+                     WHERE (invalidation.product_id IS NULL OR invalidation.product_id = cache.product_id)
+                       AND NOT invalidation.xmin = cache.xmin
+                       AND NOT txid_visible_in_snapshot(invalidation.txid, cache.computed_snapshot::txid_snapshot)
+               )
+            """,
+            tuple((schedule.id, key) for schedule, key in key_by_schedule.items()),
+        )))
+
+        schedules_to_compute = self.filtered(lambda schedule: schedule.id not in aggregates_by_schedule)
+        if not schedules_to_compute:
+            return aggregates_by_schedule
+
+        incoming_qty, incoming_qty_done = schedules_to_compute._get_incoming_qty(date_range)
+        outgoing_qty, outgoing_qty_done = schedules_to_compute._get_outgoing_qty(date_range)
+        dummy, outgoing_qty_year_minus_1 = schedules_to_compute._get_outgoing_qty(date_range_year_minus_1)
+        dummy, outgoing_qty_year_minus_2 = schedules_to_compute._get_outgoing_qty(date_range_year_minus_2)
+
+        def _get_quantities(quantities, schedule, periods):
+            return [quantities.get((period, schedule.product_id, schedule.warehouse_id), 0.0) for period in periods]
+
+        # The snapshot of the current transaction is the one the quantities were computed in.
+        self.env.cr.execute("SELECT txid_current_snapshot()::text")
+        snapshot = self.env.cr.fetchone()[0]
+
+        rows = []
+        for schedule in schedules_to_compute:
+            aggregates = {
+                'incoming_qty': _get_quantities(incoming_qty, schedule, date_range),
+                'incoming_qty_done': _get_quantities(incoming_qty_done, schedule, date_range),
+                'outgoing_qty': _get_quantities(outgoing_qty, schedule, date_range),
+                'outgoing_qty_done': _get_quantities(outgoing_qty_done, schedule, date_range),
+                'outgoing_qty_year_minus_1': _get_quantities(outgoing_qty_year_minus_1, schedule, date_range_year_minus_1),
+                'outgoing_qty_year_minus_2': _get_quantities(outgoing_qty_year_minus_2, schedule, date_range_year_minus_2),
+            }
+            aggregates_by_schedule[schedule.id] = aggregates
+            rows.append(SQL(
+                "(%s, %s, %s, %s::jsonb, %s)",
+                schedule.id, key_by_schedule[schedule], schedule.product_id.id, json.dumps(aggregates), snapshot,
+            ))
+        # An existing row for the key is outdated (otherwise, it would have been
+        # used): it is replaced. If a concurrent transaction replaced it as well,
+        # the quantities are simply not stored.
+        try:
+            with self.env.cr.savepoint(flush=False):
+                self.env.cr.execute(SQL(
+                    """
+                    INSERT INTO mrp_production_schedule_period_cache (production_schedule_id, key, product_id, aggregates, computed_snapshot)
+                         VALUES %s
+                    ON CONFLICT (production_schedule_id, key) DO UPDATE
+                            SET aggregates = EXCLUDED.aggregates,
+                                computed_snapshot = EXCLUDED.computed_snapshot,
+                                create_date = EXCLUDED.create_date
+                    """,
+                    SQL(", ").join(rows),
+                ))
+        except psycopg2.errors.SerializationFailure:
+            pass
+        return aggregates_by_schedule
+
+    @api.model
+    @api.model
+    @ormcache()
+    def _get_scheduled_product_ids(self):
+        """ Ids of the products having a production schedule, the only ones
+        whose period aggregates are cached. """
+        self.flush_model(['product_id'])
+        self.env.cr.execute("SELECT DISTINCT product_id FROM mrp_production_schedule")
+        return frozenset(product_id for product_id, in self.env.cr.fetchall())
+
+    def _invalidate_period_cache(self, products=None):
+        """ Remove the cached period aggregates of the given products, or all of
+        them if no product is given. The invalidation is logged, so that the rows
+        computed concurrently, and stored after this removal, are not used.
+        Products without a schedule have no cached aggregates and are skipped,
+        so that the moves of the other products cost no query. """
+        if products is not None:
+            scheduled_product_ids = self._get_scheduled_product_ids()
+            products = products.filtered(lambda product: product.id in scheduled_product_ids)
+        if products is None:
+            self.env.cr.execute("""
+                INSERT INTO mrp_production_schedule_period_cache_invalidation (product_id) VALUES (NULL);
+                DELETE FROM mrp_production_schedule_period_cache;
+            """)
+        elif products.ids:
+            self.env.cr.execute(SQL(
+                """
+                INSERT INTO mrp_production_schedule_period_cache_invalidation (product_id)
+                SELECT product.id FROM unnest(%(product_ids)s) AS product(id);
+                DELETE FROM mrp_production_schedule_period_cache WHERE product_id = ANY(%(product_ids)s);
+                """,
+                product_ids=products.ids,
+            ))
+
     def _get_indirect_demand_order(self, indirect_demand_trees):
         """ return a new order for record in self. The order returned ensure
         that the indirect demand from a record in the set could only be modified
@@ -3,6 +3,9 @@
 
 from odoo import api, fields, models
 
+# Fields of the RFQ lines used to compute the incoming quantities of the MPS.
+# The state and the quantity in the product UoM are recomputed when writing the order and the quantity in the line UoM.
+MPS_PURCHASE_LINE_FIELDS = {'product_id', 'product_qty', 'product_uom_qty', 'product_uom', 'date_planned', 'move_dest_ids', 'state'}
 
 class PurchaseOrder(models.Model):
     _inherit = 'purchase.order'
@@ -21,3 +24,33 @@ class PurchaseOrder(models.Model):
                 order.date_planned_mps = min_date.date()
             else:
                 order.date_planned_mps = order.date_order.date()
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'state' in vals or 'picking_type_id' in vals:
+            self.env['mrp.production.schedule']._invalidate_period_cache(self.order_line.product_id)
+        return res
+
+
+class PurchaseOrderLine(models.Model):
+    _inherit = 'purchase.order.line'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        self.env['mrp.production.schedule']._invalidate_period_cache(lines.product_id)
+        return lines
+
+    def write(self, vals):
+        if not MPS_PURCHASE_LINE_FIELDS.intersection(vals):
+            return super().write(vals)
+        products = self.product_id
+        res = super().write(vals)
+        self.env['mrp.production.schedule']._invalidate_period_cache(products | self.product_id)
+        return res
+
+    def unlink(self):
+        products = self.product_id
+        res = super().unlink()
+        self.env['mrp.production.schedule']._invalidate_period_cache(products)
+        return res
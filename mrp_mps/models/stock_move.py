@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import api, models
+
+# Fields of the moves used to compute the incoming and outgoing quantities of the MPS.
+MPS_MOVE_FIELDS = {
+    'product_id', 'product_uom_qty', 'product_qty', 'product_uom', 'quantity', 'state', 'date', 'is_inventory',
+    'location_id', 'location_dest_id', 'location_final_id', 'move_dest_ids', 'rule_id', 'origin_returned_move_id',
+}
+
+
+class StockMove(models.Model):
+    _inherit = 'stock.move'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        moves = super().create(vals_list)
+        self.env['mrp.production.schedule']._invalidate_period_cache(moves.product_id)
+        return moves
+
+    def write(self, vals):
+        if not MPS_MOVE_FIELDS.intersection(vals):
+            return super().write(vals)
+        products = self.product_id
+        res = super().write(vals)
+        self.env['mrp.production.schedule']._invalidate_period_cache(products | self.product_id)
+        return res
+
+    def unlink(self):
+        products = self.product_id
+        res = super().unlink()
+        self.env['mrp.production.schedule']._invalidate_period_cache(products)
+        return res
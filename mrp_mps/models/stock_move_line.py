@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import api, models
+
+# Fields of the move lines the quantity of their move is computed from.
+MPS_MOVE_LINE_FIELDS = {'move_id', 'quantity', 'product_uom_id'}
+
+
+class StockMoveLine(models.Model):
+    _inherit = 'stock.move.line'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        move_lines = super().create(vals_list)
+        self.env['mrp.production.schedule']._invalidate_period_cache(move_lines.move_id.product_id)
+        return move_lines
+
+    def write(self, vals):
+        if not MPS_MOVE_LINE_FIELDS.intersection(vals):
+            return super().write(vals)
+        products = self.move_id.product_id
+        res = super().write(vals)
+        self.env['mrp.production.schedule']._invalidate_period_cache(products | self.move_id.product_id)
+        return res
+
+    def unlink(self):
+        products = self.move_id.product_id
+        res = super().unlink()
+        self.env['mrp.production.schedule']._invalidate_period_cache(products)
+        return res
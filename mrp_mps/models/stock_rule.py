@@ -7,6 +7,13 @@ from odoo import models
 class StockRule(models.Model):
     _inherit = 'stock.rule'
 
+    def write(self, vals):
+        res = super().write(vals)
+        if 'delay' in vals:
+            # The delays of the rules of the moves shift the dates of the MPS incoming and outgoing quantities.
+            self.env['mrp.production.schedule']._invalidate_period_cache()
+        return res
+
     def _make_po_get_domain(self, company_id, values, partner):
         """ Avoid to merge two RFQ for the same MPS replenish. """
         domain = super(StockRule, self)._make_po_get_domain(company_id, values, partner)
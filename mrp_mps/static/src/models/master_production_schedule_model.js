@@ -36,10 +36,17 @@ export class MasterProductionScheduleModel extends EventBus {
         this.notify();
     }
 
+    /**
+     * Reload the given schedule and the schedules of its components, which
+     * depend on it through their indirect demand. The schedules of the
+     * finished products using it are not impacted.
+     * @param {Integer} productionScheduleId mrp.production.schedule Id.
+     * @return {Promise}
+     */
     async reload(productionScheduleId) {
         return await this.orm.call(
             'mrp.production.schedule',
-            'get_impacted_schedule',
+            'get_supplied_schedule',
             [productionScheduleId, this.domain],
         ).then((productionScheduleIds) => {
             productionScheduleIds.push(productionScheduleId);
@@ -635,6 +635,91 @@ class TestMpsMps(common.TransactionCase):
         self.assertEqual(sorted(impacted_schedules), sorted((self.mps_table |
             self.mps_wardrobe | self.mps_table_leg | self.mps_screw | self.mps_bolt).ids))
 
+    def test_supplied_schedule(self):
+        """ Only the schedules of the components are impacted by a change on a
+        schedule, the ones of the finished products are not reloaded. """
+        supplied_schedules = self.mps_drawer.get_supplied_schedule()
+        self.assertEqual(sorted(supplied_schedules), sorted((self.mps_table_leg | self.mps_screw | self.mps_bolt).ids))
+
+        # The state of a component does not depend on the schedules of its components.
+        self.env['mrp.product.forecast'].create({
+            'production_schedule_id': self.mps_table.id,
+            'date': date.today(),
+            'forecast_qty': 1,
+        })
+        screw_state = self.mps_screw.get_production_schedule_view_state()[0]
+        drawer_and_components_state = (self.mps_drawer | self.mps_table_leg | self.mps_screw | self.mps_bolt).get_production_schedule_view_state()
+        self.assertEqual(
+            next(state for state in drawer_and_components_state if state['id'] == self.mps_screw.id)['forecast_ids'],
+            screw_state['forecast_ids'],
+        )
+
+    def test_period_aggregates_cache(self):
+        """ The incoming and outgoing quantities are cached by schedule and
+        updated when the moves of their product change. """
+        def get_cached_schedule_ids():
+            self.env.cr.execute("SELECT production_schedule_id FROM mrp_production_schedule_period_cache")
+            return {schedule_id for schedule_id, in self.env.cr.fetchall()}
+
+        outgoing_move = self.env['stock.move'].create({
+            'name': self.table.name,
+            'product_id': self.table.id,
+            'product_uom_qty': 2,
+            'product_uom': self.table.uom_id.id,
+            'location_id': self.warehouse.lot_stock_id.id,
+            'location_dest_id': self.env.ref('stock.stock_location_customers').id,
+        })
+        outgoing_move._action_confirm()
+        state = self.mps_table.get_production_schedule_view_state()[0]
+        self.assertEqual(state['forecast_ids'][0]['outgoing_qty'], 2)
+        self.assertIn(self.mps_table.id, get_cached_schedule_ids())
+
+        # A move of another product does not invalidate the cache of the table.
+        self.env['stock.move'].create({
+            'name': self.screw.name,
+            'product_id': self.screw.id,
+            'product_uom_qty': 1,
+            'product_uom': self.screw.uom_id.id,
+            'location_id': self.warehouse.lot_stock_id.id,
+            'location_dest_id': self.env.ref('stock.stock_location_customers').id,
+        })
+        self.assertIn(self.mps_table.id, get_cached_schedule_ids())
+
+        outgoing_move.product_uom_qty = 5
+        self.assertNotIn(self.mps_table.id, get_cached_schedule_ids())
+        state = self.mps_table.get_production_schedule_view_state()[0]
+        self.assertEqual(state['forecast_ids'][0]['outgoing_qty'], 5)
+
+        # Stored fields recomputed from other records invalidate the cache too.
+        self.assertIn(self.mps_table.id, get_cached_schedule_ids())
+        self.env['stock.move.line'].create({
+            'move_id': outgoing_move.id,
+            'product_id': self.table.id,
+            'quantity': 1,
+            'location_id': self.warehouse.lot_stock_id.id,
+            'location_dest_id': self.env.ref('stock.stock_location_customers').id,
+        })
+        self.env.flush_all()
+        self.assertNotIn(self.mps_table.id, get_cached_schedule_ids())
+
+        # The moves of the products without schedule don't log any invalidation.
+        def get_invalidations_count():
+            self.env.cr.execute("SELECT COUNT(*) FROM mrp_production_schedule_period_cache_invalidation")
+            return self.env.cr.fetchone()[0]
+
+        unscheduled_product = self.env['product.product'].create({'name': 'Unscheduled', 'is_storable': True})
+        invalidations_count = get_invalidations_count()
+        self.env['stock.move'].create({
+            'name': unscheduled_product.name,
+            'product_id': unscheduled_product.id,
+            'product_uom_qty': 1,
+            'product_uom': unscheduled_product.uom_id.id,
+            'location_id': self.warehouse.lot_stock_id.id,
+            'location_dest_id': self.env.ref('stock.stock_location_customers').id,
+        })._action_confirm()
+        self.env.flush_all()
+        self.assertEqual(get_invalidations_count(), invalidations_count)
+
     def test_3_steps(self):
         self.warehouse.manufacture_steps = 'pbm_sam'
         self.table_leg.write({
@@ -3,6 +3,7 @@
 
 import logging
 from dateutil.relativedelta import relativedelta
+from time import perf_counter
 from markupsafe import escape, Markup
 from psycopg2.extensions import TransactionRollbackError
 from collections import defaultdict
@@ -1149,15 +1150,56 @@ class SaleOrder(models.Model):
         }
 
     def _compute_kpi(self):
-        for subscription in self:
-            delta_1month = subscription._get_subscription_delta(fields.Date.today() - relativedelta(months=1))
-            delta_3months = subscription._get_subscription_delta(fields.Date.today() - relativedelta(months=3))
-            subscription.write({
-                'kpi_1month_mrr_delta': delta_1month['delta'],
-                'kpi_1month_mrr_percentage': delta_1month['percentage'],
-                'kpi_3months_mrr_delta': delta_3months['delta'],
-                'kpi_3months_mrr_percentage': delta_3months['percentage'],
-            })
+        """ Update the MRR deltas of the subscriptions over the last month and the last 3 months. The deltas are
+        computed as in '_get_subscription_delta', from the last log of each subscription before each of these dates,
+        for all the subscriptions in a single query. The subscriptions are then written by identical values, in a
+        single write per group, so that the alerts on these values are still triggered for each of them.
+        """
+        if not self:
+            return
+        self.flush_model(['recurring_monthly'])
+        self.env['sale.order.log'].flush_model(['order_id', 'event_type', 'event_date', 'recurring_monthly'])
+        today = fields.Date.today()
+        self.env.cr.execute("""
+            WITH last_log AS (
+                SELECT DISTINCT ON (log.order_id, period.months)
+                       log.order_id, period.months, log.recurring_monthly
+                  FROM sale_order_log log
+                  JOIN (VALUES (1, %(date_1month)s::date), (3, %(date_3months)s::date)) AS period(months, date)
+                    ON log.event_date <= period.date
+                 WHERE log.order_id IN %(order_ids)s
+                   AND log.event_type IN ('0_creation', '1_expansion', '15_contraction', '2_transfer')
+              ORDER BY log.order_id, period.months, log.event_date DESC, log.id DESC
+            )
+            SELECT last_log.order_id,
+                   last_log.months,
+                   COALESCE(so.recurring_monthly, 0) - last_log.recurring_monthly,
+                   CASE WHEN last_log.recurring_monthly = 0 THEN 100
+                        ELSE (COALESCE(so.recurring_monthly, 0) - last_log.recurring_monthly) / last_log.recurring_monthly
+                   END
+              FROM last_log
+              JOIN sale_order so ON so.id = last_log.order_id
+        """, {
+            'order_ids': tuple(self.ids),
+            'date_1month': today - relativedelta(months=1),
+            'date_3months': today - relativedelta(months=3),
+        })
+        kpis = defaultdict(lambda: {
+            'kpi_1month_mrr_delta': False,
+            'kpi_1month_mrr_percentage': False,
+            'kpi_3months_mrr_delta': False,
+            'kpi_3months_mrr_percentage': False,
+        })
+        for order_id, months, delta, percentage in self.env.cr.fetchall():
+            period = '1month' if months == 1 else '3months'
+            kpis[order_id][f'kpi_{period}_mrr_delta'] = float(delta)
+            kpis[order_id][f'kpi_{period}_mrr_percentage'] = float(percentage)
+
+        subscription_ids_by_kpi = defaultdict(list)
+        for subscription_id in self.ids:
+            subscription_ids_by_kpi[tuple(kpis[subscription_id].items())].append(subscription_id)
+        for kpi, subscription_ids in subscription_ids_by_kpi.items():
+            self.browse(subscription_ids).write(dict(kpi))
 
     def _get_portal_return_action(self):
         """ Return the action used to display orders when returning from customer portal. """
@@ -1176,6 +1218,9 @@ class SaleOrder(models.Model):
         deferred_journal = self.env.company.deferred_revenue_journal_id
         if not deferred_account or not deferred_journal:
             raise ValidationError(_("The deferred settings are not properly set. Please complete them to generate subscription deferred revenues"))
+        bulk_batch_size = int(self.env['ir.config_parameter'].sudo().get_param('sale_subscription.bulk_invoicing_batch_size', 0))
+        if bulk_batch_size:
+            return self.with_context(subscription_bulk_invoicing=True)._create_recurring_invoice(batch_size=bulk_batch_size)
         return self._create_recurring_invoice()
 
     def _get_invoiceable_lines(self, final=False):
@@ -1455,9 +1500,77 @@ class SaleOrder(models.Model):
     def _subscription_launch_cron_parallel(self, batch_size):
         self.env.ref('sale_subscription.account_analytic_cron_for_invoice')._trigger()
 
+    def _handle_recurring_invoice_error(self, exc):
+        """ Notify the responsible of each subscription of self that its invoice could not be created. """
+        for sub in self:
+            email_context = sub._get_subscription_mail_payment_context()
+            error_message = _("Error during renewal of contract %s (Payment not recorded)", sub.name)
+            _logger.exception(error_message)
+            body = self._get_traceback_body(exc, error_message)
+            mail = self.env['mail.mail'].sudo().create(
+                {'body_html': body, 'subject': error_message,
+                 'email_to': email_context['responsible_email'], 'auto_delete': True})
+            mail.send()
+
+    def _create_recurring_invoice_bulk(self, auto_commit):
+        """ Create and post at once the invoices of the subscriptions of self, which are neither consolidated nor
+        paid by token. The subscriptions are invoiced one by one if the invoices can't be created or posted at once.
+
+        :return: the invoices and the durations of the creation and the posting of the invoices
+        """
+        start = perf_counter()
+        try:
+            with self.env.cr.savepoint():
+                invoices = self.with_context(recurring_automatic=True)._create_invoices(grouped=True, final=True)
+        except Exception as e:
+            if not auto_commit and isinstance(e, TransactionRollbackError):
+                raise
+            invoices = self.env['account.move']
+            for subscription in self:
+                try:
+                    with self.env.cr.savepoint():
+                        invoices |= subscription.with_context(recurring_automatic=True)._create_invoices(final=True)
+                except Exception as e:
+                    if not auto_commit and isinstance(e, TransactionRollbackError):
+                        raise
+                    subscription._handle_recurring_invoice_error(e)
+        self._subscription_commit_cursor(auto_commit)
+        create_duration = perf_counter() - start
+
+        start = perf_counter()
+        subscriptions = invoices.line_ids.subscription_id
+        # Set the contracts in exception. If something go wrong, the exception remains.
+        subscriptions.with_context(mail_notrack=True).write({'payment_exception': True})
+        try:
+            with self.env.cr.savepoint():
+                subscriptions.with_context(recurring_automatic=True)._process_auto_invoice(invoices)
+        except Exception as e:
+            if not auto_commit and isinstance(e, TransactionRollbackError):
+                raise
+            for invoice in invoices:
+                invoice_subscriptions = invoice.line_ids.subscription_id
+                try:
+                    with self.env.cr.savepoint():
+                        invoice_subscriptions.with_context(recurring_automatic=True)._handle_automatic_invoices(invoice, auto_commit)
+                except Exception as e:
+                    if not auto_commit and isinstance(e, TransactionRollbackError):
+                        raise
+                    # The invoice stays in draft and the contracts in exception, as when invoicing them one by one
+                    name_list = [f"{sub.name} {sub.client_order_ref}" for sub in invoice_subscriptions]
+                    _logger.exception("Error during renewal of contract %s", "; ".join(name_list))
+        invoices = invoices.exists()
+        invoices.filtered(lambda inv: inv.state != 'draft').line_ids.subscription_id\
+            .with_context(mail_notrack=True).payment_exception = False
+        self._subscription_commit_cursor(auto_commit)
+        return invoices, create_duration, perf_counter() - start
+
     def _create_recurring_invoice(self, batch_size=30):
         today = fields.Date.today()
         auto_commit = not bool(config['test_enable'] or config['test_file'])
+        # The subscriptions that are neither consolidated nor paid by token are invoiced at once, see
+        # '_create_recurring_invoice_bulk'.
+        bulk_invoicing = self.env.context.get('subscription_bulk_invoicing')
+        start = perf_counter()
         grouped_invoice = self.env['ir.config_parameter'].get_param('sale_subscription.invoice_consolidation', False)
         all_subscriptions, need_cron_trigger = self._recurring_invoice_get_subscriptions(grouped=grouped_invoice, batch_size=batch_size)
         if not all_subscriptions:
@@ -1484,6 +1597,7 @@ class SaleOrder(models.Model):
             all_subscriptions -= self.env['sale.order'].browse(order_to_remove_ids)
         lines_to_reset_qty = self.env['sale.order.line']
         account_moves = self.env['account.move']
+        bulk_subscriptions = self.env['sale.order']
         move_to_send_ids = []
         # Set quantity to invoice before the invoice creation. If something goes wrong, the line will appear as "to invoice"
         # It prevents the use of _compute method and compare the today date and the next_invoice_date in the compute which would be bad for perfs
@@ -1529,6 +1643,11 @@ class SaleOrder(models.Model):
                             updatable_invoice_date._subscription_post_success_free_renewal()
                     continue
 
+                if bulk_invoicing and len(subscription) == 1 and not subscription.payment_token_id:
+                    bulk_subscriptions |= subscription
+                    lines_to_reset_qty |= invoiceable_lines
+                    continue
+
                 try:
                     invoice = subscription.with_context(recurring_automatic=True)._create_invoices(final=True)
                     lines_to_reset_qty |= invoiceable_lines
@@ -1538,15 +1657,7 @@ class SaleOrder(models.Model):
                         raise
                     # we suppose that the payment is run only once a day
                     self._subscription_rollback_cursor(auto_commit)
-                    for sub in subscription:
-                        email_context = sub._get_subscription_mail_payment_context()
-                        error_message = _("Error during renewal of contract %s (Payment not recorded)", sub.name)
-                        _logger.exception(error_message)
-                        body = self._get_traceback_body(e, error_message)
-                        mail = self.env['mail.mail'].sudo().create(
-                            {'body_html': body, 'subject': error_message,
-                             'email_to': email_context['responsible_email'], 'auto_delete': True})
-                        mail.send()
+                    subscription._handle_recurring_invoice_error(e)
                     continue
                 self._subscription_commit_cursor(auto_commit)
                 # Handle automatic payment or invoice posting
@@ -1564,8 +1675,24 @@ class SaleOrder(models.Model):
                 _logger.exception("Error during renewal of contract %s", "; ".join(name_list))
                 self._subscription_rollback_cursor(auto_commit)
         self._subscription_commit_cursor(auto_commit)
+        prepare_duration = perf_counter() - start
+        create_duration = post_duration = 0.0
+        if bulk_subscriptions:
+            bulk_invoices, create_duration, post_duration = bulk_subscriptions._create_recurring_invoice_bulk(auto_commit)
+            account_moves |= bulk_invoices
+            move_to_send_ids += bulk_invoices.ids
+        start = perf_counter()
         self._process_invoices_to_send(self.env['account.move'].browse(move_to_send_ids))
         self._subscription_commit_cursor(auto_commit)
+        send_duration = perf_counter() - start
+        total_duration = prepare_duration + create_duration + post_duration + send_duration
+        _logger.info(
+            "Recurring invoicing: %s invoices created for %s subscriptions in %.2fs (%.1f invoices/s), "
+            "%s invoiced at once. Prepare and invoice one by one: %.2fs, create at once: %.2fs, "
+            "post at once: %.2fs, send: %.2fs",
+            len(account_moves), len(all_subscriptions), total_duration, len(account_moves) / (total_duration or 1),
+            len(bulk_subscriptions), prepare_duration, create_duration, post_duration, send_duration,
+        )
         # There is still some subscriptions to process. Then, make sure the CRON will be triggered again asap.
         if need_cron_trigger:
             self._subscription_launch_cron_parallel(batch_size)
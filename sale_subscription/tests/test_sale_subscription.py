@@ -117,6 +117,45 @@ class TestSubscription(TestSubscriptionCommon, MockEmail):
             self.assertEqual(invoice_periods, "1 Months 03/03/2021 to 04/02/2021")
             self.assertEqual(inv.invoice_line_ids[0].date, datetime.date(2021, 3, 3))
 
+    def test_bulk_invoicing(self):
+        self.env['ir.config_parameter'].sudo().set_param('sale_subscription.bulk_invoicing_batch_size', 100)
+        subscriptions = self.subscription | self.subscription.copy()
+        with freeze_time("2021-01-03"):
+            subscriptions.write({'start_date': False, 'next_invoice_date': False})
+            subscriptions.action_confirm()
+            self.env['sale.order']._cron_recurring_create_invoice()
+            for subscription in subscriptions:
+                self.assertEqual(len(subscription.invoice_ids), 1, "Each subscription should have its own invoice")
+                self.assertEqual(subscription.invoice_ids.state, 'posted')
+                self.assertEqual(subscription.next_invoice_date, datetime.date(2021, 2, 3))
+                self.assertFalse(subscription.payment_exception)
+            self.assertEqual(subscriptions.invoice_ids.line_ids.subscription_id, subscriptions)
+
+    def test_bulk_invoicing_posting_error(self):
+        """ When the invoices can't be posted at once, they are posted one by one; one of them failing doesn't prevent posting
+        the others. """
+        self.env['ir.config_parameter'].sudo().set_param('sale_subscription.bulk_invoicing_batch_size', 100)
+        failing_subscription = self.subscription
+        subscriptions = failing_subscription | failing_subscription.copy()
+        process_auto_invoice = SaleOrder._process_auto_invoice
+
+        def _process_auto_invoice(self, invoice):
+            if failing_subscription in invoice.line_ids.subscription_id:
+                raise UserError("Posting error")
+            return process_auto_invoice(self, invoice)
+
+        with freeze_time("2021-01-03"):
+            subscriptions.write({'start_date': False, 'next_invoice_date': False})
+            subscriptions.action_confirm()
+            with patch.object(SaleOrder, '_process_auto_invoice', _process_auto_invoice), \
+                    mute_logger('odoo.addons.sale_subscription.models.sale_order'):
+                self.env['sale.order']._cron_recurring_create_invoice()
+            self.assertEqual(failing_subscription.invoice_ids.state, 'draft')
+            self.assertTrue(failing_subscription.payment_exception)
+            other_subscription = subscriptions - failing_subscription
+            self.assertEqual(other_subscription.invoice_ids.state, 'posted')
+            self.assertFalse(other_subscription.payment_exception)
+
     @mute_logger('odoo.addons.base.models.ir_model', 'odoo.models')
     def test_template(self):
         """ Test behaviour of on_change_template """
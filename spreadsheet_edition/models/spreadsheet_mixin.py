@@ -7,6 +7,7 @@ import psycopg2
 import uuid
 
 from datetime import timedelta
+from time import perf_counter
 from typing import Dict, Any, List, Optional
 
 from odoo import _, fields, models, api
@@ -84,12 +85,13 @@ class SpreadsheetMixin(models.AbstractModel):
         - whether the user can edit the content of the spreadsheet or not
         """
         self.ensure_one()
+        start = perf_counter()
         self._check_collaborative_spreadsheet_access("read", access_token)
         can_write = self._check_collaborative_spreadsheet_access(
             "write", access_token, raise_exception=False
         )
         spreadsheet_sudo = self.sudo()
-        return {
+        session = {
             "id": spreadsheet_sudo.id,
             "name": spreadsheet_sudo.display_name or "",
             "data": spreadsheet_sudo._get_spreadsheet_snapshot(),
@@ -101,6 +103,13 @@ class SpreadsheetMixin(models.AbstractModel):
             "company_colors": self._get_context_company_colors(),
             "writable_rec_name_field": self._get_writable_record_name_field(),
         }
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug(
+                "Joined spreadsheet session %s in %.3fs: %d revisions, snapshot of %d bytes, revisions of %d bytes",
+                self, perf_counter() - start, len(session["revisions"]),
+                len(json.dumps(session["data"])), len(json.dumps(session["revisions"])),
+            )
+        return session
 
     def dispatch_spreadsheet_message(self, message: CollaborationMessage, access_token=None):
         """This is the entry point of collaborative editing.
@@ -241,10 +250,35 @@ class SpreadsheetMixin(models.AbstractModel):
         return json.loads(snapshot_attachment.raw or '{}')
 
     def _should_be_snapshotted(self):
-        if not self.spreadsheet_revision_ids:
+        """Whether the next client joining the session with write access should
+        fold the pending revisions into a new snapshot. See snapshotting.md.
+
+        This is the case when nobody modified the spreadsheet for 2 hours, or
+        when the spreadsheet has accumulated many revisions older than a few
+        minutes since its last snapshot, even if it is still being modified. The
+        snapshot contains all the revisions, so the users still connected can't
+        undo their previous commands anymore.
+        """
+        self.ensure_one()
+        revision_domain = [("res_model", "=", self._name), ("res_id", "=", self.id)]
+        [(count, last_activity)] = self.env["spreadsheet.revision"]._read_group(
+            revision_domain,
+            aggregates=["__count", "create_date:max"],
+        )
+        if not count:
+            return False
+        now = fields.Datetime.now()
+        if last_activity < now - timedelta(hours=2):
+            return True
+        ICP = self.env["ir.config_parameter"].sudo()
+        revisions_threshold = int(ICP.get_param("spreadsheet_edition.snapshot_revisions_threshold", 1000))
+        if count < revisions_threshold:
             return False
-        last_activity = max(self.spreadsheet_revision_ids.mapped("create_date"))
-        return last_activity < fields.Datetime.now() - timedelta(hours=2)
+        revisions_min_age = int(ICP.get_param("spreadsheet_edition.snapshot_revisions_min_age_minutes", 15))
+        old_revisions_count = self.env["spreadsheet.revision"].search_count(
+            revision_domain + [("create_date", "<", now - timedelta(minutes=revisions_min_age))]
+        )
+        return old_revisions_count >= revisions_threshold
 
     def _save_concurrent_revision(self, next_revision_uuid, parent_revision_uuid, commands):
         """Save the given revision if no concurrency issue is found.
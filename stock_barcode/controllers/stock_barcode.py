@@ -6,7 +6,7 @@ from odoo import fields, http, _
 from odoo.http import request
 from odoo.exceptions import UserError
 from odoo.osv import expression
-from odoo.tools import pdf, split_every
+from odoo.tools import SQL, pdf, split_every
 from odoo.tools.misc import file_open
 
 
@@ -31,33 +31,36 @@ class StockBarcodeController(http.Controller):
         elif parsed_results:
             barcode = parsed_results.get('code', barcode)
 
-        if not barcode_type:
+        # Only search the records of the models where the barcode may be found
+        barcode_models = self._get_main_menu_barcode_models(barcode)
+        if not barcode_type and 'stock.picking' in barcode_models:
             ret_open_picking = self._try_open_picking(barcode)
             if ret_open_picking:
                 return ret_open_picking
 
+        if not barcode_type:
             ret_open_picking_type = self._try_open_picking_type(barcode)
             if ret_open_picking_type:
                 return ret_open_picking_type
 
-        if request.env.user.has_group('stock.group_stock_multi_locations') and \
+        if request.env.user.has_group('stock.group_stock_multi_locations') and 'stock.location' in barcode_models and \
            (not barcode_type or barcode_type in ['location', 'dest_location']):
             ret_new_internal_picking = self._try_new_internal_picking(barcode)
             if ret_new_internal_picking:
                 return ret_new_internal_picking
 
-        if not barcode_type or barcode_type == 'product':
+        if 'product.product' in barcode_models and (not barcode_type or barcode_type == 'product'):
             ret_open_product_location = self._try_open_product_location(barcode)
             if ret_open_product_location:
                 return ret_open_product_location
 
-        if request.env.user.has_group('stock.group_production_lot') and \
+        if request.env.user.has_group('stock.group_production_lot') and 'stock.lot' in barcode_models and \
            (not barcode_type or barcode_type == 'lot'):
             ret_open_lot = self._try_open_lot(barcode)
             if ret_open_lot:
                 return ret_open_lot
 
-        if request.env.user.has_group('stock.group_tracking_lot') and \
+        if request.env.user.has_group('stock.group_tracking_lot') and 'stock.quant.package' in barcode_models and \
            (not barcode_type or barcode_type == 'package'):
             ret_open_package = self._try_open_package(barcode)
             if ret_open_package:
@@ -169,37 +172,18 @@ class StockBarcodeController(http.Controller):
             barcodes = kwargs.get('barcodes') or [kwargs.get('barcode')]
             barcodes_by_model = {model_name: barcodes for model_name in barcode_field_by_model.keys()}
 
-        for model_name, barcodes in barcodes_by_model.items():
-            if not barcodes:
-                continue
-            barcode_field = request.env[model_name]._barcode_field
-            domain = [(barcode_field, 'in', barcodes)]
-
-            if nomenclature.is_gs1_nomenclature:
-                # If we use GS1 nomenclature, the domain might need some adjustments.
-                converted_barcodes_domain = []
-                unconverted_barcodes = []
-                for barcode in set(barcodes):
-                    try:
-                        # If barcode is digits only, cut off the padding to keep the original barcode only.
-                        barcode = str(int(barcode))
-                        if converted_barcodes_domain:
-                            converted_barcodes_domain = expression.OR([
-                                converted_barcodes_domain,
-                                [(barcode_field, 'ilike', barcode)]
-                            ])
-                        else:
-                            converted_barcodes_domain = [(barcode_field, 'ilike', barcode)]
-                    except ValueError:
-                        unconverted_barcodes.append(barcode)
-                        pass  # Barcode isn't digits only.
-                if converted_barcodes_domain:
-                    domain = converted_barcodes_domain
-                    if unconverted_barcodes:
-                        domain = expression.OR([
-                            domain,
-                            [(barcode_field, 'in', unconverted_barcodes)]
-                        ])
+        barcodes_by_model = {model_name: barcodes for model_name, barcodes in barcodes_by_model.items() if barcodes}
+        if nomenclature.is_gs1_nomenclature:
+            # If we use GS1 nomenclature, the domain might need some adjustments.
+            domain_by_model = self._get_gs1_barcode_domain_by_model(barcodes_by_model)
+        else:
+            domain_by_model = {
+                model_name: [(request.env[model_name]._barcode_field, 'in', barcodes)]
+                for model_name, barcodes in barcodes_by_model.items()
+            }
+
+        for model_name in barcodes_by_model:
+            domain = domain_by_model[model_name]
             # Adds additionnal domain if applicable.
             domain_for_this_model = domains_by_model.get(model_name)
             if domain_for_this_model:
@@ -231,42 +215,58 @@ class StockBarcodeController(http.Controller):
         nomenclature = request.env.company.nomenclature_id
         result = defaultdict(list)
 
-        for model_name, barcodes in kwargs.items():
-            barcode_field = request.env[model_name]._barcode_field
-            domain = [(barcode_field, 'in', barcodes)]
-
-            if nomenclature.is_gs1_nomenclature:
-                # If we use GS1 nomenclature, the domain might need some adjustments.
-                converted_barcodes_domain = []
-                unconverted_barcodes = []
-                for barcode in barcodes:
-                    try:
-                        # If barcode is digits only, cut off the padding to keep the original barcode only.
-                        barcode = str(int(barcode))
-                        if converted_barcodes_domain:
-                            converted_barcodes_domain = expression.OR([
-                                converted_barcodes_domain,
-                                [(barcode_field, 'ilike', barcode)]
-                            ])
-                        else:
-                            converted_barcodes_domain = [(barcode_field, 'ilike', barcode)]
-                    except ValueError:
-                        unconverted_barcodes.append(barcode)
-                        pass  # Barcode isn't digits only.
-                if converted_barcodes_domain:
-                    domain = converted_barcodes_domain
-                    if unconverted_barcodes:
-                        domain = expression.OR([
-                            domain,
-                            [(barcode_field, 'in', unconverted_barcodes)]
-                        ])
+        if nomenclature.is_gs1_nomenclature:
+            # If we use GS1 nomenclature, the domain might need some adjustments.
+            domain_by_model = self._get_gs1_barcode_domain_by_model(kwargs)
+        else:
+            domain_by_model = {
+                model_name: [(request.env[model_name]._barcode_field, 'in', barcodes)]
+                for model_name, barcodes in kwargs.items()
+            }
 
-            records = request.env[model_name].search(domain)
+        for model_name in kwargs:
+            records = request.env[model_name].search(domain_by_model[model_name])
             fetched_data = self._get_records_fields_stock_barcode(records)
             for f_model_name in fetched_data:
                 result[f_model_name] = result[f_model_name] + fetched_data[f_model_name]
         return result
 
+    def _get_gs1_barcode_domain_by_model(self, barcodes_by_model):
+        """ Get the domain to search the records of each model for the given barcodes, with the
+        GS1 nomenclature: the barcodes made of digits only are zero padded, they are matched
+        whatever the leading zeros of the records' barcodes.
+
+        The records of the models with a normalized barcode index are looked up in a single
+        query for all these models. The domains are then used to search them, so that the
+        access rights and the additional domains still apply.
+
+        :param barcodes_by_model: dict of model_name -> barcode list
+        :return: dict of model_name -> domain
+        """
+        domain_by_model = {}
+        lookup_queries = []
+        for model_name, barcodes in barcodes_by_model.items():
+            Model = request.env[model_name]
+            barcode_field = Model._barcode_field
+            # If barcode is digits only, cut off the padding to keep the original barcode only.
+            digit_barcodes = {barcode for barcode in barcodes if barcode.isdigit()}
+            domain = [(barcode_field, 'in', [barcode for barcode in barcodes if barcode not in digit_barcodes])]
+            if digit_barcodes and hasattr(Model, '_get_normalized_barcode_lookup_query'):
+                lookup_queries.append(Model._get_normalized_barcode_lookup_query(digit_barcodes))
+            elif digit_barcodes:
+                domain = expression.OR([domain] + [
+                    [(barcode_field, 'ilike', str(int(barcode)))] for barcode in digit_barcodes
+                ])
+            domain_by_model[model_name] = domain
+
+        if lookup_queries:
+            ids_by_model = defaultdict(list)
+            for model_name, record_id in request.env.execute_query(SQL(" UNION ALL ").join(lookup_queries)):
+                ids_by_model[model_name].append(record_id)
+            for model_name, ids in ids_by_model.items():
+                domain_by_model[model_name] = expression.OR([domain_by_model[model_name], [('id', 'in', ids)]])
+        return domain_by_model
+
     @http.route('/stock_barcode/rid_of_message_demo_barcodes', type='json', auth='user')
     def rid_of_message_demo_barcodes(self, **kw):
         """ Edit the main_menu client action so that it doesn't display the 'print demo barcodes sheet' message """
@@ -300,6 +300,23 @@ class StockBarcodeController(http.Controller):
 
         return request.make_response(merged_pdf, headers=pdfhttpheaders)
 
+    def _get_main_menu_barcode_models(self, barcode):
+        """ Return the names of the models, among the ones searched by `main_menu` through their
+        barcode, having records whose barcode may be the scanned one. They are looked up in a single
+        query using their normalized barcode index, which also matches the barcodes differing by their
+        leading zeros: the records are then searched as usual, with the access rights, in these models only.
+        """
+        lookup_queries = [
+            request.env[model_name]._get_normalized_barcode_lookup_query([barcode])
+            for model_name in ('stock.picking', 'stock.location', 'product.product', 'stock.lot', 'stock.quant.package')
+        ]
+        return {
+            model_name
+            for [model_name] in request.env.execute_query(
+                SQL("SELECT DISTINCT lookup.model FROM (%s) AS lookup", SQL(" UNION ALL ").join(lookup_queries))
+            )
+        }
+
     def _try_open_lot(self, barcode):
         """ If barcode represent a lot, open a form view to show all
         the details of this lot.
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+from . import stock_barcode_lookup_mixin
 from . import stock_picking
 from . import stock_picking_type
 from . import stock_quant
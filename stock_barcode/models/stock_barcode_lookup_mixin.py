@@ -0,0 +1,41 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import models
+from odoo.tools import SQL, create_index
+
+
+class StockBarcodeLookupMixin(models.AbstractModel):
+    """ Index the barcode field of a model without its leading zeros, so that the barcodes
+    scanned with the GS1 nomenclature (which pads them with zeros) can be resolved with an
+    indexed lookup. See ``_get_normalized_barcode_lookup_query``.
+    """
+    _name = 'stock.barcode.lookup.mixin'
+    _description = 'Normalized Barcode Lookup'
+
+    def init(self):
+        super().init()
+        if self._abstract:
+            return
+        create_index(
+            self.env.cr,
+            f'{self._table}_{self._barcode_field}_normalized_index',
+            self._table,
+            [f"ltrim({self._barcode_field}, '0')"],
+        )
+
+    def _get_normalized_barcode_lookup_query(self, barcodes):
+        """ Return the query selecting the model name and the id of the records whose barcode,
+        without its leading zeros, is one of the given barcodes, using the normalized index.
+
+        :param barcodes: iterable of barcodes, usually made of digits only; the records whose barcode
+            is exactly one of them are always selected
+        :rtype: SQL
+        """
+        self.flush_model([self._barcode_field])
+        return SQL(
+            "SELECT %s AS model, id FROM %s WHERE ltrim(%s, '0') IN %s",
+            self._name,
+            SQL.identifier(self._table),
+            SQL.identifier(self._barcode_field),
+            tuple(barcode.lstrip('0') for barcode in barcodes),
+        )
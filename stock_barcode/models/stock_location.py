@@ -5,7 +5,7 @@ from odoo import models, api
 
 
 class Location(models.Model):
-    _inherit = 'stock.location'
+    _inherit = ['stock.location', 'stock.barcode.lookup.mixin']
     _barcode_field = 'barcode'
 
     @api.model
@@ -6,7 +6,7 @@ from odoo.osv import expression
 
 
 class QuantPackage(models.Model):
-    _inherit = 'stock.quant.package'
+    _inherit = ['stock.quant.package', 'stock.barcode.lookup.mixin']
     _barcode_field = 'name'
 
     @api.model
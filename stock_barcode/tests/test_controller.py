@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 import json
+from unittest.mock import patch
 
 from odoo.tests import HttpCase, tagged
 
+from odoo.addons.stock_barcode.controllers.stock_barcode import StockBarcodeController
+
 
 @tagged('post_install', '-at_install')
 class TestStockBarcodeController(HttpCase):
@@ -67,3 +70,58 @@ class TestStockBarcodeController(HttpCase):
                     f"Expected product '{expected_display_name}' for company '{company.name}' "
                     f"(id: {company.id}), but got '{display_name}' instead."
                 )
+
+    def test_search_by_gs1_barcode_with_padding(self):
+        """ With the GS1 nomenclature, the scanned barcodes are zero padded: the records must be
+        found whatever the leading zeros, but a barcode only containing the scanned one must not."""
+        self.env.company.nomenclature_id = self.env.ref('barcodes_gs1_nomenclature.default_gs1_nomenclature')
+        product = self.env['product.product'].create({'name': 'PRO_GTIN_8', 'barcode': '82655853'})
+        self.env['product.product'].create({'name': 'PRO_GTIN_13', 'barcode': '5482655853001'})
+        lot = self.env['stock.lot'].create({'name': 'LOT-001', 'product_id': product.id})
+
+        self.authenticate('admin', 'admin')
+        payload = json.dumps({
+            'jsonrpc': '2.0',
+            'method': 'call',
+            'id': 0,
+            'params': {
+                'barcodes_by_model': {
+                    'product.product': ['00000082655853'],
+                    'stock.lot': ['LOT-001'],
+                },
+            },
+        })
+        response = self.url_open(
+            '/stock_barcode/get_specific_barcode_data',
+            data=payload,
+            headers={'Content-Type': 'application/json'},
+        )
+        result = response.json()['result']
+        self.assertEqual({p['id'] for p in result['product.product']}, {product.id})
+        self.assertEqual({l['id'] for l in result['stock.lot']}, {lot.id})
+
+    def test_main_menu_scan_only_searches_matching_models(self):
+        """ The main menu only searches the models having records whose barcode may be the scanned one. """
+        self.env.ref('base.user_admin').groups_id += self.env.ref('stock.group_production_lot') + self.env.ref('stock.group_tracking_lot')
+        product = self.env['product.product'].create({'name': 'Scanned Product', 'barcode': '0601647855633'})
+
+        def scan_from_main_menu(barcode):
+            payload = json.dumps({'jsonrpc': '2.0', 'method': 'call', 'id': 0, 'params': {'barcode': barcode}})
+            response = self.url_open(
+                '/stock_barcode/scan_from_main_menu',
+                data=payload,
+                headers={'Content-Type': 'application/json'},
+            )
+            return response.json()['result']
+
+        self.authenticate('admin', 'admin')
+        with (
+            patch.object(StockBarcodeController, '_try_open_lot', autospec=True) as try_open_lot,
+            patch.object(StockBarcodeController, '_try_open_package', autospec=True) as try_open_package,
+        ):
+            result = scan_from_main_menu('0601647855633')
+            self.assertEqual(result['action']['domain'], [['product_id', '=', product.id]])
+            result = scan_from_main_menu('UNKNOWN-BARCODE')
+            self.assertIn('warning', result)
+        try_open_lot.assert_not_called()
+        try_open_package.assert_not_called()
@@ -332,3 +332,33 @@ class TestWebGanttReschedule(TestWebGantt):
             '2 moved before 3',
         )
         self.assert_not_replanned(self.pills2_1 | self.pills2_4, self.initial_dates)
+
+    def test_long_dependency_chain_candidates(self):
+        """ The candidates of a long chain of dependencies are computed without recursion, and all the
+            pills of the chain are read together.
+        """
+        start_date = datetime(2021, 5, 1, 8, 0)
+        chain = self.TestWebGanttPill.create([{
+            'name': f'Chain {i}',
+            self.date_start_field_name: start_date + timedelta(days=i),
+            self.date_stop_field_name: start_date + timedelta(days=i, hours=8),
+        } for i in range(1100)])
+        for master, slave in zip(chain, chain[1:]):
+            slave[self.dependency_field_name] = master
+        self.env.invalidate_all()
+
+        candidates_ids = []
+        # 1 for the subgraph, then for each batch of prefetched pills: 2 for the dependencies and 1 for the dates
+        with self.assertQueryCount(7):
+            has_cycle = chain[0]._web_gantt_check_cycle_existance_and_get_rescheduling_candidates(
+                candidates_ids, self.dependency_inverted_field_name,
+                self.date_start_field_name, self.date_stop_field_name,
+            )
+        self.assertFalse(has_cycle)
+        self.assertEqual(candidates_ids, chain.ids)
+
+        chain[0][self.dependency_field_name] = chain[-1]
+        self.assertTrue(chain[0]._web_gantt_check_cycle_existance_and_get_rescheduling_candidates(
+            [], self.dependency_inverted_field_name,
+            self.date_start_field_name, self.date_stop_field_name,
+        ))
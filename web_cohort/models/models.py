@@ -57,9 +57,11 @@ class Base(models.AbstractModel):
         locale = get_lang(self.env).code
 
         domain = expression.AND([domain, [(date_start, '!=', False)]])  # date not set are no take in account
-        row_groups = self._read_group(
+        # The whole matrix of the aggregated values by start and stop periods is read at once, the rows and
+        # columns are then derived from it.
+        matrix_groups = self._read_group(
             domain=domain,
-            groupby=[date_start + ':' + interval],
+            groupby=[date_start + ':' + interval, date_stop + ':' + interval],
             aggregates=measures,
         )
 
@@ -71,21 +73,33 @@ class Base(models.AbstractModel):
             today = date.today()
             convert_method = fields.Date.to_date
 
-        for group_value, sum_value, value in row_groups:
+        # Only sums and counts can be added up from the cells of a row.
+        is_additive = measure == '__count' or measure.endswith(':sum')
+        sum_value_per_row = defaultdict(float)
+        value_per_row = defaultdict(float)
+        matrix = defaultdict(dict)
+        for group_value, stop_value, sum_value, value in matrix_groups:
+            sum_value_per_row[group_value] += sum_value
+            if is_additive:
+                value_per_row[group_value] += value
+            matrix[group_value][convert_method(stop_value) if stop_value else False] = value
+
+        if not is_additive:
+            value_per_row = dict(self._read_group(
+                domain=domain,
+                groupby=[date_start + ':' + interval],
+                aggregates=[measure],
+            ))
+
+        for group_value in sorted(sum_value_per_row):
+            sum_value = sum_value_per_row[group_value]
+            value = value_per_row[group_value]
             total_value += value
             group_domain = expression.AND([
                 domain,
                 ['&', (date_start, '>=', group_value), (date_start, '<', group_value + models.READ_GROUP_TIME_GRANULARITY[interval])]
             ])
-            sub_group = self._read_group(
-                domain=group_domain,
-                groupby=[date_stop + ':' + interval],
-                aggregates=[measure],
-            )
-            sub_group_per_period = {
-                convert_method(group_value): aggregate_value
-                for group_value, aggregate_value in sub_group
-            }
+            sub_group_per_period = matrix[group_value]
 
             columns = []
             initial_value = sum_value
@@ -119,20 +133,27 @@ class Base(models.AbstractModel):
                 # In backward timeline, if columns are out of given range, we need
                 # to set initial value for calculating correct percentage
                 if timeline == 'backward' and col_index == 0:
-                    outside_timeline_domain = expression.AND(
-                        [
-                            group_domain,
-                            ['|',
-                                (date_stop, '=', False),
-                                (date_stop, '>=', fields.Datetime.to_string(col_start_date)),
+                    if is_additive:
+                        initial_value = sum(
+                            stop_value
+                            for stop_period, stop_value in sub_group_per_period.items()
+                            if not stop_period or stop_period >= col_start_date
+                        )
+                    else:
+                        outside_timeline_domain = expression.AND(
+                            [
+                                group_domain,
+                                ['|',
+                                    (date_stop, '=', False),
+                                    (date_stop, '>=', fields.Datetime.to_string(col_start_date)),
+                                ]
                             ]
-                        ]
-                    )
-                    col_group = self._read_group(
-                        domain=outside_timeline_domain,
-                        aggregates=[measure],
-                    )
-                    initial_value = float(col_group[0][0])
+                        )
+                        col_group = self._read_group(
+                            domain=outside_timeline_domain,
+                            aggregates=[measure],
+                        )
+                        initial_value = float(col_group[0][0])
                     initial_churn_value = sum_value - initial_value
 
                 previous_col_remaining_value = initial_value if col_index == 0 else columns[-1]['value']
@@ -89,3 +89,31 @@ class TestViews(ViewCase):
              relativedelta(months=3)).replace(day=1)),
         ]
         self.assertEqual(second_row['domain'], expected_period_domain)
+
+    def test_cohort_data_backward(self):
+        self.env['ir.model'].create({
+            'name': 'Stuff',
+            'model': 'x_stuff',
+            'field_id': [
+                Command.create(
+                    {'name': 'x_date_start', 'ttype': 'date', 'field_description': 'Start Date'}),
+                Command.create(
+                    {'name': 'x_date_stop', 'ttype': 'date', 'field_description': 'End Date'}),
+            ]
+        })
+        # the 16 columns of the backward timeline start 15 months before the start
+        start = fields.Date.today() - relativedelta(months=24)
+        self.env['x_stuff'].create([
+            {'x_date_start': start, 'x_date_stop': start - relativedelta(months=20)},
+            {'x_date_start': start, 'x_date_stop': start - relativedelta(months=2)},
+            {'x_date_start': start, 'x_date_stop': start + relativedelta(months=3)},
+            {'x_date_start': start},
+        ])
+
+        cohort = self.env['x_stuff'].get_cohort_data(
+            'x_date_start', 'x_date_stop', '__count', 'month', [], 'retention', 'backward')
+        row = cohort['rows'][0]
+        self.assertEqual(row['value'], 4)
+        # the stuff ending 20 months before its start is out of the timeline
+        self.assertEqual([col['value'] for col in row['columns']], [3] * 13 + [2] * 3)
+        self.assertEqual(row['columns'][0]['churn_value'], 1)
@@ -6,7 +6,7 @@ from lxml.builder import E
 
 from odoo import api, fields, models
 from odoo.exceptions import UserError
-from odoo.tools import _, unique, OrderedSet
+from odoo.tools import _, unique, OrderedSet, SQL
 
 
 class Base(models.AbstractModel):
@@ -522,6 +522,9 @@ class Base(models.AbstractModel):
 
     def _web_gantt_move_candidates(self, start_date_field_name, stop_date_field_name, dependency_field_name, dependency_inverted_field_name, search_forward, candidates_ids, date_candidate=None, all_candidates_ids=None, move_not_in_conflicts_candidates=False):
         """ Move candidates according to the provided parameters.
+            The dates of the candidates are computed and written one after the other, in the topological order: the
+            dates of a candidate depend on the new dates of its dependencies, and the overrides of
+            _web_gantt_reschedule_compute_dates rely on the candidates already written (e.g. the work center leaves).
 
             :param start_date_field_name: The start date field used in the gantt view.
             :param stop_date_field_name: The stop date field used in the gantt view.
@@ -650,20 +653,72 @@ class Base(models.AbstractModel):
             visited = set()
         if ancestors is None:
             ancestors = []
-        visited.add(self.id)
-        ancestors.append(self.id)
-        for child in self[dependency_field_name]:
-            if child.id in ancestors:
-                return True
+        # Browse the whole dependency subgraph at once, so that the dependencies and dates of its records are prefetched
+        # together instead of level by level.
+        records_per_id = {record.id: record for record in self._web_gantt_get_dependency_subgraph(dependency_field_name)}
+        record = records_per_id.get(self.id, self)
+        new_candidates_ids = []
+        ancestors_ids = set(ancestors)
+        visited.add(record.id)
+        ancestors.append(record.id)
+        ancestors_ids.add(record.id)
+        # Iterative depth first search, to cope with long chains of dependencies
+        stack = [(record, iter(record[dependency_field_name]))]
+        while stack:
+            record, children = stack[-1]
+            for child in children:
+                if child.id in ancestors_ids:
+                    return True
+
+                if child.id not in visited and child.id not in candidates_to_exclude:
+                    child = records_per_id.get(child.id, child)
+                    visited.add(child.id)
+                    ancestors.append(child.id)
+                    ancestors_ids.add(child.id)
+                    stack.append((child, iter(child[dependency_field_name])))
+                    break
+            else:
+                stack.pop()
+                ancestors_ids.discard(ancestors.pop())
+                if record._web_gantt_reschedule_is_record_candidate(start_date_field_name, stop_date_field_name) and record.id not in candidates_to_exclude:
+                    new_candidates_ids.append(record.id)
 
-            if child.id not in visited and child.id not in candidates_to_exclude and child._web_gantt_check_cycle_existance_and_get_rescheduling_candidates(candidates_ids, dependency_field_name, start_date_field_name, stop_date_field_name, candidates_to_exclude, visited, ancestors):
-                return True
+        candidates_ids[:0] = reversed(new_candidates_ids)
+        return False
 
-        ancestors.pop()
-        if self._web_gantt_reschedule_is_record_candidate(start_date_field_name, stop_date_field_name) and self.id not in candidates_to_exclude:
-            candidates_ids.insert(0, self.id)
+    def _web_gantt_get_dependency_subgraph(self, dependency_field_name):
+        """ Get the records in self and all the records they depend on, directly or not, through the given field.
 
-        return False
+            The subgraph of a stored many2many field is read in a single query, the records not accessible through
+            the field (e.g. archived ones) are only filtered out when reading the field on their dependent records.
+
+            :param dependency_field_name: The field name of the relation between the records.
+            :return: the records of the subgraph, self first
+        """
+        field = self._fields[dependency_field_name]
+        if field.type != 'many2many' or not field.store or not self.ids:
+            return self
+        self.flush_model([dependency_field_name])
+        dependency_ids = [dependency_id for dependency_id, in self.env.execute_query(SQL(
+            """
+            WITH RECURSIVE dependency(id) AS (
+                SELECT %(column2)s
+                  FROM %(relation)s
+                 WHERE %(column1)s IN %(ids)s
+                 UNION
+                SELECT relation.%(column2)s
+                  FROM %(relation)s relation
+                  JOIN dependency
+                    ON relation.%(column1)s = dependency.id
+            )
+            SELECT id FROM dependency
+            """,
+            relation=SQL.identifier(field.relation),
+            column1=SQL.identifier(field.column1),
+            column2=SQL.identifier(field.column2),
+            ids=tuple(self.ids),
+        ))]
+        return self.browse(unique(self.ids + dependency_ids))
 
     def _web_gantt_reschedule_compute_dates(
         self, date_candidate, search_forward, start_date_field_name, stop_date_field_name